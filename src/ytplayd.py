@@ -1,14 +1,30 @@
 #!/usr/bin/env python3
-import os, sys, json, time, sqlite3, subprocess, threading, shutil, mimetypes, logging, re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os, sys, json, time, sqlite3, subprocess, threading, shutil, mimetypes, logging, re, hashlib, itertools
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed, wait
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from urllib.parse import urlparse, parse_qs
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, Set, Callable
 
 from openai import OpenAI
 from ytmusicapi import YTMusic
-from ytplayd_app.routes import db_routes, status_routes
-from ytplayd_app.services import status_service
+from ytplayd_app.routes import db_routes, llm_routes, status_routes, stream_routes
+from ytplayd_app.services import (
+    audio_cache_service,
+    curation_stream_service,
+    extractor_profile_service,
+    llm_client_service,
+    selection_service,
+    query_generator_service,
+    resolve_executor_service,
+    resolver_pool_service,
+    similarity_service,
+    status_service,
+    stream_refresh_service,
+    stream_url_service,
+    telemetry_service,
+    track_health_service,
+    ytdlp_service,
+)
 
 HOST = "127.0.0.1"
 
@@ -62,8 +78,27 @@ def env_file_path() -> str:
 
 PORT = int(os.getenv("YTP_PORT", "17845"))
 MODEL = os.getenv("OPENAI_MODEL", "gpt-5-mini")
+OPENAI_BASE_URL = os.getenv("YTP_OPENAI_BASE_URL", "").strip() or None
+OPENAI_MAX_CONNECTIONS = int(os.getenv("YTP_OPENAI_MAX_CONNECTIONS", "8"))
+OPENAI_MAX_CONNECTIONS = max(1, min(64, OPENAI_MAX_CONNECTIONS))
+OPENAI_KEEPALIVE_SEC = float(os.getenv("YTP_OPENAI_KEEPALIVE_SEC", "90"))
+OPENAI_MAX_RETRIES = int(os.getenv("YTP_OPENAI_MAX_RETRIES", "1"))
+OPENAI_MAX_RETRIES = max(0, min(5, OPENAI_MAX_RETRIES))
+LLM_TELEMETRY_DAYS = int(os.getenv("YTP_LLM_TELEMETRY_DAYS", "60"))
+# Telemetry rows are buffered in memory and written/pruned by telemetry_loop.
+LLM_TELEMETRY_FLUSH_SEC = 5
+LLM_TELEMETRY_PRUNE_SEC = 3600
+# Per-phase request deadlines (seconds).
+LLM_TIMEOUTS = {
+    "play": float(os.getenv("YTP_OPENAI_TIMEOUT_PLAY", "20")),
+    "auto_queue": float(os.getenv("YTP_OPENAI_TIMEOUT_QUEUE", "30")),
+    "vibe_score": float(os.getenv("YTP_OPENAI_TIMEOUT_VIBE", "8")),
+}
 MAX_TRACKS_DEFAULT = int(os.getenv("YTP_MAX_TRACKS", "25"))
 CACHE_TTL_HOURS = int(os.getenv("YTP_CACHE_TTL_HOURS", "72"))
+# Auto-queue curation cache (per prompt + seed track + action); 0 disables it.
+QUEUE_CACHE_TTL_HOURS = int(os.getenv("YTP_QUEUE_CACHE_TTL_HOURS", "24"))
+QUEUE_CACHE_TTL_HOURS = max(0, QUEUE_CACHE_TTL_HOURS)
 QUEUE_MAX = int(os.getenv("YTP_QUEUE_MAX", "3"))
 QUEUE_MAX = max(1, min(10, QUEUE_MAX))
 MAX_TRACKS_DEFAULT = min(MAX_TRACKS_DEFAULT, QUEUE_MAX)
@@ -73,6 +108,26 @@ PREFETCH_EXTRA = int(os.getenv("YTP_PREFETCH_EXTRA", "5"))
 PREFETCH_EXTRA = max(0, min(20, PREFETCH_EXTRA))
 PREFETCH_WORKERS = int(os.getenv("YTP_PREFETCH_WORKERS", "4"))
 PREFETCH_WORKERS = max(1, min(8, PREFETCH_WORKERS))
+# Lazy mode: queue entries stay watch URLs until they come within RESOLVE_LOOKAHEAD of playlist-pos.
+LAZY_RESOLVE = env_flag("YTP_LAZY_RESOLVE", "0")
+RESOLVE_LOOKAHEAD = int(os.getenv("YTP_RESOLVE_LOOKAHEAD", "1"))
+RESOLVE_LOOKAHEAD = max(0, min(10, RESOLVE_LOOKAHEAD))
+# Resolved googlevideo URLs are reused until their expire= timestamp minus this margin.
+STREAM_CACHE_ENABLED = env_flag("YTP_STREAM_CACHE", "1")
+STREAM_CACHE_MARGIN_SEC = int(os.getenv("YTP_STREAM_CACHE_MARGIN_SEC", "900"))
+STREAM_CACHE_MARGIN_SEC = max(0, STREAM_CACHE_MARGIN_SEC)
+STREAM_CACHE_MAX = int(os.getenv("YTP_STREAM_CACHE_MAX", "500"))
+STREAM_CACHE_MAX = max(10, min(10000, STREAM_CACHE_MAX))
+# Re-resolve queued stream URLs this long before their googlevideo expiry.
+STREAM_REFRESH_ENABLED = env_flag("YTP_STREAM_REFRESH", "1")
+STREAM_REFRESH_MARGIN_SEC = int(os.getenv("YTP_STREAM_REFRESH_MARGIN_SEC", "1800"))
+STREAM_REFRESH_MARGIN_SEC = max(120, STREAM_REFRESH_MARGIN_SEC)
+STREAM_REFRESH_INTERVAL_SEC = 60
+# videoIds that fail every extractor profile are skipped for this long (doubling per repeat failure).
+NEGATIVE_CACHE_TTL_MIN = int(os.getenv("YTP_NEGATIVE_CACHE_TTL_MIN", "120"))
+NEGATIVE_CACHE_TTL_MIN = max(0, NEGATIVE_CACHE_TTL_MIN)
+track_health_service.configure(NEGATIVE_CACHE_TTL_MIN * 60)
+stream_url_service.configure(STREAM_CACHE_MARGIN_SEC, STREAM_CACHE_MAX)
 RECENT_HISTORY_LIMIT = int(os.getenv("YTP_RECENT_HISTORY_LIMIT", "50"))
 RECENT_HISTORY_LIMIT = max(0, min(200, RECENT_HISTORY_LIMIT))
 NO_REPEAT_HOURS = float(os.getenv("YTP_NO_REPEAT_HOURS", "3"))
@@ -83,7 +138,26 @@ MIX_DEFAULT = os.getenv("YTP_MIX_DEFAULT", "50/50")
 VIBE_DEFAULT = os.getenv("YTP_VIBE_DEFAULT", "normal")
 VIBE_LLM_ENABLED = os.getenv("YTP_VIBE_LLM", "0") == "1"
 VIBE_LLM_MODEL = os.getenv("YTP_VIBE_LLM_MODEL", MODEL)
+SIMILARITY_ENABLED = env_flag("YTP_SIMILARITY", "1")
+SIMILARITY_MIN = float(os.getenv("YTP_SIMILARITY_MIN", "0.35"))
+SIMILARITY_MIN = max(0.0, min(1.0, SIMILARITY_MIN))
+SIMILARITY_CATALOG_LIMIT = int(os.getenv("YTP_SIMILARITY_CATALOG_LIMIT", "200"))
+SIMILARITY_CATALOG_LIMIT = max(0, min(2000, SIMILARITY_CATALOG_LIMIT))
 DEBUG_UI_ENABLED = env_flag("YTPPLAY_DEBUG_UI", "0")
+LLM_STREAM_ENABLED = env_flag("YTP_LLM_STREAM", "0")
+BATCH_CURATE_ENABLED = env_flag("YTP_BATCH_CURATE", "0")
+BATCH_QUERIES_PER_SLOT = int(os.getenv("YTP_BATCH_QUERIES_PER_SLOT", "4"))
+BATCH_QUERIES_PER_SLOT = max(1, min(10, BATCH_QUERIES_PER_SLOT))
+# /play waits at most this long for the LLM before starting from fallback/stale
+# cached queries; the call keeps running and fills prompt_cache. 0 disables.
+CURATE_HEDGE_MS = int(os.getenv("YTP_CURATE_HEDGE_MS", "0"))
+CURATE_HEDGE_MS = max(0, CURATE_HEDGE_MS)
+# Offline query generator over past LLM curations in prompt_cache.
+OFFLINE_QUERIES_ENABLED = env_flag("YTP_OFFLINE_QUERIES", "1")
+OFFLINE_FIRST = env_flag("YTP_OFFLINE_FIRST", "0")
+OFFLINE_MIN_SCORE = float(os.getenv("YTP_OFFLINE_MIN_SCORE", "0.45"))
+OFFLINE_MIN_SCORE = max(0.0, min(1.0, OFFLINE_MIN_SCORE))
+OFFLINE_NEIGHBORS = 5
 
 LOG_LEVEL = os.getenv("YTP_LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
@@ -163,6 +237,10 @@ def schedule_restart():
                 mpv.proc.wait(timeout=2)
         except Exception:
             pass
+        try:
+            resolver_pool_service.shutdown()
+        except Exception:
+            pass
         os.execv(sys.executable, [sys.executable, os.path.abspath(__file__)] + sys.argv[1:])
 
     threading.Thread(target=_restart, daemon=True).start()
@@ -214,6 +292,29 @@ else:
     YTDLP_EXTRACTOR_ARGS = YTDLP_EXTRACTOR_ARGS_ENV
 if not YTDLP_JS_RUNTIME:
     logger.warning("yt-dlp: no JS runtime found; set YTP_YTDLP_JS_RUNTIME to avoid warnings")
+# "inprocess" resolves through the yt_dlp Python API inside the daemon, "workers"
+# through a pool of long-lived resolver processes; the binary stays as fallback.
+RESOLVER_BACKEND = (os.getenv("YTP_RESOLVER_BACKEND", "subprocess").strip().lower() or "subprocess")
+if RESOLVER_BACKEND not in ("subprocess", "inprocess", "workers"):
+    logger.warning("yt-dlp: unknown YTP_RESOLVER_BACKEND=%s; using subprocess", RESOLVER_BACKEND)
+    RESOLVER_BACKEND = "subprocess"
+if RESOLVER_BACKEND in ("inprocess", "workers") and not ytdlp_service.available():
+    logger.warning("yt-dlp: YTP_RESOLVER_BACKEND=%s but the yt_dlp module is missing; using subprocess", RESOLVER_BACKEND)
+RESOLVER_WORKERS = int(os.getenv("YTP_RESOLVER_WORKERS", "2"))
+RESOLVER_WORKERS = max(1, min(8, RESOLVER_WORKERS))
+RESOLVER_MAX_JOBS = int(os.getenv("YTP_RESOLVER_MAX_JOBS", "200"))
+RESOLVER_MAX_JOBS = max(1, RESOLVER_MAX_JOBS)
+RESOLVER_TIMEOUT_SEC = float(os.getenv("YTP_RESOLVER_TIMEOUT_SEC", "30"))
+RESOLVER_TIMEOUT_SEC = max(1.0, min(300.0, RESOLVER_TIMEOUT_SEC))
+# When > 0, start the next extractor profile once the current one has run this long; first URL wins.
+RESOLVE_HEDGE_MS = int(os.getenv("YTP_RESOLVE_HEDGE_MS", "0"))
+RESOLVE_HEDGE_MS = max(0, RESOLVE_HEDGE_MS)
+# Played and liked tracks are downloaded here and replayed from disk.
+AUDIO_CACHE_ENABLED = env_flag("YTP_AUDIO_CACHE", "0")
+AUDIO_CACHE_DIR = expanduser(os.getenv("YTP_AUDIO_CACHE_DIR", "") or os.path.join(STATE_DIR, "audio"))
+AUDIO_CACHE_MAX_MB = int(os.getenv("YTP_AUDIO_CACHE_MAX_MB", "1024"))
+AUDIO_CACHE_MAX_MB = max(16, AUDIO_CACHE_MAX_MB)
+audio_cache_service.configure(AUDIO_CACHE_MAX_MB * 1024 * 1024)
 
 def require_bin(path: Optional[str], name: str, env_key: str) -> str:
     if not path:
@@ -272,6 +373,9 @@ def db() -> sqlite3.Connection:
           updated_at INTEGER NOT NULL
         );
     """)
+    con.execute(telemetry_service.CREATE_TABLE_SQL)
+    con.execute(audio_cache_service.CREATE_TABLE_SQL)
+    con.execute(track_health_service.CREATE_TABLE_SQL)
     con.commit()
     return con
 
@@ -295,8 +399,73 @@ def load_ytmusic() -> tuple[YTMusic, Optional[str]]:
     return (YTMusic(auth_path) if auth_path else YTMusic(), auth_path)
 
 def openai_client() -> OpenAI:
-    # OPENAI_API_KEY must be in env (from ~/.ytplay/.env or environment)
-    return OpenAI()
+    # OPENAI_API_KEY must be in env (from ~/.ytplay/.env or environment).
+    # A local stand-in server (YTP_OPENAI_BASE_URL) doesn't need a real key.
+    api_key = None
+    if OPENAI_BASE_URL and not os.getenv("OPENAI_API_KEY"):
+        api_key = "local"
+    return llm_client_service.get_client(
+        OpenAI,
+        base_url=OPENAI_BASE_URL,
+        api_key=api_key,
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_SEC,
+        max_retries=OPENAI_MAX_RETRIES,
+    )
+
+def response_usage(resp: Any) -> Dict[str, Optional[int]]:
+    usage = get_attr(resp, "usage") if resp is not None else None
+    if not usage:
+        return {}
+    details = get_attr(usage, "input_tokens_details")
+    return {
+        "input_tokens": get_attr(usage, "input_tokens"),
+        "output_tokens": get_attr(usage, "output_tokens"),
+        "cached_tokens": get_attr(details, "cached_tokens") if details else None,
+    }
+
+def fallback_reason(error: BaseException) -> str:
+    name = type(error).__name__
+    if "Timeout" in name:
+        return "timeout"
+    return f"error:{name}"
+
+def record_llm_call(
+    phase: str,
+    model: Optional[str],
+    started: float,
+    resp: Any = None,
+    fallback: Optional[str] = None,
+    cache_hit: bool = False,
+):
+    try:
+        telemetry_service.record(
+            phase,
+            model,
+            int((time.time() - started) * 1000),
+            cache_hit=cache_hit,
+            fallback=fallback,
+            **response_usage(resp),
+        )
+    except Exception as e:
+        logger.debug("telemetry: record failed (%s)", e)
+
+def telemetry_loop():
+    """Flush buffered LLM telemetry in batches and prune old rows, off the request path."""
+    last_prune = time.time()
+    while True:
+        time.sleep(LLM_TELEMETRY_FLUSH_SEC)
+        try:
+            telemetry_service.flush(db)
+            if time.time() - last_prune >= LLM_TELEMETRY_PRUNE_SEC:
+                last_prune = time.time()
+                telemetry_service.prune(db, LLM_TELEMETRY_DAYS)
+        except sqlite3.Error as e:
+            logger.warning("telemetry: flush failed (%s)", e)
+
+def llm_timeout(phase: str) -> Optional[float]:
+    timeout = LLM_TIMEOUTS.get(phase)
+    return timeout if timeout and timeout > 0 else None
 
 def get_votes(con: sqlite3.Connection) -> Dict[str, int]:
     out: Dict[str, int] = {}
@@ -320,6 +489,27 @@ def get_recent_likes(con: sqlite3.Connection, limit: int) -> List[Dict[str, str]
         })
     return out
 
+def get_taste_catalog(con: sqlite3.Connection, limit: int, min_score: float) -> List[Dict[str, str]]:
+    """Liked tracks plus well-rated learning rows, newest first, deduped by videoId."""
+    if limit <= 0:
+        return []
+    rows = con.execute(
+        "SELECT videoId, title, artist FROM votes WHERE vote=1 ORDER BY updated_at DESC LIMIT ?;",
+        (limit,)
+    ).fetchall()
+    rows += con.execute(
+        "SELECT videoId, title, artist FROM learning WHERE score >= ? ORDER BY updated_at DESC LIMIT ?;",
+        (min_score, limit)
+    ).fetchall()
+    out: List[Dict[str, str]] = []
+    seen = set()
+    for vid, title, artist in rows:
+        if not vid or vid in seen or not (title or artist):
+            continue
+        seen.add(vid)
+        out.append({"videoId": str(vid), "title": title or "", "artist": artist or ""})
+    return out[:limit]
+
 def get_recent_history(con: sqlite3.Connection, limit: int) -> List[str]:
     if limit <= 0:
         return []
@@ -426,7 +616,115 @@ def get_learning_for_track(con: sqlite3.Connection, video_id: str) -> Optional[D
         "updated_at": int(updated_at) if updated_at is not None else None,
     }
 
-def cache_get(con: sqlite3.Connection, key: str, ttl_hours: int) -> Optional[Dict[str, Any]]:
+PROMPT_CACHE_KEY_PREFIX = "v2:"
+QUEUE_CACHE_KEY_PREFIX = "aq:v1:"
+prompt_cache_stats_lock = threading.Lock()
+prompt_cache_stats: Dict[str, Any] = {
+    "hits": 0,
+    "misses": 0,
+    "queue_hits": 0,
+    "queue_misses": 0,
+    "migrated_legacy": 0,
+    "migrated_canonical": 0,
+}
+
+def canonical_text(text: Any) -> str:
+    return " ".join(str(text or "").lower().split())
+
+def canonical_terms(terms: Any) -> List[str]:
+    if isinstance(terms, str):
+        terms = terms.split(",")
+    return sorted({t for t in (canonical_text(term) for term in terms or []) if t})
+
+def prompt_cache_key(prompt: str, extras: Dict[str, Any]) -> str:
+    """Cache key built only from what llm_curate sends to the model, normalized."""
+    fields = {
+        "prompt": canonical_text(prompt),
+        "lang": canonical_text(extras.get("lang")),
+        "mood": canonical_text(extras.get("mood")),
+        "seed": canonical_text(extras.get("seed")),
+        "avoid": canonical_terms(extras.get("avoid")),
+        "max_queries": int(extras.get("max_queries", 10)),
+    }
+    return PROMPT_CACHE_KEY_PREFIX + json.dumps(fields, sort_keys=True, separators=(",", ":"))
+
+def queue_cache_key(prompt: str, seed_track: Dict[str, str], action: str, extras: Dict[str, Any]) -> str:
+    """Auto-queue cache key: canonical prompt, seed videoId, action and a digest of the avoid terms."""
+    avoid = canonical_terms(extras.get("avoid"))
+    fields = {
+        "prompt": canonical_text(prompt),
+        "lang": canonical_text(extras.get("lang")),
+        "mood": canonical_text(extras.get("mood")),
+        "seed": (seed_track or {}).get("videoId") or "",
+        "action": canonical_text(action) or "listen",
+        "avoid": hashlib.sha1(json.dumps(avoid).encode("utf-8")).hexdigest()[:16] if avoid else "",
+        "max_queries": int(extras.get("max_queries", 10)),
+    }
+    return QUEUE_CACHE_KEY_PREFIX + json.dumps(fields, sort_keys=True, separators=(",", ":"))
+
+def note_prompt_cache(hit: bool, kind: str = "prompt"):
+    prefix = "queue_" if kind == "queue" else ""
+    with prompt_cache_stats_lock:
+        prompt_cache_stats[prefix + ("hits" if hit else "misses")] += 1
+
+def prompt_cache_stats_snapshot() -> Dict[str, Any]:
+    with prompt_cache_stats_lock:
+        out = dict(prompt_cache_stats)
+    total = out["hits"] + out["misses"]
+    out["hit_rate"] = round(out["hits"] / total, 3) if total else None
+    queue_total = out["queue_hits"] + out["queue_misses"]
+    out["queue_hit_rate"] = round(out["queue_hits"] / queue_total, 3) if queue_total else None
+    return out
+
+def migrate_prompt_cache_keys(con: sqlite3.Connection) -> Dict[str, int]:
+    """Rewrite legacy `prompt + "\n" + json(extras)` keys to canonical keys, merging duplicates."""
+    rows = con.execute(
+        "SELECT prompt, payload, created_at, last_used_at, uses FROM prompt_cache "
+        "WHERE prompt NOT LIKE ? AND instr(prompt, char(10)) > 0;",
+        (PROMPT_CACHE_KEY_PREFIX + "%",)
+    ).fetchall()
+    if not rows:
+        return {"legacy": 0, "canonical": 0}
+    merged: Dict[str, List[Any]] = {}
+    for key, payload, created_at, last_used_at, uses in rows:
+        prompt, _, extras_raw = key.rpartition("\n")
+        try:
+            extras = json.loads(extras_raw)
+            new_key = prompt_cache_key(prompt, extras if isinstance(extras, dict) else {})
+        except (json.JSONDecodeError, TypeError, ValueError):
+            continue
+        current = merged.get(new_key)
+        if current is None:
+            merged[new_key] = [payload, created_at, last_used_at, uses or 0]
+            continue
+        if created_at > current[1]:
+            current[0], current[1] = payload, created_at
+        current[2] = max(current[2], last_used_at)
+        current[3] += uses or 0
+    for new_key, (payload, created_at, last_used_at, uses) in merged.items():
+        existing = con.execute(
+            "SELECT created_at, uses FROM prompt_cache WHERE prompt=?;", (new_key,)
+        ).fetchone()
+        if existing and int(existing[0]) >= int(created_at):
+            con.execute("UPDATE prompt_cache SET uses=uses+? WHERE prompt=?;", (uses, new_key))
+            continue
+        if existing:
+            uses += int(existing[1] or 0)
+        con.execute(
+            "INSERT OR REPLACE INTO prompt_cache(prompt, payload, created_at, last_used_at, uses) VALUES(?,?,?,?,?);",
+            (new_key, payload, created_at, last_used_at, uses)
+        )
+    con.executemany("DELETE FROM prompt_cache WHERE prompt=?;", [(r[0],) for r in rows])
+    con.commit()
+    result = {"legacy": len(rows), "canonical": len(merged)}
+    with prompt_cache_stats_lock:
+        prompt_cache_stats["migrated_legacy"] += result["legacy"]
+        prompt_cache_stats["migrated_canonical"] += result["canonical"]
+    logger.info("cache: migrated %d legacy prompt keys into %d canonical keys", result["legacy"], result["canonical"])
+    return result
+
+def cache_get(con: sqlite3.Connection, key: str, ttl_hours: Optional[int]) -> Optional[Dict[str, Any]]:
+    """Cached payload for `key`; ttl_hours=None also returns expired entries."""
     row = con.execute(
         "SELECT payload, created_at FROM prompt_cache WHERE prompt=?;",
         (key,)
@@ -435,7 +733,7 @@ def cache_get(con: sqlite3.Connection, key: str, ttl_hours: int) -> Optional[Dic
         return None
     payload, created_at = row
     age = int(time.time()) - int(created_at)
-    if age > ttl_hours * 3600:
+    if ttl_hours is not None and age > ttl_hours * 3600:
         return None
     con.execute(
         "UPDATE prompt_cache SET last_used_at=?, uses=uses+1 WHERE prompt=?;",
@@ -906,29 +1204,29 @@ def vibe_score_llm(track: Dict[str, str], profile: Dict[str, Any]) -> Optional[f
         "required": ["vibe_score"],
         "additionalProperties": False,
     }
+    response_kwargs = {
+        "model": VIBE_LLM_MODEL,
+        "input": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": json.dumps(user)},
+        ],
+        "timeout": llm_timeout("vibe_score"),
+    }
+    text_format = {"type": "json_schema", "name": "vibe_score", "schema": schema, "strict": True}
     try:
-        resp = client.responses.create(
-            model=VIBE_LLM_MODEL,
-            input=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": json.dumps(user)},
-            ],
-            text_format={"type": "json_schema", "name": "vibe_score", "schema": schema, "strict": True},
-        )
-    except TypeError:
-        resp = client.responses.create(
-            model=VIBE_LLM_MODEL,
-            input=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": json.dumps(user)},
-            ],
-        )
+        resp = create_response(client, response_kwargs, text_format)
+    except Exception as e:
+        record_llm_call("vibe_score", VIBE_LLM_MODEL, started, fallback=fallback_reason(e))
+        logger.warning("openai: vibe score failed after %.2fs (%s)", time.time() - started, e)
+        return None
     payload = parse_json_object(response_text(resp))
     logger.info("openai: vibe score done in %.2fs", time.time() - started)
     try:
         score = float(payload.get("vibe_score"))
     except (TypeError, ValueError):
+        record_llm_call("vibe_score", VIBE_LLM_MODEL, started, resp, fallback="invalid_score")
         return None
+    record_llm_call("vibe_score", VIBE_LLM_MODEL, started, resp)
     return max(0.0, min(1.0, score))
 
 def build_bucket_order(total: int, explore_ratio: float) -> List[str]:
@@ -973,29 +1271,6 @@ def preference_score(track: Dict[str, str], votes: Dict[str, int], liked_artists
             score = max(score, float(learned_score))
     return score
 
-def artist_count(window: List[str], artist: str) -> int:
-    return sum(1 for a in window if a == artist)
-
-def pick_next_candidate(
-    candidates: List[Dict[str, Any]],
-    start_idx: int,
-    used_ids: set,
-    artist_window: List[str],
-    max_per_artist: int
-) -> tuple[Optional[Dict[str, str]], int]:
-    idx = start_idx
-    while idx < len(candidates):
-        track = candidates[idx]["track"]
-        vid = track.get("videoId")
-        artist = (track.get("artist") or "").lower()
-        idx += 1
-        if not vid or vid in used_ids:
-            continue
-        if artist and artist_count(artist_window, artist) >= max_per_artist:
-            continue
-        return track, idx
-    return None, idx
-
 def ensure_seed_first(
     tracks: List[Dict[str, str]],
     seed_info: Optional[Dict[str, str]],
@@ -1132,7 +1407,7 @@ def parse_curation_response(text: str, max_queries: int) -> Dict[str, Any]:
     if not isinstance(payload, dict):
         raise ValueError("LLM response JSON was not an object.")
 
-    search_queries = payload.get("queries") or []
+    search_queries = payload.get("search_queries") or payload.get("queries") or []
     if isinstance(search_queries, str):
         search_queries = [search_queries]
     elif not isinstance(search_queries, list):
@@ -1199,15 +1474,98 @@ def fallback_queries(prompt: str, extras: Dict[str, Any], max_queries: int) -> L
         return out[:max_queries]
     return out
 
-def llm_curate(prompt: str, extras: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Returns:
-      - search_queries: list[str]
-      - avoid_terms: list[str]
-      - notes: str
-    """
-    client = openai_client()
+def offline_prompt_text(prompt: str, lang: Any, mood: Any) -> str:
+    lang_name = LANG_CODE_MAP.get(canonical_text(lang), canonical_text(lang))
+    return " ".join(p for p in (canonical_text(prompt), canonical_text(mood), lang_name) if p)
+
+def load_query_generator(con: sqlite3.Connection) -> query_generator_service.QueryGenerator:
+    """Generator over LLM-sourced v2 prompt_cache rows; rebuilt only when the cache changed."""
+    pattern = PROMPT_CACHE_KEY_PREFIX + "%"
+    signature = tuple(con.execute(
+        "SELECT COUNT(*), MAX(created_at) FROM prompt_cache WHERE prompt LIKE ?;", (pattern,)
+    ).fetchone() or ())
+
+    def rows():
+        for key, payload in con.execute(
+            "SELECT prompt, payload FROM prompt_cache WHERE prompt LIKE ?;", (pattern,)
+        ).fetchall():
+            try:
+                fields = json.loads(key[len(PROMPT_CACHE_KEY_PREFIX):])
+                curated = (json.loads(payload) or {}).get("curated") or {}
+            except (json.JSONDecodeError, AttributeError, TypeError):
+                continue
+            if curated.get("source") not in ("llm", "llm_partial"):
+                continue
+            text = offline_prompt_text(fields.get("prompt"), fields.get("lang"), fields.get("mood"))
+            yield text, curated.get("search_queries") or [], curated.get("avoid_terms") or []
+
+    return query_generator_service.generator_for(signature, rows)
+
+def offline_curation(prompt: str, extras: Dict[str, Any], max_queries: int) -> Optional[Dict[str, Any]]:
+    """Queries from the nearest past LLM curations, or None if nothing is close enough."""
+    if not OFFLINE_QUERIES_ENABLED:
+        return None
+    con = db()
+    try:
+        generator = load_query_generator(con)
+    except sqlite3.Error as e:
+        logger.warning("offline: loading past curations failed (%s)", e)
+        return None
+    finally:
+        con.close()
+    result = generator.generate(
+        offline_prompt_text(prompt, extras.get("lang"), extras.get("mood")),
+        max_queries=max_queries,
+        k=OFFLINE_NEIGHBORS,
+        min_score=OFFLINE_MIN_SCORE,
+        avoid=canonical_terms(extras.get("avoid")),
+    )
+    if not result["search_queries"]:
+        return None
+    logger.info(
+        "offline: %d queries from %d past curations (best %.2f)",
+        len(result["search_queries"]),
+        len(result["matches"]),
+        result["matches"][0]["score"],
+    )
+    return {
+        "search_queries": result["search_queries"],
+        "avoid_terms": result["avoid_terms"],
+        "notes": "offline: nearest past curations",
+        "source": "offline",
+        "matches": result["matches"],
+    }
+
+def fallback_curation(
+    prompt: str,
+    extras: Dict[str, Any],
+    max_queries: int,
+    notes: str = "fallback: curation failed",
+) -> Dict[str, Any]:
+    """What to use when the LLM gives nothing: offline queries if any are close, else fallback_queries."""
+    offline = offline_curation(prompt, extras, max_queries)
+    if offline:
+        return offline
+    return {
+        "search_queries": fallback_queries(prompt, extras, max_queries),
+        "avoid_terms": [],
+        "notes": notes,
+        "source": "fallback",
+    }
 
+def create_response(client: OpenAI, response_kwargs: Dict[str, Any], text_format: Dict[str, Any]) -> Any:
+    if response_kwargs.get("timeout") is None:
+        # An explicit None would disable the SDK's own default timeout.
+        response_kwargs = {k: v for k, v in response_kwargs.items() if k != "timeout"}
+    try:
+        return client.responses.create(**response_kwargs, text_format=text_format)
+    except TypeError as e:
+        if "text_format" not in str(e):
+            raise
+        return client.responses.create(**response_kwargs)
+
+def curation_request(prompt: str, extras: Dict[str, Any], phase: str) -> tuple[Dict[str, Any], Dict[str, Any], int]:
+    """Build the Responses API kwargs, text format and query cap for a curation call."""
     lang = extras.get("lang")
     mood = extras.get("mood")
     seed = extras.get("seed")
@@ -1252,34 +1610,45 @@ def llm_curate(prompt: str, extras: Dict[str, Any]) -> Dict[str, Any]:
             {"role": "system", "content": system},
             {"role": "user", "content": json.dumps(user)}
         ],
+        "timeout": llm_timeout(phase),
     }
     text_format = {"type": "json_schema", "name": "curation", "schema": schema, "strict": True}
+    return response_kwargs, text_format, max_queries
+
+def llm_curate(prompt: str, extras: Dict[str, Any], phase: str = "play") -> Dict[str, Any]:
+    """
+    `phase` ("play" or "auto_queue") selects the request deadline.
+
+    Returns:
+      - search_queries: list[str]
+      - avoid_terms: list[str]
+      - notes: str
+    """
+    client = openai_client()
+    response_kwargs, text_format, max_queries = curation_request(prompt, extras, phase)
 
-    logger.info("openai: curate start (seed=%s, mood=%s, lang=%s)", seed, mood, lang)
+    logger.info("openai: curate start (seed=%s, mood=%s, lang=%s)", extras.get("seed"), extras.get("mood"), extras.get("lang"))
     started = time.time()
     source = "llm"
     error = None
+    reason = None
+    resp = None
     try:
-        try:
-            resp = client.responses.create(**response_kwargs, text_format=text_format)
-        except TypeError as e:
-            if "text_format" not in str(e):
-                raise
-            resp = client.responses.create(**response_kwargs)
+        resp = create_response(client, response_kwargs, text_format)
         curated = parse_curation_response(response_text(resp), max_queries)
     except Exception as e:
         error = str(e)
-        curated = {
-            "search_queries": fallback_queries(prompt, extras, max_queries),
-            "avoid_terms": [],
-            "notes": "fallback: curation failed",
-        }
-        source = "fallback"
-        logger.warning("openai: curate failed, using fallback queries (%s)", error)
+        reason = fallback_reason(e)
+        curated = fallback_curation(prompt, extras, max_queries)
+        source = curated["source"]
+        logger.warning("openai: curate failed, using %s queries (%s)", source, error)
 
     if not curated.get("search_queries"):
-        curated["search_queries"] = fallback_queries(prompt, extras, max_queries)
-        source = "fallback"
+        fallback = fallback_curation(prompt, extras, max_queries)
+        curated["search_queries"] = fallback["search_queries"]
+        source = fallback["source"]
+        reason = reason or "empty_queries"
+    record_llm_call(phase, MODEL, started, resp, fallback=reason)
     elapsed = time.time() - started
     logger.info(
         "openai: curate done in %.2fs (%d queries)",
@@ -1291,6 +1660,230 @@ def llm_curate(prompt: str, extras: Dict[str, Any]) -> Dict[str, Any]:
         curated["error"] = error
     return curated
 
+def stream_delta(event: Any) -> str:
+    if get_attr(event, "type") != "response.output_text.delta":
+        return ""
+    delta = get_attr(event, "delta")
+    return delta if isinstance(delta, str) else ""
+
+def llm_curate_stream(
+    prompt: str,
+    extras: Dict[str, Any],
+    on_query: Callable[[str], None],
+    phase: str = "play",
+) -> Dict[str, Any]:
+    """
+    Streaming variant of llm_curate: `on_query` is called with each search
+    query as soon as it has been fully generated. If the stream breaks
+    partway, the queries received so far are kept (source "llm_partial").
+    """
+    client = openai_client()
+    response_kwargs, text_format, max_queries = curation_request(prompt, extras, phase)
+    parser = curation_stream_service.QueryStreamParser()
+    emitted = 0
+
+    def emit(queries: List[str]):
+        nonlocal emitted
+        for q in queries:
+            if emitted >= max_queries:
+                return
+            emitted += 1
+            logger.info("openai: streamed query %d '%s'", emitted, q)
+            on_query(q)
+
+    logger.info("openai: curate stream start (seed=%s, mood=%s, lang=%s)", extras.get("seed"), extras.get("mood"), extras.get("lang"))
+    started = time.time()
+    error = None
+    reason = None
+    final_resp = None
+    try:
+        stream = create_response(client, {**response_kwargs, "stream": True}, text_format)
+        for event in stream:
+            if get_attr(event, "type") == "response.completed":
+                final_resp = get_attr(event, "response")
+            emit(parser.feed(stream_delta(event)))
+    except Exception as e:
+        error = str(e)
+        reason = fallback_reason(e)
+        logger.warning("openai: curate stream failed after %d queries (%s)", emitted, error)
+
+    received = parser.queries[:max_queries]
+    curated: Dict[str, Any]
+    try:
+        if error:
+            raise ValueError(error)
+        curated = parse_curation_response(parser.text, max_queries)
+        curated["source"] = "llm"
+    except ValueError:
+        curated = {"search_queries": received, "avoid_terms": [], "notes": "", "source": "llm_partial"}
+        reason = reason or "invalid_json"
+    if not curated.get("search_queries"):
+        curated = fallback_curation(prompt, extras, max_queries)
+        emit(curated["search_queries"])
+        reason = reason or "empty_queries"
+    elif emitted < len(curated["search_queries"]):
+        emit(curated["search_queries"][emitted:])
+    record_llm_call(phase, MODEL, started, final_resp, fallback=reason)
+    if error:
+        curated["error"] = error
+    logger.info(
+        "openai: curate stream done in %.2fs (%d queries)",
+        time.time() - started,
+        len(curated.get("search_queries") or []),
+    )
+    return curated
+
+def parse_batch_curation_response(text: str, max_queries: int, slots: int) -> Dict[str, Any]:
+    payload = parse_json_object(text)
+    if not isinstance(payload, dict) or not payload:
+        raise ValueError("LLM batch response was not a JSON object.")
+
+    def query_set(raw: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(raw, dict):
+            return None
+        parsed = parse_curation_response(json.dumps(raw), max_queries)
+        if not parsed.get("search_queries"):
+            return None
+        return {"search_queries": parsed["search_queries"], "avoid_terms": parsed["avoid_terms"]}
+
+    plan_slots: List[Dict[str, Any]] = []
+    for raw in payload.get("slots") or []:
+        step = query_set(raw)
+        if step:
+            plan_slots.append(step)
+        if len(plan_slots) >= slots:
+            break
+    notes = payload.get("notes") or ""
+    return {
+        "slots": plan_slots,
+        "on_like": query_set(payload.get("on_like")),
+        "on_skip": query_set(payload.get("on_skip")),
+        "notes": notes if isinstance(notes, str) else str(notes),
+    }
+
+def llm_curate_batch(prompt: str, extras: Dict[str, Any], slots: int) -> Dict[str, Any]:
+    """
+    One LLM round trip for the next `slots` auto-queue picks.
+
+    Returns:
+      - slots: list of {search_queries, avoid_terms}, one per upcoming slot
+      - on_like / on_skip: alternative query sets to use if the listener
+        likes or skips the current seed before the plan is used up
+      - notes, source (+ error on fallback)
+    """
+    client = openai_client()
+    slots = max(1, slots)
+    max_queries = min(int(extras.get("max_queries", 10)), BATCH_QUERIES_PER_SLOT)
+    seed = extras.get("seed")
+
+    system = (
+        "You are a music curator for YouTube Music planning the next tracks of a radio queue. "
+        "Output JSON only. Produce tight, non-noisy search queries. "
+        "Prefer official audio and studio versions. Avoid remix spam unless requested."
+    )
+    user = {
+        "prompt": prompt,
+        "preferences": {
+            "lang": extras.get("lang"),
+            "mood": extras.get("mood"),
+            "seed": seed,
+            "avoid_terms": extras.get("avoid", []),
+        },
+        "instruction": (
+            f"Plan the next {slots} queue slots after the seed track. "
+            f"For each slot provide up to {max_queries} search queries that keep the vibe coherent "
+            "while drifting gently away from the seed. Also provide on_like queries to use if the "
+            "listener likes the seed (stay closer to it) and on_skip queries (plus avoid_terms) to use "
+            "if they skip it (steer away from it within the prompt's vibe)."
+        ),
+    }
+    query_set = {
+        "type": "object",
+        "properties": {
+            "search_queries": {"type": "array", "items": {"type": "string"}},
+            "avoid_terms": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["search_queries", "avoid_terms"],
+        "additionalProperties": False,
+    }
+    schema = {
+        "type": "object",
+        "properties": {
+            "slots": {"type": "array", "items": query_set},
+            "on_like": query_set,
+            "on_skip": query_set,
+            "notes": {"type": "string"},
+        },
+        "required": ["slots", "on_like", "on_skip", "notes"],
+        "additionalProperties": False,
+    }
+    response_kwargs = {
+        "model": MODEL,
+        "input": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": json.dumps(user)}
+        ],
+        "timeout": llm_timeout("auto_queue"),
+    }
+    text_format = {"type": "json_schema", "name": "curation_batch", "schema": schema, "strict": True}
+
+    logger.info("openai: batch curate start (seed=%s, slots=%d)", seed, slots)
+    started = time.time()
+    resp = None
+    reason = None
+    try:
+        resp = create_response(client, response_kwargs, text_format)
+        plan = parse_batch_curation_response(response_text(resp), max_queries, slots)
+        plan["source"] = "llm"
+    except Exception as e:
+        logger.warning("openai: batch curate failed, using fallback queries (%s)", e)
+        reason = fallback_reason(e)
+        plan = {"slots": [], "on_like": None, "on_skip": None, "notes": "", "source": "fallback", "error": str(e)}
+    if not plan["slots"]:
+        fallback = fallback_curation(prompt, extras, max_queries)
+        plan["slots"] = [{"search_queries": fallback["search_queries"], "avoid_terms": fallback["avoid_terms"]}]
+        plan["source"] = fallback["source"]
+        reason = reason or "empty_queries"
+    record_llm_call("auto_queue", MODEL, started, resp, fallback=reason)
+    logger.info("openai: batch curate done in %.2fs (%d slots)", time.time() - started, len(plan["slots"]))
+    return plan
+
+def search_query(yt: YTMusic, query: str) -> tuple[List[Dict[str, Any]], bool]:
+    """Song search with a fallback to the unfiltered search; returns (results, used_fallback)."""
+    try:
+        results = yt.search(query, filter="songs")
+    except Exception:
+        results = []
+    if results:
+        return results, False
+    try:
+        return yt.search(query), True
+    except Exception:
+        return [], False
+
+def load_pick_context(con: sqlite3.Connection) -> Dict[str, Any]:
+    """Everything pick_tracks reads from SQLite; independent of the prompt and queries."""
+    liked_tracks = get_recent_likes(con, 20)
+    taste_index: Optional[similarity_service.SimilarityIndex] = None
+    if SIMILARITY_ENABLED:
+        catalog = get_taste_catalog(con, SIMILARITY_CATALOG_LIMIT, LEARN_MIN_SCORE)
+        if catalog:
+            taste_index = similarity_service.index_for_tracks(catalog)
+    no_repeat_seconds = int(NO_REPEAT_HOURS * 3600)
+    recent_window: Set[str] = set()
+    if no_repeat_seconds > 0:
+        recent_window = set(get_recent_history_since(con, int(time.time()) - no_repeat_seconds))
+    return {
+        "votes": get_votes(con),
+        "liked_tracks": liked_tracks,
+        "liked_artists": {t.get("artist", "").lower() for t in liked_tracks if t.get("artist")},
+        "learning": get_learning(con),
+        "learning_profile": get_learning_profile(con, LEARN_MIN_SCORE, 25),
+        "taste_index": taste_index,
+        "recent_window": recent_window,
+        "unresolvable": track_health_service.blocked_ids(),
+    }
+
 def pick_tracks(
     yt: YTMusic,
     prompt: str,
@@ -1298,25 +1891,38 @@ def pick_tracks(
     max_tracks: int,
     extras: Dict[str, Any],
     debug_meta: Optional[Dict[str, Any]] = None,
-    include_seed: bool = True
+    include_seed: bool = True,
+    context: Optional[Dict[str, Any]] = None,
+    search_results: Optional[Dict[str, Future]] = None,
 ) -> tuple[List[Dict[str, str]], Optional[Dict[str, str]], List[Dict[str, str]]]:
-    con = db()
-    votes = get_votes(con)
-    liked_tracks = get_recent_likes(con, 20)
-    liked_artists = {t.get("artist", "").lower() for t in liked_tracks if t.get("artist")}
-    learning = get_learning(con)
-    learning_profile = get_learning_profile(con, LEARN_MIN_SCORE, 25)
-    no_repeat_seconds = int(NO_REPEAT_HOURS * 3600)
-    recent_window: Set[str] = set()
-    if no_repeat_seconds > 0:
-        recent_window = set(get_recent_history_since(con, int(time.time()) - no_repeat_seconds))
+    """
+    `context` is a prebuilt load_pick_context() result; when it carries a
+    "seed_info" key the seed is taken as already resolved. `search_results`
+    maps queries to in-flight search_query() futures started earlier.
+    """
+    if context is None:
+        con = db()
+        try:
+            context = load_pick_context(con)
+        finally:
+            con.close()
+    votes = context["votes"]
+    liked_tracks = context["liked_tracks"]
+    liked_artists = context["liked_artists"]
+    learning = context["learning"]
+    learning_profile = context["learning_profile"]
+    taste_index: Optional[similarity_service.SimilarityIndex] = context["taste_index"]
+    recent_window: Set[str] = set(context["recent_window"])
+    unresolvable: Set[str] = set(context.get("unresolvable") or ())
     if session_seen_ids:
         recent_window |= set(session_seen_ids)
     allow_repeat_flag = allow_repeat(prompt)
 
     seed = extras.get("seed")
     seed_info: Optional[Dict[str, str]] = None
-    if seed:
+    if "seed_info" in context:
+        seed_info = context["seed_info"]
+    elif seed:
         seed_info = resolve_seed(yt, seed, votes)
 
     avoid_terms = (extras.get("avoid") or []) + (extras.get("avoid_terms") or [])
@@ -1337,10 +1943,13 @@ def pick_tracks(
         "seed_included": bool(seed_info) and include_seed,
         "seed_used": bool(seed_info),
         "seed_next_count": 0,
+        "similarity_catalog": len(taste_index) if taste_index else 0,
+        "similarity_promoted": 0,
         "skips": {
             "no_track": 0,
             "duplicate": 0,
             "disliked": 0,
+            "unresolvable": 0,
             "repeat_window": 0,
             "vibe": 0,
             "learn_low": 0,
@@ -1369,16 +1978,11 @@ def pick_tracks(
     for qi, q in enumerate(queries, 1):
         logger.info("ytmusic: search %d/%d '%s'", qi, len(queries), q)
         query_stat = {"query": q, "results": 0, "candidates": 0, "fallback": False}
-        try:
-            results = yt.search(q, filter="songs")
-        except Exception:
-            results = []
-        if not results:
-            try:
-                results = yt.search(q)
-                query_stat["fallback"] = True
-            except Exception:
-                results = []
+        future = (search_results or {}).get(q)
+        if future is not None:
+            results, query_stat["fallback"] = future.result()
+        else:
+            results, query_stat["fallback"] = search_query(yt, q)
         query_stat["results"] = len(results)
         debug["results_total"] += len(results)
         for r in results[:12]:
@@ -1393,6 +1997,9 @@ def pick_tracks(
             if votes.get(vid, 0) < 0:
                 debug["skips"]["disliked"] += 1
                 continue
+            if vid in unresolvable:
+                debug["skips"]["unresolvable"] += 1
+                continue
             if (vid in recent_window) and not allow_repeat_flag:
                 debug["skips"]["repeat_window"] += 1
                 logger.debug("skip recent repeat %s", vid)
@@ -1413,70 +2020,46 @@ def pick_tracks(
                 continue
 
             pref = preference_score(track, votes, liked_artists, learning)
-            candidates.append({"track": track, "vibe": base_score, "pref": pref})
+            sim = taste_index.max_similarity(similarity_service.track_text(track)) if taste_index else 0.0
+            candidates.append({"track": track, "vibe": base_score, "pref": pref, "sim": sim})
             seen.add(vid)
             query_stat["candidates"] += 1
-            logger.debug("candidate %s vibe=%.2f pref=%.2f", vid, base_score, pref)
+            logger.debug("candidate %s vibe=%.2f pref=%.2f sim=%.2f", vid, base_score, pref, sim)
         debug["query_stats"].append(query_stat)
 
-    exploit = sorted(
-        [c for c in candidates if c["pref"] > 0],
-        key=lambda c: (c["pref"], c["vibe"]),
-        reverse=True,
+    # Tracks that sound close to the taste catalog join the exploit bucket even
+    # without a direct vote/learning signal.
+    def in_exploit(c: Dict[str, Any]) -> bool:
+        return c["pref"] > 0 or c["sim"] >= SIMILARITY_MIN
+
+    exploit = selection_service.RankedPool(
+        [c for c in candidates if in_exploit(c)],
+        key=lambda c: (c["pref"], c["sim"], c["vibe"]),
     )
-    explore = sorted(
-        [c for c in candidates if c["pref"] == 0],
-        key=lambda c: c["vibe"],
-        reverse=True,
+    explore = selection_service.RankedPool(
+        [c for c in candidates if not in_exploit(c)],
+        key=lambda c: (c["vibe"],),
     )
+    debug["similarity_promoted"] = sum(1 for c in candidates if in_exploit(c) and c["pref"] == 0)
 
     selected: List[Dict[str, str]] = []
-    artist_window: List[str] = []
+    artist_window = selection_service.ArtistWindow(10)
     used_ids = set()
     if seed_info and include_seed:
         selected.append(seed_info)
         used_ids.add(seed_info.get("videoId"))
-        artist = (seed_info.get("artist") or "").lower()
-        if artist:
-            artist_window.append(artist)
-
-    remaining = max_tracks - len(selected)
-    order = build_bucket_order(remaining, mix_ratio)
-    explore_idx = 0
-    exploit_idx = 0
-
-    for bucket in order:
-        if bucket == "explore":
-            track, explore_idx = pick_next_candidate(explore, explore_idx, used_ids, artist_window, 2)
-            if not track:
-                track, exploit_idx = pick_next_candidate(exploit, exploit_idx, used_ids, artist_window, 2)
-        else:
-            track, exploit_idx = pick_next_candidate(exploit, exploit_idx, used_ids, artist_window, 2)
-            if not track:
-                track, explore_idx = pick_next_candidate(explore, explore_idx, used_ids, artist_window, 2)
-        if not track:
-            break
-        selected.append(track)
-        used_ids.add(track.get("videoId"))
-        artist = (track.get("artist") or "").lower()
-        if artist:
-            artist_window.append(artist)
-            if len(artist_window) > 10:
-                artist_window.pop(0)
-
-    while len(selected) < max_tracks:
-        track, explore_idx = pick_next_candidate(explore, explore_idx, used_ids, artist_window, 2)
-        if not track:
-            track, exploit_idx = pick_next_candidate(exploit, exploit_idx, used_ids, artist_window, 2)
-        if not track:
-            break
-        selected.append(track)
-        used_ids.add(track.get("videoId"))
-        artist = (track.get("artist") or "").lower()
-        if artist:
-            artist_window.append(artist)
-            if len(artist_window) > 10:
-                artist_window.pop(0)
+        artist_window.add((seed_info.get("artist") or "").lower())
+
+    order = build_bucket_order(max_tracks - len(selected), mix_ratio)
+    selection_service.select_from_buckets(
+        {"exploit": exploit, "explore": explore},
+        order,
+        selected,
+        used_ids,
+        artist_window,
+        max_tracks,
+        max_per_artist=2,
+    )
 
     seed_next: List[Dict[str, str]] = []
     if seed_info and include_seed:
@@ -1496,69 +2079,265 @@ def pick_tracks(
         len([t for t in selected if preference_score(t, votes, liked_artists, learning) == 0]),
     )
 
-    con.close()
     return selected[:max_tracks], seed_info, seed_next
 
-def resolve_stream_url(videoId: str) -> Optional[str]:
+def ytdlp_command(extractor_args: Optional[str]) -> List[str]:
     ytdlp_bin = require_bin(YTDLP_BIN, "yt-dlp", "YTP_YTDLP_BIN")
-    yurl = f"https://www.youtube.com/watch?v={videoId}"
-    base = [ytdlp_bin, "-f", "bestaudio", "--get-url"]
+    cmd = [ytdlp_bin, "-f", "bestaudio"]
     if YTDLP_JS_RUNTIME:
-        base += ["--js-runtimes", YTDLP_JS_RUNTIME]
-
-    def try_resolve(extractor_args: Optional[str]) -> Optional[str]:
-        cmd = list(base)
-        if extractor_args is not None:
-            extractor_args = extractor_args.strip()
-            if extractor_args and extractor_args != "__none__":
-                cmd += ["--extractor-args", extractor_args]
+        cmd += ["--js-runtimes", YTDLP_JS_RUNTIME]
+    if extractor_args is not None:
+        extractor_args = extractor_args.strip()
+        if extractor_args and extractor_args != "__none__":
+            cmd += ["--extractor-args", extractor_args]
+    return cmd
+
+def resolve_stream_url_subprocess(
+    videoId: str,
+    extractor_args: Optional[str],
+    cancel: Optional[threading.Event] = None,
+) -> Optional[str]:
+    cmd = ytdlp_command(extractor_args) + ["--get-url"]
+    if cancel is None:
         try:
-            direct = subprocess.check_output(cmd + [yurl], text=True).strip()
-            return direct or None
+            direct = subprocess.check_output(cmd + [watch_url(videoId)], text=True).strip()
         except subprocess.CalledProcessError:
             return None
+    else:
+        # Hedged race: poll so the losing yt-dlp process can be killed.
+        proc = subprocess.Popen(cmd + [watch_url(videoId)], stdout=subprocess.PIPE, text=True)
+        while True:
+            try:
+                out, _ = proc.communicate(timeout=0.1)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel.is_set():
+                    proc.kill()
+                    proc.communicate()
+                    return None
+        if proc.returncode != 0:
+            return None
+        direct = (out or "").strip()
+    # --get-url prints one line per format; bestaudio is a single line.
+    return direct.splitlines()[0].strip() if direct else None
+
+def resolve_stream_url_inprocess(
+    videoId: str,
+    extractor_args: Optional[str],
+    cancel: Optional[threading.Event] = None,
+) -> Optional[str]:
+    # extract_info cannot be interrupted; a cancelled call just finishes and is discarded.
+    try:
+        url = ytdlp_service.resolve(videoId, extractor_args, YTDLP_JS_RUNTIME)
+    except Exception as e:
+        logger.warning("stream: in-process resolve failed for %s (%s); using yt-dlp binary", videoId, e)
+        return resolve_stream_url_subprocess(videoId, extractor_args, cancel)
+    return url
+
+def resolve_stream_url_worker(
+    videoId: str,
+    extractor_args: Optional[str],
+    cancel: Optional[threading.Event] = None,
+) -> Optional[str]:
+    pool = resolver_pool_service.get_pool(RESOLVER_WORKERS, RESOLVER_MAX_JOBS, RESOLVER_TIMEOUT_SEC)
+    try:
+        return pool.resolve(videoId, extractor_args, YTDLP_JS_RUNTIME)
+    except Exception as e:
+        logger.warning("stream: resolver worker failed for %s (%s); using yt-dlp binary", videoId, e)
+        return resolve_stream_url_subprocess(videoId, extractor_args, cancel)
+
+# Hedged races run each extractor profile here so the caller can stop waiting on the loser.
+resolve_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+def hedged_resolve(
+    videoId: str,
+    profiles: List[Optional[str]],
+    attempt: Callable[[Optional[str], threading.Event], Optional[str]],
+) -> Optional[str]:
+    """Start profiles[0]; add the next profile after RESOLVE_HEDGE_MS or as soon as one fails. First URL wins."""
+    cancel = threading.Event()
+    waiting = list(profiles)
+    running: Dict[Future, Optional[str]] = {}
+    try:
+        while waiting or running:
+            if waiting and not running:
+                profile = waiting.pop(0)
+                running[resolve_hedge_pool.submit(attempt, profile, cancel)] = profile
+            done, _ = wait(list(running), timeout=RESOLVE_HEDGE_MS / 1000.0 if waiting else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                profile = waiting.pop(0)
+                logger.info("stream: %s still resolving after %dms; hedging with next extractor profile",
+                            videoId, RESOLVE_HEDGE_MS)
+                running[resolve_hedge_pool.submit(attempt, profile, cancel)] = profile
+                continue
+            for future in done:
+                running.pop(future)
+                try:
+                    url = future.result()
+                except Exception as e:
+                    logger.warning("stream: hedged resolve failed for %s err=%s", videoId, e)
+                    url = None
+                if url:
+                    if running:
+                        logger.info("stream: hedge winner for %s; cancelling %d other attempt(s)", videoId, len(running))
+                    return url
+    finally:
+        cancel.set()
+    return None
 
-    url = try_resolve(YTDLP_EXTRACTOR_ARGS)
+def resolve_stream_url(videoId: str) -> Optional[str]:
+    if AUDIO_CACHE_ENABLED:
+        local = audio_cache_service.lookup(db, videoId)
+        if local:
+            logger.debug("audio: playing %s from disk", videoId)
+            return local
+    if track_health_service.is_blocked(videoId):
+        logger.info("stream: %s failed to resolve recently; skipping yt-dlp", videoId)
+        return None
+    profiles = [YTDLP_EXTRACTOR_ARGS]
+    if YTDLP_EXTRACTOR_ARGS_FALLBACK is not None:
+        profiles.append(YTDLP_EXTRACTOR_ARGS_FALLBACK)
+    if STREAM_CACHE_ENABLED:
+        cached = stream_url_service.get_any(videoId, profiles)
+        if cached:
+            logger.debug("stream: cache hit %s", videoId)
+            return cached
+
+    if RESOLVER_BACKEND == "inprocess" and ytdlp_service.available():
+        backend = resolve_stream_url_inprocess
+    elif RESOLVER_BACKEND == "workers" and ytdlp_service.available():
+        backend = resolve_stream_url_worker
+    else:
+        backend = resolve_stream_url_subprocess
+
+    def try_resolve(extractor_args: Optional[str], cancel: Optional[threading.Event] = None) -> Optional[str]:
+        started = time.time()
+        direct = backend(videoId, extractor_args, cancel)
+        if not direct and cancel is not None and cancel.is_set():
+            return None  # lost a hedged race; says nothing about the profile
+        extractor_profile_service.record(extractor_args, bool(direct), int((time.time() - started) * 1000))
+        if direct and STREAM_CACHE_ENABLED:
+            stream_url_service.put(videoId, extractor_args, direct)
+        return direct or None
+
+    # Best-performing profile first once there is enough evidence.
+    profiles = extractor_profile_service.order(profiles)
+    if RESOLVE_HEDGE_MS > 0 and len(profiles) > 1:
+        url = hedged_resolve(videoId, profiles, try_resolve)
+    else:
+        url = None
+        for attempt, profile in enumerate(profiles):
+            url = try_resolve(profile)
+            if url:
+                if attempt:
+                    logger.info("stream: fallback extractor args succeeded after primary failed")
+                break
     if url:
+        track_health_service.record_success(db, videoId)
         return url
-    if YTDLP_EXTRACTOR_ARGS_FALLBACK is not None:
-        url = try_resolve(YTDLP_EXTRACTOR_ARGS_FALLBACK)
-        if url:
-            logger.info("stream: fallback extractor args succeeded after primary failed")
-            return url
+    blocked_until = track_health_service.record_failure(db, videoId)
+    if not blocked_until:
+        logger.warning("stream: %s unresolvable, but so are many other tracks; not blocking it", videoId)
+        return None
+    logger.warning("stream: %s unresolvable; skipping it for %d min", videoId, max(0, blocked_until - int(time.time())) // 60)
     return None
 
 def watch_url(videoId: str) -> str:
     return f"https://www.youtube.com/watch?v={videoId}"
 
+def download_audio(videoId: str) -> Optional[str]:
+    os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+    template = os.path.join(AUDIO_CACHE_DIR, f"{videoId}.%(ext)s")
+    cmd = ytdlp_command(YTDLP_EXTRACTOR_ARGS) + ["--no-playlist", "--no-progress", "--quiet", "-o", template]
+    try:
+        subprocess.run(
+            cmd + [watch_url(videoId)],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=600,
+        )
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return None
+    return audio_cache_service.find_file(AUDIO_CACHE_DIR, videoId)
+
+def cache_audio_worker(videoId: str):
+    try:
+        if audio_cache_service.contains(db, videoId):
+            return
+        path = download_audio(videoId)
+        if not path:
+            logger.warning("audio: download failed for %s", videoId)
+            return
+        evicted = audio_cache_service.store(db, videoId, path)
+        logger.info("audio: cached %s (%d KB, evicted %d)", videoId, os.path.getsize(path) // 1024, evicted)
+    except Exception as e:
+        logger.warning("audio: caching %s failed err=%s", videoId, e)
+    finally:
+        audio_cache_service.end(videoId)
+
+# One download at a time; this is background work and must not compete with resolves.
+audio_cache_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio")
+
+def cache_audio(videoId: Optional[str]):
+    """Queue a background download of `videoId` into the audio cache (played or liked tracks)."""
+    if not AUDIO_CACHE_ENABLED or not videoId:
+        return
+    if audio_cache_service.begin(videoId):
+        audio_cache_pool.submit(cache_audio_worker, videoId)
+
+# Every stream URL resolve goes through here; PREFETCH_WORKERS bounds concurrent yt-dlp runs daemon-wide.
+resolver_executor = resolve_executor_service.ResolverExecutor(lambda vid: resolve_stream_url(vid), PREFETCH_WORKERS)
+
+def resolve_priority(offset: int) -> int:
+    """Executor priority for a track `offset` entries after the one playing now."""
+    if offset <= 0:
+        return resolve_executor_service.PRIORITY_NOW
+    if offset == 1:
+        return resolve_executor_service.PRIORITY_NEXT
+    return resolve_executor_service.PRIORITY_PREFETCH
+
 def resolve_urls_parallel(
     tracks: List[Dict[str, str]],
     max_tracks: int,
-    workers: int
+    known_urls: Optional[Dict[str, str]] = None,
+    offset: int = 0,
 ) -> tuple[List[Optional[str]], int]:
+    """Resolve `tracks[:max_tracks]` on resolver_executor; tracks[0] plays `offset` entries after the current one."""
     if not tracks or max_tracks <= 0:
         return [], 0
 
     tracks = tracks[:max_tracks]
-    workers = min(workers, len(tracks))
     results: List[Optional[str]] = [None] * len(tracks)
+    pending: List[int] = []
+    for idx, track in enumerate(tracks):
+        known = (known_urls or {}).get(track.get("videoId") or "")
+        if known:
+            results[idx] = known
+        else:
+            pending.append(idx)
+    if not pending:
+        return results, len(results)
     started = time.time()
-    logger.info("stream: resolving %d tracks with %d workers", len(tracks), workers)
-
-    with ThreadPoolExecutor(max_workers=workers) as pool:
-        futures = {}
-        for idx, track in enumerate(tracks):
-            futures[pool.submit(resolve_stream_url, track["videoId"])] = idx
-        for future in as_completed(futures):
-            idx = futures[future]
-            try:
-                url = future.result()
-            except Exception as e:
-                logger.warning("stream: resolve failed idx=%d err=%s", idx + 1, e)
-                url = None
-            results[idx] = url
-            if url:
-                logger.debug("stream: resolved idx=%d %s", idx + 1, tracks[idx].get("title"))
+    logger.info("stream: resolving %d tracks on %d shared workers", len(pending), resolver_executor.workers)
+
+    futures = {
+        resolver_executor.submit(tracks[idx]["videoId"], resolve_priority(offset + idx)): idx for idx in pending
+    }
+    for future in as_completed(futures):
+        idx = futures[future]
+        if future.cancelled():
+            logger.info("stream: resolve cancelled idx=%d (queue replaced)", idx + 1)
+            continue
+        try:
+            url = future.result()
+        except Exception as e:
+            logger.warning("stream: resolve failed idx=%d err=%s", idx + 1, e)
+            url = None
+        results[idx] = url
+        if url:
+            logger.debug("stream: resolved idx=%d %s", idx + 1, tracks[idx].get("title"))
 
     elapsed = time.time() - started
     resolved = sum(1 for url in results if url)
@@ -1566,9 +2345,39 @@ def resolve_urls_parallel(
     return results, resolved
 
 class MPVController:
+    """
+    mpv over one persistent JSON IPC connection.
+
+    Commands carry a request_id; a reader thread matches replies to waiting
+    callers and hands everything else (events) to listeners. Fire-and-forget
+    commands do not wait for their reply, and ordering is kept because mpv
+    handles one connection's commands in sequence. After start(), a dropped
+    connection (mpv restarted) is re-established in the background; until
+    then commands try to connect inline and give up fast if the socket is gone.
+
+    OBSERVED properties are mirrored locally through observe_property, so
+    observed() answers from memory without a round trip.
+    """
+    REQUEST_TIMEOUT = 0.5
+    RECONNECT_MAX_SEC = 2.0
+    OBSERVED = ("playlist-pos", "pause", "time-pos", "duration", "playlist-count")
+
     def __init__(self):
         self.proc: Optional[subprocess.Popen] = None
         self.lock = threading.Lock()
+        self._conn_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._sock: Optional[Any] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, List[Any]] = {}
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._on_connect: List[Callable[[], None]] = []
+        self._keep_connected = False
+        self._stats: Dict[str, int] = {"connects": 0, "disconnects": 0, "requests": 0, "timeouts": 0, "events": 0}
+        self._props_lock = threading.Lock()
+        self._props: Dict[str, Any] = {}
+        self.on_connect(self._observe_properties)
 
     def start(self):
         ensure_state_dir()
@@ -1587,37 +2396,159 @@ class MPVController:
             "--terminal=no"
         ]
         self.proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self._keep_connected = True
+        threading.Thread(target=self._reconnect_loop, name="mpv-connect", daemon=True).start()
 
-    def _ipc(self, payload: Dict[str, Any]):
+    def add_listener(self, fn: Callable[[Dict[str, Any]], None]):
+        """Call `fn(event)` from the reader thread for every mpv event."""
+        self._listeners.append(fn)
+
+    def on_connect(self, fn: Callable[[], None]):
+        """Call `fn()` after every new connection, e.g. to re-register observers."""
+        self._on_connect.append(fn)
+
+    def _observe_properties(self):
+        # Runs inside _connect, possibly under self.lock; must not call lock-taking methods.
+        for observe_id, name in enumerate(self.OBSERVED, 1):
+            self._ipc({"command": ["observe_property", observe_id, name]})
+
+    def observed(self, name: str) -> Optional[Any]:
+        """Last value mpv reported for an OBSERVED property; None while disconnected or unset."""
+        with self._props_lock:
+            return self._props.get(name)
+
+    def _connect(self) -> Optional[Any]:
         import socket
-        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
-            s.connect(MPV_SOCKET)
-            s.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        with self._conn_lock:
+            if self._sock is not None:
+                return self._sock
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
             try:
-                s.settimeout(0.2)
-                s.recv(4096)
-            except Exception:
-                pass
+                sock.connect(MPV_SOCKET)
+            except OSError:
+                sock.close()
+                return None
+            self._sock = sock
+            self._stats["connects"] += 1
+            threading.Thread(target=self._read_loop, args=(sock,), name="mpv-ipc", daemon=True).start()
+        for fn in list(self._on_connect):
+            try:
+                fn()
+            except Exception as e:
+                logger.warning("mpv: on-connect hook failed err=%s", e)
+        return sock
 
-    def _ipc_request(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        import socket
+    def _drop(self, sock: Any):
+        with self._conn_lock:
+            if self._sock is not sock:
+                return
+            self._sock = None
+            self._stats["disconnects"] += 1
+        with self._props_lock:
+            self._props.clear()
         try:
-            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
-                s.settimeout(0.5)
-                s.connect(MPV_SOCKET)
-                s.sendall((json.dumps(payload) + "\n").encode("utf-8"))
-                buf = b""
-                while b"\n" not in buf:
-                    chunk = s.recv(4096)
-                    if not chunk:
-                        break
-                    buf += chunk
-                line = buf.split(b"\n", 1)[0].strip()
-                if not line:
-                    return None
-                return json.loads(line.decode("utf-8"))
-        except Exception:
-            return None
+            sock.close()
+        except OSError:
+            pass
+        with self._pending_lock:
+            waiting = list(self._pending.values())
+            self._pending.clear()
+        for slot in waiting:
+            slot[0].set()
+
+    def _reconnect_loop(self):
+        delay = 0.05
+        while self._keep_connected and self._sock is None:
+            if self._connect() is not None:
+                return
+            time.sleep(delay)
+            delay = min(self.RECONNECT_MAX_SEC, delay * 2)
+
+    def _read_loop(self, sock: Any):
+        buf = b""
+        try:
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                buf += chunk
+                while b"\n" in buf:
+                    line, buf = buf.split(b"\n", 1)
+                    if line.strip():
+                        self._dispatch(line)
+        except OSError:
+            pass
+        self._drop(sock)
+        if self._keep_connected:
+            self._reconnect_loop()
+
+    def _dispatch(self, line: bytes):
+        try:
+            msg = json.loads(line.decode("utf-8"))
+        except ValueError:
+            return
+        if "event" in msg:
+            self._stats["events"] += 1
+            if msg["event"] == "property-change" and msg.get("name") in self.OBSERVED:
+                with self._props_lock:
+                    self._props[msg["name"]] = msg.get("data")
+            for fn in list(self._listeners):
+                try:
+                    fn(msg)
+                except Exception as e:
+                    logger.warning("mpv: event listener failed event=%s err=%s", msg.get("event"), e)
+            return
+        with self._pending_lock:
+            slot = self._pending.pop(msg.get("request_id"), None)
+        if slot is not None:
+            slot[1] = msg
+            slot[0].set()
+
+    def _send(self, payload: Dict[str, Any], wait: bool, timeout: float) -> Optional[Dict[str, Any]]:
+        for attempt in range(2):
+            sock = self._connect()
+            if sock is None:
+                return None
+            request_id = next(self._ids)
+            slot: List[Any] = [threading.Event(), None]
+            if wait:
+                with self._pending_lock:
+                    self._pending[request_id] = slot
+            data = (json.dumps({**payload, "request_id": request_id}) + "\n").encode("utf-8")
+            try:
+                with self._write_lock:
+                    sock.sendall(data)
+            except OSError:
+                # Stale connection (mpv restarted); retry once on a fresh one.
+                with self._pending_lock:
+                    self._pending.pop(request_id, None)
+                self._drop(sock)
+                continue
+            self._stats["requests"] += 1
+            if not wait:
+                return None
+            if not slot[0].wait(timeout):
+                with self._pending_lock:
+                    self._pending.pop(request_id, None)
+                self._stats["timeouts"] += 1
+                return None
+            return slot[1]
+        return None
+
+    def _ipc(self, payload: Dict[str, Any]):
+        self._send(payload, wait=False, timeout=0)
+
+    def _ipc_request(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self._send(payload, wait=True, timeout=self.REQUEST_TIMEOUT)
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        out["connected"] = self._sock is not None
+        with self._pending_lock:
+            out["pending"] = len(self._pending)
+        with self._props_lock:
+            out["observed"] = dict(self._props)
+        return out
 
     def get_property(self, name: str) -> Optional[Any]:
         resp = self._ipc_request({"command": ["get_property", name]})
@@ -1665,6 +2596,17 @@ class MPVController:
         with self.lock:
             self._ipc({"command": ["playlist-remove", index]})
 
+    def replace_index(self, index: int, url: str) -> bool:
+        """Swap the playlist entry at `index` for `url` without touching the others."""
+        with self.lock:
+            count = self.get_property("playlist-count")
+            if not isinstance(count, int) or not 0 <= index < count:
+                return False
+            self._ipc({"command": ["loadfile", url, "append"]})
+            self._ipc({"command": ["playlist-move", count, index]})
+            self._ipc({"command": ["playlist-remove", index + 1]})
+            return True
+
     def stop(self):
         with self.lock:
             self._ipc({"command": ["stop"]})
@@ -1685,10 +2627,15 @@ last_action: Optional[str] = None
 last_action_track: Optional[str] = None
 last_played_track_id: Optional[str] = None
 recent_avoid_terms: List[str] = []
+queue_plan: Optional[Dict[str, Any]] = None
 queue_fill_lock = threading.Lock()
 queue_fill_inflight = False
 queue_fill_token = 0
 session_seen_ids: Set[str] = set()
+# Lazy mode: videoIds whose mpv entry is still a watch URL, and those being resolved right now.
+queue_unresolved: Set[str] = set()
+queue_resolving: Set[str] = set()
+queue_resolve_gen = 0
 
 def reset_queue_fill():
     global queue_fill_inflight, queue_fill_token
@@ -1750,6 +2697,7 @@ def mark_action(action: str, track: Optional[Dict[str, str]]):
     global last_action, last_action_track
     if action in ("skip", "dislike") and track:
         register_avoid_term(track_seed_text(track))
+    note_plan_action(action)
     if action in ("like", "dislike") and track:
         last_action = action
         last_action_track = track.get("videoId")
@@ -1776,6 +2724,82 @@ def build_seed_extras(seed_track: Dict[str, str], action: str) -> Dict[str, Any]
         "avoid": avoid,
     }
 
+def note_plan_action(action: str):
+    """Point the batch plan at its like/skip branch for the next slot."""
+    with queue_fill_lock:
+        if not queue_plan:
+            return
+        if action in ("skip", "dislike"):
+            queue_plan["pending"] = "on_skip"
+        elif action == "like":
+            queue_plan["pending"] = "on_like"
+
+def take_plan_step(plan: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    branch = plan.pop("pending", None)
+    step = plan.get(branch) if branch else None
+    if step:
+        plan[branch] = None
+        if branch == "on_skip":
+            # The listener rejected the direction the plan assumed; replan after this slot.
+            plan["slots"] = []
+    elif plan.get("slots"):
+        branch = "slot"
+        step = plan["slots"].pop(0)
+    if not step:
+        return None
+    curated = {
+        "search_queries": list(step.get("search_queries") or []),
+        "avoid_terms": list(step.get("avoid_terms") or []),
+        "notes": f"batch plan ({branch})",
+        "source": plan.get("source"),
+    }
+    if plan.get("error"):
+        curated["error"] = plan["error"]
+    return curated
+
+def next_planned_curation(extras: Dict[str, Any], slots: int) -> Dict[str, Any]:
+    global queue_plan
+    prompt = last_prompt
+    with queue_fill_lock:
+        if queue_plan and queue_plan.get("prompt") == prompt:
+            step = take_plan_step(queue_plan)
+            if step:
+                logger.info("queue: using batch plan (%d slots left)", len(queue_plan.get("slots") or []))
+                return step
+        queue_plan = None
+    plan = llm_curate_batch(prompt or "", extras, slots)
+    plan["prompt"] = prompt
+    step = take_plan_step(plan)
+    with queue_fill_lock:
+        if prompt == last_prompt:
+            queue_plan = plan
+    return step or {"search_queries": [], "avoid_terms": [], "notes": "", "source": plan.get("source")}
+
+def cached_queue_curation(prompt: str, seed_track: Dict[str, str], action: str, extras: Dict[str, Any]) -> Dict[str, Any]:
+    """Auto-queue curation through the (prompt, seed, action, avoid) cache; only LLM results are stored."""
+    if QUEUE_CACHE_TTL_HOURS <= 0 or not (seed_track or {}).get("videoId"):
+        return llm_curate(prompt, extras, phase="auto_queue")
+    key = queue_cache_key(prompt, seed_track, action, extras)
+    started = time.time()
+    con = db()
+    try:
+        cached = cache_get(con, key, QUEUE_CACHE_TTL_HOURS)
+    finally:
+        con.close()
+    note_prompt_cache(bool(cached), kind="queue")
+    if cached and cached.get("search_queries"):
+        record_llm_call("auto_queue", None, started, cache_hit=True)
+        logger.info("queue: curation cache hit (%s, %s)", seed_track.get("videoId"), action)
+        return {**cached, "source": "llm", "cached": True}
+    curated = llm_curate(prompt, extras, phase="auto_queue")
+    if curated.get("source") == "llm" and curated.get("search_queries"):
+        con = db()
+        try:
+            cache_put(con, key, {k: curated.get(k) for k in ("search_queries", "avoid_terms", "notes")})
+        finally:
+            con.close()
+    return curated
+
 def curate_next_track(seed_track: Dict[str, str], action: str, gen_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
     if not last_prompt:
         return None
@@ -1794,7 +2818,16 @@ def curate_next_track(seed_track: Dict[str, str], action: str, gen_id: Optional[
                 phase="curate",
             ),
         )
-    curated = llm_curate(last_prompt, extras)
+    if BATCH_CURATE_ENABLED:
+        curated = next_planned_curation(extras, QUEUE_MAX - len(last_queue))
+    else:
+        curated = cached_queue_curation(last_prompt, seed_track, action, extras)
+    if curated.get("source") in ("fallback", "offline"):
+        # e.g. a hedged /play whose LLM result landed in the background.
+        reusable = prompt_curation(last_prompt)
+        if reusable:
+            logger.info("queue: LLM unavailable; reusing /play curation (%d queries)", len(reusable["search_queries"]))
+            curated = {**reusable, "notes": "reused /play curation", "source": "llm", "error": curated.get("error")}
     queries = curated.get("search_queries") or []
     avoid_terms = curated.get("avoid_terms") or []
     if gen_id is not None:
@@ -1833,10 +2866,15 @@ def curate_next_track(seed_track: Dict[str, str], action: str, gen_id: Optional[
     )
     if not tracks:
         return None
-    resolved_urls, resolved_count = resolve_urls_parallel(tracks, 1, PREFETCH_WORKERS)
     track = tracks[0]
     source = "openai" if isinstance(curated, dict) and curated.get("source") == "llm" else "fallback"
     track["curation"] = source
+    if LAZY_RESOLVE:
+        # resolve_window swaps in a stream URL once the track is within the lookahead.
+        return {"track": track, "url": watch_url(track["videoId"]), "source": source,
+                "seed": seed_info, "action": action, "lazy": True}
+    offset = len(last_queue) - (last_pos if isinstance(last_pos, int) else 0)
+    resolved_urls, resolved_count = resolve_urls_parallel(tracks, 1, offset=offset)
     url = resolved_urls[0] if resolved_urls else None
     if not url:
         url = watch_url(track["videoId"])
@@ -1895,6 +2933,10 @@ def fill_queue_worker(pos: Optional[int], token: int):
                     return
                 mpv.append(result["url"])
                 last_queue.append(result["track"])
+                if vid:
+                    stream_refresh_service.track(vid, result["url"])
+                if result.get("lazy") and vid:
+                    queue_unresolved.add(vid)
                 register_session_track(result["track"])
                 if isinstance(last_debug, dict):
                     last_debug["auto_queue"] = {
@@ -1903,6 +2945,8 @@ def fill_queue_worker(pos: Optional[int], token: int):
                         "source": result.get("source"),
                         "queue_len": len(last_queue),
                     }
+            if result.get("lazy"):
+                resolve_window(last_pos)
     finally:
         if gen_id is not None:
             status_service.finish_generation(gen_id)
@@ -1910,14 +2954,16 @@ def fill_queue_worker(pos: Optional[int], token: int):
             if token == queue_fill_token:
                 queue_fill_inflight = False
 
-def ensure_queue_filled(pos: Optional[int] = None) -> Optional[int]:
+def ensure_queue_filled() -> Optional[int]:
+    """Trim the played prefix and start a refill; callers hold playback_advance_lock."""
     global last_pos, last_queue, queue_fill_inflight, queue_fill_token
     if not last_queue or not last_prompt:
-        return pos
+        return None
     token = None
     with queue_fill_lock:
-        if pos is None:
-            pos = mpv.get_property("playlist-pos")
+        # Read under the lock: a position read earlier may predate another caller's trim,
+        # and trimming by it would remove the entry that is playing now.
+        pos = mpv.get_property("playlist-pos")
         if not isinstance(pos, int):
             return pos
         if last_pos is None:
@@ -1928,22 +2974,311 @@ def ensure_queue_filled(pos: Optional[int] = None) -> Optional[int]:
             for _ in range(pos):
                 mpv.remove_index(0)
             del last_queue[:pos]
+            # Replies come in command order, so this sees the removals above.
             pos = mpv.get_property("playlist-pos")
-            if not isinstance(pos, int):
-                pos = 0
-            last_pos = pos
+            last_pos = pos if isinstance(pos, int) else 0
         needs_fill = len(last_queue) < QUEUE_MAX
         should_fill = needs_fill and not queue_fill_inflight
         if should_fill:
             queue_fill_inflight = True
             queue_fill_token += 1
             token = queue_fill_token
+    if LAZY_RESOLVE:
+        resolve_window(pos)
     if should_fill and token is not None:
         threading.Thread(target=fill_queue_worker, args=(pos, token), daemon=True).start()
     return pos
 
+def resolve_window(pos: Optional[int]) -> int:
+    """Start resolving unresolved entries in (pos, pos + RESOLVE_LOOKAHEAD]; returns how many were started."""
+    if not isinstance(pos, int):
+        return 0
+    with queue_fill_lock:
+        window = last_queue[pos + 1:pos + 1 + RESOLVE_LOOKAHEAD]
+        pending = [
+            (offset, t["videoId"]) for offset, t in enumerate(window, 1)
+            if t.get("videoId") in queue_unresolved and t["videoId"] not in queue_resolving
+        ]
+        queue_resolving.update(vid for _, vid in pending)
+        token = queue_resolve_gen
+    for offset, vid in pending:
+        future = resolver_executor.submit(vid, resolve_priority(offset))
+        future.add_done_callback(lambda f, vid=vid: lazy_resolve_entry(vid, token, f))
+    return len(pending)
+
+def lazy_resolve_entry(videoId: str, token: int, future: Future):
+    url = None
+    if future.cancelled():
+        logger.debug("stream: lazy resolve cancelled for %s", videoId)
+    else:
+        try:
+            url = future.result()
+        except Exception as e:
+            logger.warning("stream: lazy resolve failed for %s err=%s", videoId, e)
+    with queue_fill_lock:
+        queue_resolving.discard(videoId)
+        if token != queue_resolve_gen:
+            return
+        # Either way the entry is settled; a failed resolve leaves mpv's own ytdl hook to try the watch URL.
+        queue_unresolved.discard(videoId)
+    if not url:
+        logger.warning("stream: lazy resolve found no stream URL for %s; keeping watch URL", videoId)
+        return
+    idx = swap_queued_url(videoId, url, token)
+    if idx is not None:
+        stream_refresh_service.track(videoId, url)
+        logger.debug("stream: lazily resolved idx=%d %s", idx + 1, videoId)
+
+def swap_queued_url(videoId: str, url: str, gen: int) -> Optional[int]:
+    """Replace the queued, not-playing mpv entry for videoId with url; returns its index on success.
+
+    The lookup and replace_index run under playback_advance_lock, which every trim and
+    playlist swap also holds, so the index cannot go stale in between. queue_fill_lock is
+    only taken for the lookup; fills and resolver bookkeeping never wait on the IPC.
+    """
+    with playback_advance_lock:
+        with queue_fill_lock:
+            if gen != queue_resolve_gen:
+                return None
+            idx = next((i for i, t in enumerate(last_queue) if t.get("videoId") == videoId), None)
+        if idx is None or idx == mpv.get_property("playlist-pos"):
+            return None
+        if not mpv.replace_index(idx, url):
+            return None
+    return idx
+
+def refresh_queue_urls(now: Optional[float] = None) -> int:
+    """Re-resolve queued stream URLs that expire within STREAM_REFRESH_MARGIN_SEC and swap them in place."""
+    pos = mpv.observed("playlist-pos")
+    with queue_fill_lock:
+        ids = [t.get("videoId") for i, t in enumerate(last_queue) if i != pos and t.get("videoId")]
+        offsets = {t.get("videoId"): i - (pos if isinstance(pos, int) else 0) for i, t in enumerate(last_queue)}
+        gen = queue_resolve_gen
+    refreshed = 0
+    for vid in stream_refresh_service.due(ids, STREAM_REFRESH_MARGIN_SEC, now):
+        # The stream cache would hand back the same URL until its own margin.
+        stream_url_service.invalidate(vid)
+        try:
+            url = resolver_executor.submit(vid, resolve_priority(offsets.get(vid, 2))).result()
+        except Exception as e:
+            logger.warning("stream: refresh failed for %s err=%s", vid, e)
+            url = None
+        with queue_fill_lock:
+            if gen != queue_resolve_gen:
+                return refreshed
+        if not url:
+            stream_refresh_service.note_failed(vid)
+            continue
+        idx = swap_queued_url(vid, url, gen)
+        if idx is not None:
+            stream_refresh_service.note_refreshed(vid, url)
+            refreshed += 1
+            logger.info("stream: refreshed expiring URL idx=%d %s", idx + 1, vid)
+    return refreshed
+
+def stream_refresh_loop():
+    while True:
+        time.sleep(STREAM_REFRESH_INTERVAL_SEC)
+        try:
+            refresh_queue_urls()
+        except Exception as e:
+            logger.warning("stream: refresher error %s", e)
+
+PLAYBACK_EVENTS = ("start-file", "end-file")
+# One worker keeps advancement in event order; IPC requests must not run on the mpv reader thread.
+playback_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playback")
+playback_lock = threading.Lock()
+# Held by everything that changes playlist positions: advance_playback, user_skip, handle_play's
+# playlist swap and swap_queued_url. An advance never pairs mpv's new playlist with the old
+# queue, and a URL swap never targets an index that a trim has shifted.
+# Reentrant: a resolve that is already done runs lazy_resolve_entry inline from resolve_window.
+playback_advance_lock = threading.RLock()
+playback_pending = False
+playback_stats: Dict[str, int] = {"events": 0, "advances": 0, "coalesced": 0, "load_errors": 0}
+
+def on_mpv_event(event: Dict[str, Any]):
+    """mpv listener: schedule advance_playback on track changes (runs on the IPC reader thread)."""
+    global playback_pending
+    name = event.get("event")
+    if name == "property-change":
+        if event.get("name") != "playlist-pos":
+            return
+    elif name not in PLAYBACK_EVENTS:
+        return
+    if name == "end-file" and event.get("reason") == "error":
+        playback_stats["load_errors"] += 1
+        logger.warning("play: mpv failed to load playlist entry %s (%s)", event.get("playlist_entry_id"), event.get("file_error"))
+    with playback_lock:
+        playback_stats["events"] += 1
+        if playback_pending:
+            # The queued run asks mpv for playlist-pos when it starts, so it covers this event too.
+            playback_stats["coalesced"] += 1
+            return
+        playback_pending = True
+    playback_pool.submit(advance_playback)
+
+def user_skip(command: Callable[[], None]):
+    """Run a /next, /prev or /play_index command and trim/refill, serialized with advance_playback."""
+    with playback_advance_lock:
+        command()
+        reset_queue_fill()
+        ensure_queue_filled()
+
+def advance_playback() -> Optional[int]:
+    """Trim the played prefix, refill the queue and record the now-playing track."""
+    global playback_pending
+    with playback_lock:
+        playback_pending = False
+        playback_stats["advances"] += 1
+    try:
+        with playback_advance_lock:
+            pos = ensure_queue_filled()
+            note_now_playing(pos)
+    except Exception as e:
+        logger.warning("play: advance failed err=%s", e)
+        return None
+    return pos
+
+def note_now_playing(pos: Optional[int]) -> Optional[Dict[str, str]]:
+    """Record history etc. once per track when the entry at ``pos`` starts; returns that entry."""
+    global last_played_track_id, last_played_at, last_pos, last_action, last_action_track
+    current = None
+    if isinstance(pos, int) and 0 <= pos < len(last_queue):
+        current = last_queue[pos]
+    if isinstance(pos, int):
+        last_pos = pos
+    if current and current.get("videoId") != last_played_track_id:
+        record_history(current)
+        if stream_refresh_service.note_started(current.get("videoId")):
+            logger.info("stream: refresh saved %s from an expired URL", current.get("videoId"))
+        cache_audio(current.get("videoId"))
+        last_played_track_id = current.get("videoId")
+        last_played_at = int(time.time())
+        if last_action_track == current.get("videoId"):
+            last_action = None
+            last_action_track = None
+    return current
+
+play_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="play")
+# LLM calls that outlive a hedge deadline keep running here, off play_pool.
+curation_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="curate")
+last_curation_lock = threading.Lock()
+last_curation: Dict[str, Any] = {}
+
+def remember_curation(prompt: str, curated: Dict[str, Any]):
+    """Keep the latest LLM curation for `prompt` so auto-queue can reuse it when its own call fails."""
+    global last_curation
+    if not isinstance(curated, dict) or curated.get("source") != "llm":
+        return
+    if not curated.get("search_queries"):
+        return
+    with last_curation_lock:
+        last_curation = {"prompt": canonical_text(prompt), "curated": curated}
+
+def prompt_curation(prompt: Optional[str]) -> Optional[Dict[str, Any]]:
+    with last_curation_lock:
+        if last_curation and last_curation.get("prompt") == canonical_text(prompt):
+            return last_curation["curated"]
+    return None
+
+def background_curate(
+    prompt: str,
+    extras: Dict[str, Any],
+    key: str,
+    on_query: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Run /play curation and store a complete LLM result in prompt_cache, whether or not /play still waits."""
+    if on_query is not None:
+        curated = llm_curate_stream(prompt, extras, on_query)
+    else:
+        curated = llm_curate(prompt, extras)
+    if curated.get("source") == "llm" and curated.get("search_queries"):
+        con = db()
+        try:
+            cache_put(con, key, {"curated": curated})
+        finally:
+            con.close()
+        remember_curation(prompt, curated)
+    return curated
+
+def hedged_curate(
+    prompt: str,
+    extras: Dict[str, Any],
+    key: str,
+    on_query: Optional[Callable[[str], None]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Wait up to CURATE_HEDGE_MS for curation; None means the deadline passed and the call continues."""
+    future = curation_pool.submit(background_curate, prompt, extras, key, on_query)
+    try:
+        return future.result(timeout=CURATE_HEDGE_MS / 1000.0)
+    except FuturesTimeout:
+        logger.warning("play: curation missed %dms deadline; continuing in background", CURATE_HEDGE_MS)
+        return None
+
+def hedge_fallback(con: sqlite3.Connection, prompt: str, extras: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """Queries to start playback with after a missed deadline: a stale cache entry, else fallback_curation."""
+    stale = cache_get(con, key, None)
+    curated = (stale or {}).get("curated") or {}
+    if curated.get("search_queries"):
+        logger.info("play: hedge using stale cached queries (%d)", len(curated["search_queries"]))
+        return {**curated, "source": "stale_cache", "notes": "hedge: stale cache"}
+    curated = fallback_curation(prompt, extras, int(extras.get("max_queries", 10)), notes="hedge: llm deadline missed")
+    curated["error"] = f"llm deadline {CURATE_HEDGE_MS}ms missed"
+    return curated
+
+def play_context_node() -> Dict[str, Any]:
+    con = db()
+    try:
+        return load_pick_context(con)
+    finally:
+        con.close()
+
+def play_seed_node(seed: str, votes: Dict[str, int], resolve_url: bool) -> tuple[Optional[Dict[str, str]], Any]:
+    """Resolve the seed, then start resolving its stream URL without waiting for it."""
+    seed_info = resolve_seed(yt, seed, votes)
+    url_future = None
+    if seed_info and resolve_url:
+        url_future = resolver_executor.submit(seed_info["videoId"], resolve_executor_service.PRIORITY_NOW)
+    return seed_info, url_future
+
+def relay_future(source: Future, target: Future):
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+def play_seed_after(context_future: Future, seed: str, resolve_url: bool) -> Future:
+    """Submit play_seed_node once the context is loaded, so no play_pool worker sits blocked on another."""
+    seed_future: Future = Future()
+
+    def start(done: Future):
+        if done.cancelled() or done.exception() is not None:
+            relay_future(done, seed_future)
+            return
+        node = play_pool.submit(play_seed_node, seed, done.result()["votes"], resolve_url)
+        node.add_done_callback(lambda f: relay_future(f, seed_future))
+
+    context_future.add_done_callback(start)
+    return seed_future
+
 def handle_play(prompt: str, extras: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Play pipeline as a small dependency graph:
+
+      context (SQLite) ──┬──> seed search ──> seed stream URL ─┐
+      curation (cache/LLM) ──┴──> pick_tracks ──> resolve rest ──┴──> mpv
+
+    Context loading and seed resolution run on play_pool while curation runs
+    on this thread; pick_tracks waits for all three.
+    """
     maybe_reload_ytmusic()
+    started = time.time()
+    context_future = play_pool.submit(play_context_node)
+    seed_future = None
+    if extras.get("seed"):
+        seed_future = play_seed_after(context_future, extras["seed"], True)
     con = db()
     ttl_hours = int(extras.get("ttl_hours", CACHE_TTL_HOURS))
     requested_max = int(extras.get("max_tracks", MAX_TRACKS_DEFAULT))
@@ -1965,12 +3300,17 @@ def handle_play(prompt: str, extras: Dict[str, Any]) -> Dict[str, Any]:
         phase="curate",
     )
     gen_error: Optional[str] = None
+    search_futures: Dict[str, Future] = {}
 
     try:
-        key = prompt + "\n" + json.dumps(extras, sort_keys=True)
+        key = prompt_cache_key(prompt, extras)
+        lookup_started = time.time()
         cached = cache_get(con, key, ttl_hours)
+        note_prompt_cache(bool(cached))
         if cached:
+            record_llm_call("play", None, lookup_started, cache_hit=True)
             curated = cached.get("curated", {})
+            remember_curation(prompt, curated)
             queries = curated.get("search_queries") or []
             avoid_terms = curated.get("avoid_terms") or []
             logger.info("play: cache hit (%d queries)", len(queries))
@@ -1991,11 +3331,35 @@ def handle_play(prompt: str, extras: Dict[str, Any]) -> Dict[str, Any]:
             )
         else:
             logger.info("play: cache miss")
-            curated = llm_curate(prompt, extras)
+            search_closed = threading.Event()
+
+            def start_search(q: str):
+                # Queries streamed after a missed hedge deadline only go to the cache.
+                if not search_closed.is_set() and q not in search_futures:
+                    search_futures[q] = play_pool.submit(search_query, yt, q)
+
+            on_query = start_search if LLM_STREAM_ENABLED else None
+            offline = offline_curation(prompt, extras, int(extras.get("max_queries", 10))) if OFFLINE_FIRST else None
+            if offline:
+                # Zero-latency first stage; the LLM result lands in prompt_cache for next time.
+                curation_pool.submit(background_curate, prompt, extras, key, None)
+                curated = offline
+            elif CURATE_HEDGE_MS > 0:
+                curated = hedged_curate(prompt, extras, key, on_query)
+                if curated is None:
+                    search_closed.set()
+                    curated = hedge_fallback(con, prompt, extras, key)
+            else:
+                if on_query is not None:
+                    curated = llm_curate_stream(prompt, extras, on_query)
+                else:
+                    curated = llm_curate(prompt, extras)
+                # A stream cut off partway ("llm_partial") is used for this /play only, never cached.
+                if curated.get("source") == "llm":
+                    cache_put(con, key, {"curated": curated})
+                    remember_curation(prompt, curated)
             queries = curated.get("search_queries") or []
             avoid_terms = curated.get("avoid_terms") or []
-            cached = {"curated": curated}
-            cache_put(con, key, cached)
             status_service.update_generation(
                 gen_id,
                 query=build_generation_query(
@@ -2017,13 +3381,17 @@ def handle_play(prompt: str, extras: Dict[str, Any]) -> Dict[str, Any]:
             if fallback:
                 logger.warning("play: empty queries, using fallback (%d)", len(fallback))
                 queries = fallback
-        curation_source = "openai" if isinstance(curated, dict) and curated.get("source") == "llm" else "fallback"
+        curation_source = "openai" if isinstance(curated, dict) and curated.get("source") in ("llm", "llm_partial", "stale_cache") else "fallback"
 
         extras = {**extras, "avoid_terms": avoid_terms}
         debug_meta = {
             "curation_source": curated.get("source") if isinstance(curated, dict) else None,
             "curation_error": curated.get("error") if isinstance(curated, dict) else None,
         }
+        context = dict(context_future.result())
+        seed_url_future = None
+        if seed_future is not None:
+            context["seed_info"], seed_url_future = seed_future.result()
         tracks, seed_info, seed_next = pick_tracks(
             yt,
             prompt,
@@ -2031,11 +3399,24 @@ def handle_play(prompt: str, extras: Dict[str, Any]) -> Dict[str, Any]:
             max_tracks=target_max,
             extras=extras,
             debug_meta=debug_meta,
+            context=context,
+            search_results=search_futures,
         )
 
         status_service.update_generation(gen_id, phase="resolve")
-        resolved_urls, resolved_count = resolve_urls_parallel(tracks, target_max, PREFETCH_WORKERS)
+        known_urls: Dict[str, str] = {}
+        if seed_url_future is not None and seed_info:
+            try:
+                seed_url = seed_url_future.result()
+            except Exception as e:
+                logger.warning("stream: seed resolve failed err=%s", e)
+                seed_url = None
+            if seed_url:
+                known_urls[seed_info["videoId"]] = seed_url
+        resolve_max = min(target_max, 1 + RESOLVE_LOOKAHEAD) if LAZY_RESOLVE else target_max
+        resolved_urls, resolved_count = resolve_urls_parallel(tracks, resolve_max, known_urls=known_urls)
         tracks_for_play = tracks[:len(resolved_urls)]
+        deferred = tracks[len(resolved_urls):target_max] if LAZY_RESOLVE else []
         urls: List[str] = []
         playable: List[Dict[str, str]] = []
         if resolved_count == 0 and tracks_for_play:
@@ -2047,30 +3428,46 @@ def handle_play(prompt: str, extras: Dict[str, Any]) -> Dict[str, Any]:
                 if url:
                     urls.append(url)
                     playable.append(track)
+        # Lazy mode: the rest of the queue starts as watch URLs; resolve_window fills them in by position.
+        urls.extend(watch_url(t["videoId"]) for t in deferred)
+        playable.extend(deferred)
         for track in playable:
             track["curation"] = curation_source
         if isinstance(last_debug, dict):
             last_debug["stream_total"] = len(tracks_for_play)
             last_debug["stream_resolved"] = resolved_count
             last_debug["stream_fallback"] = resolved_count == 0 and len(tracks_for_play) > 0
-        mpv.load_and_play(urls)
-        logger.info("play: loaded %d tracks", len(playable))
-
-        global last_prompt, last_extras, last_queue, last_seed, last_seed_next, last_played_at, last_pos, last_played_track_id, recent_avoid_terms, queue_fill_inflight, queue_fill_token
-        last_prompt = prompt
-        last_extras = extras
-        last_queue = playable
-        for track in playable:
-            register_session_track(track)
-        last_seed = seed_info
-        last_seed_next = seed_next
-        last_played_at = int(time.time())
-        last_pos = 0
-        last_played_track_id = None
-        recent_avoid_terms = []
-        with queue_fill_lock:
-            queue_fill_token += 1
-            queue_fill_inflight = False
+            last_debug["stream_deferred"] = len(deferred)
+        global last_prompt, last_extras, last_queue, last_seed, last_seed_next, last_played_at, last_pos, last_played_track_id, recent_avoid_terms, queue_fill_inflight, queue_fill_token, queue_plan, queue_resolve_gen
+        with playback_advance_lock:
+            # Pending resolves for the queue being replaced are dropped only now, so a /play
+            # that fails earlier leaves the current queue's prefetch untouched. This /play's
+            # own resolves have all completed by this point.
+            resolver_executor.new_generation()
+            mpv.load_and_play(urls)
+            stream_refresh_service.clear()
+            for track, url in zip(playable, urls):
+                stream_refresh_service.track(track["videoId"], url)
+            logger.info("play: loaded %d tracks in %.2fs", len(playable), time.time() - started)
+
+            last_prompt = prompt
+            last_extras = extras
+            last_queue = playable
+            for track in playable:
+                register_session_track(track)
+            last_seed = seed_info
+            last_seed_next = seed_next
+            last_played_at = int(time.time())
+            last_pos = 0
+            last_played_track_id = None
+            recent_avoid_terms = []
+            with queue_fill_lock:
+                queue_fill_token += 1
+                queue_fill_inflight = False
+                queue_plan = None
+                queue_resolve_gen += 1
+                queue_unresolved.clear()
+                queue_unresolved.update(t["videoId"] for t in deferred)
 
         return {
             "ok": True,
@@ -2096,27 +3493,20 @@ def vote(videoId: str, title: str, artist: str, v: int) -> Dict[str, Any]:
     )
     con.commit()
     con.close()
+    if int(v) > 0:
+        cache_audio(videoId)
     return {"ok": True}
 
 def state_snapshot() -> Dict[str, Any]:
-    pos = mpv.get_property("playlist-pos")
-    pos = ensure_queue_filled(pos)
-    paused = mpv.get_property("pause")
-    position = mpv.get_property("time-pos")
-    duration = mpv.get_property("duration")
+    # Served from the observe_property mirror; /state never waits on mpv. Trimming,
+    # refills and history happen in advance_playback, driven by mpv events.
+    pos = mpv.observed("playlist-pos")
+    paused = mpv.observed("pause")
+    position = mpv.observed("time-pos")
+    duration = mpv.observed("duration")
     current = None
     if isinstance(pos, int) and 0 <= pos < len(last_queue):
         current = last_queue[pos]
-    global last_played_track_id, last_played_at, last_pos, last_action, last_action_track
-    if isinstance(pos, int):
-        last_pos = pos
-    if current and current.get("videoId") != last_played_track_id:
-        record_history(current)
-        last_played_track_id = current.get("videoId")
-        last_played_at = int(time.time())
-        if last_action_track == current.get("videoId"):
-            last_action = None
-            last_action_track = None
     learning = None
     if current and current.get("videoId"):
         con = db()
@@ -2224,6 +3614,20 @@ class Handler(BaseHTTPRequestHandler):
                 code, payload = status_routes.handle_status(len(last_queue), QUEUE_MAX)
                 return self._json(code, payload)
 
+            if p.path == "/api/llm/stats":
+                code, payload = llm_routes.handle_llm_stats(prompt_cache_stats_snapshot())
+                return self._json(code, payload)
+
+            if p.path == "/api/llm/telemetry":
+                code, payload = llm_routes.handle_llm_telemetry(db, qs)
+                return self._json(code, payload)
+
+            if p.path == "/api/stream/cache":
+                code, payload = stream_routes.handle_stream_cache_stats(
+                    RESOLVER_BACKEND, db if AUDIO_CACHE_ENABLED else None, resolver_executor.stats()
+                )
+                return self._json(code, payload)
+
             if p.path == "/api/db/tables":
                 code, payload = db_routes.handle_tables(db)
                 return self._json(code, payload)
@@ -2256,16 +3660,12 @@ class Handler(BaseHTTPRequestHandler):
 
             if p.path == "/prev":
                 mark_action("prev", current_queue_track())
-                mpv.prev()
-                reset_queue_fill()
-                ensure_queue_filled()
+                user_skip(mpv.prev)
                 return self._json(200, {"ok": True})
 
             if p.path == "/next":
                 mark_action("skip", current_queue_track())
-                mpv.next()
-                reset_queue_fill()
-                ensure_queue_filled()
+                user_skip(mpv.next)
                 return self._json(200, {"ok": True})
 
             if p.path == "/seek":
@@ -2296,9 +3696,7 @@ class Handler(BaseHTTPRequestHandler):
                 if idx < 0 or idx >= len(last_queue):
                     return self._json(400, {"ok": False, "error": "index out of range"})
                 mark_action("skip", current_queue_track())
-                mpv.play_index(idx)
-                reset_queue_fill()
-                ensure_queue_filled()
+                user_skip(lambda: mpv.play_index(idx))
                 return self._json(200, {"ok": True})
 
             if p.path == "/stop":
@@ -2363,7 +3761,26 @@ class Handler(BaseHTTPRequestHandler):
 
 def main():
     ensure_state_dir()
+    con = db()
+    try:
+        migrate_prompt_cache_keys(con)
+    except sqlite3.Error as e:
+        logger.warning("cache: prompt key migration failed (%s)", e)
+    finally:
+        con.close()
+    try:
+        telemetry_service.prune(db, LLM_TELEMETRY_DAYS)
+    except sqlite3.Error as e:
+        logger.warning("telemetry: prune failed (%s)", e)
+    try:
+        track_health_service.load(db)
+    except sqlite3.Error as e:
+        logger.warning("stream: track health load failed (%s)", e)
+    mpv.add_listener(on_mpv_event)
     mpv.start()
+    threading.Thread(target=telemetry_loop, name="telemetry", daemon=True).start()
+    if STREAM_REFRESH_ENABLED:
+        threading.Thread(target=stream_refresh_loop, name="stream-refresh", daemon=True).start()
     global httpd
     httpd = HTTPServer((HOST, PORT), Handler)
     print(f"ytplayd listening on http://{HOST}:{PORT}")
@@ -0,0 +1,25 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ytplayd_app.services import llm_client_service, telemetry_service
+
+
+def handle_llm_stats(prompt_cache: Optional[Dict[str, Any]] = None) -> Tuple[int, Dict[str, Any]]:
+    return 200, {"ok": True, "pool": llm_client_service.stats(), "prompt_cache": prompt_cache or {}}
+
+
+def handle_llm_telemetry(
+    db_fn: Callable[[], Any],
+    qs: Dict[str, List[str]],
+) -> Tuple[int, Dict[str, Any]]:
+    days_raw = (qs.get("days") or [None])[0]
+    try:
+        days = int(days_raw) if days_raw is not None else 7
+    except ValueError:
+        return 400, {"ok": False, "error": "invalid days"}
+    days = max(1, min(365, days))
+    return 200, {
+        "ok": True,
+        **telemetry_service.snapshot(),
+        "days": days,
+        "daily": telemetry_service.daily_rollup(db_fn, days),
+    }
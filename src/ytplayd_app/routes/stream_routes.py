@@ -0,0 +1,32 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ytplayd_app.services import (
+    audio_cache_service,
+    extractor_profile_service,
+    resolver_pool_service,
+    stream_refresh_service,
+    stream_url_service,
+    track_health_service,
+    ytdlp_service,
+)
+
+
+def handle_stream_cache_stats(
+    backend: str = "subprocess",
+    audio_db_fn: Optional[Callable[[], Any]] = None,
+    executor_stats: Optional[Dict[str, Any]] = None,
+) -> Tuple[int, Dict[str, Any]]:
+    return 200, {
+        "ok": True,
+        "cache": stream_url_service.stats(),
+        "refresh": stream_refresh_service.stats(),
+        "audio": audio_cache_service.stats(audio_db_fn),
+        "health": track_health_service.stats(),
+        "resolver": {
+            "backend": backend,
+            "inprocess": ytdlp_service.stats(),
+            "workers": resolver_pool_service.stats(),
+            "profiles": extractor_profile_service.stats(),
+            "executor": executor_stats,
+        },
+    }
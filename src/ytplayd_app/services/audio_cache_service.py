@@ -0,0 +1,169 @@
+"""On-disk cache of downloaded bestaudio files.
+
+The daemon downloads played and liked tracks into a directory under its
+state dir; this module keeps the ``audio_cache`` index (path, size, last
+use) in SQLite and enforces the byte budget by deleting the least recently
+used files first. Index rows whose file has disappeared are dropped on
+lookup.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS audio_cache (
+      videoId TEXT PRIMARY KEY,
+      path TEXT NOT NULL,
+      bytes INTEGER NOT NULL,
+      created_at INTEGER NOT NULL,
+      last_used_at INTEGER NOT NULL,
+      hits INTEGER NOT NULL DEFAULT 0
+    );
+"""
+
+PARTIAL_SUFFIXES = (".part", ".ytdl", ".temp")
+
+_lock = threading.Lock()
+_inflight: Set[str] = set()
+_config: Dict[str, int] = {"max_bytes": 1024 * 1024 * 1024}
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0, "missing_files": 0}
+
+
+def configure(max_bytes: int):
+    with _lock:
+        _config["max_bytes"] = max(0, int(max_bytes))
+
+
+def find_file(directory: str, video_id: str) -> Optional[str]:
+    """The finished download for ``video_id`` (``<videoId>.<ext>``), ignoring partial files."""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return None
+    for name in sorted(names):
+        if name.startswith(video_id + ".") and not name.endswith(PARTIAL_SUFFIXES):
+            return os.path.join(directory, name)
+    return None
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def lookup(db_fn: Callable[[], Any], video_id: str) -> Optional[str]:
+    con = db_fn()
+    try:
+        row = con.execute("SELECT path FROM audio_cache WHERE videoId=?;", (video_id,)).fetchone()
+        if row and not os.path.exists(row[0]):
+            con.execute("DELETE FROM audio_cache WHERE videoId=?;", (video_id,))
+            con.commit()
+            with _lock:
+                _stats["missing_files"] += 1
+            row = None
+        if row:
+            con.execute(
+                "UPDATE audio_cache SET last_used_at=?, hits=hits+1 WHERE videoId=?;",
+                (int(time.time()), video_id),
+            )
+            con.commit()
+    finally:
+        con.close()
+    with _lock:
+        _stats["hits" if row else "misses"] += 1
+    return row[0] if row else None
+
+
+def contains(db_fn: Callable[[], Any], video_id: str) -> bool:
+    con = db_fn()
+    try:
+        row = con.execute("SELECT path FROM audio_cache WHERE videoId=?;", (video_id,)).fetchone()
+    finally:
+        con.close()
+    return bool(row) and os.path.exists(row[0])
+
+
+def store(db_fn: Callable[[], Any], video_id: str, path: str) -> int:
+    """Index a finished download and evict down to the byte budget; returns files evicted."""
+    size = os.path.getsize(path)
+    now = int(time.time())
+    con = db_fn()
+    try:
+        con.execute(
+            "INSERT OR REPLACE INTO audio_cache(videoId, path, bytes, created_at, last_used_at, hits) "
+            "VALUES(?,?,?,?,?,0);",
+            (video_id, path, size, now, now),
+        )
+        con.commit()
+    finally:
+        con.close()
+    with _lock:
+        _stats["stores"] += 1
+    return evict(db_fn)
+
+
+def evict(db_fn: Callable[[], Any], max_bytes: Optional[int] = None) -> int:
+    with _lock:
+        budget = _config["max_bytes"] if max_bytes is None else max(0, int(max_bytes))
+    con = db_fn()
+    try:
+        rows = con.execute(
+            "SELECT videoId, path, bytes FROM audio_cache ORDER BY last_used_at ASC, created_at ASC;"
+        ).fetchall()
+        total = sum(row[2] for row in rows)
+        evicted = 0
+        for video_id, path, size in rows:
+            if total <= budget:
+                break
+            con.execute("DELETE FROM audio_cache WHERE videoId=?;", (video_id,))
+            _remove(path)
+            total -= size
+            evicted += 1
+        con.commit()
+    finally:
+        con.close()
+    with _lock:
+        _stats["evicted"] += evicted
+    return evicted
+
+
+def begin(video_id: str) -> bool:
+    """Claim a download slot for ``video_id``; False if one is already running."""
+    with _lock:
+        if video_id in _inflight:
+            return False
+        _inflight.add(video_id)
+        return True
+
+
+def end(video_id: str):
+    with _lock:
+        _inflight.discard(video_id)
+
+
+def stats(db_fn: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        out.update(_config)
+        out["downloading"] = len(_inflight)
+    lookups = out["hits"] + out["misses"]
+    out["hit_rate"] = round(out["hits"] / lookups, 3) if lookups else None
+    if db_fn is not None:
+        con = db_fn()
+        try:
+            entries, total = con.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM audio_cache;").fetchone()
+        finally:
+            con.close()
+        out["entries"] = entries
+        out["bytes"] = total
+    return out
+
+
+def reset():
+    with _lock:
+        _inflight.clear()
+        for key in _stats:
+            _stats[key] = 0
@@ -0,0 +1,86 @@
+"""Incremental parsing of streamed curation JSON.
+
+The model streams a JSON object whose first field is the ``search_queries``
+array. ``QueryStreamParser`` is fed text deltas as they arrive and returns
+each query string as soon as its closing quote has been received, so the
+search stage can start before the response is complete.
+"""
+import json
+from typing import List
+
+
+class QueryStreamParser:
+    def __init__(self, key: str = "search_queries"):
+        self.key = json.dumps(key)
+        self.text = ""
+        self.queries: List[str] = []
+        self.done = False
+        self._pos = 0
+        self._state = "key"
+
+    def feed(self, delta: str) -> List[str]:
+        if not delta or self.done:
+            self.text += delta or ""
+            return []
+        self.text += delta
+        found: List[str] = []
+        while not self.done:
+            if self._state == "key":
+                idx = self.text.find(self.key, self._pos)
+                if idx == -1:
+                    # Keep enough tail to match a key split across deltas.
+                    self._pos = max(self._pos, len(self.text) - len(self.key))
+                    break
+                self._pos = idx + len(self.key)
+                self._state = "array"
+            elif self._state == "array":
+                self._skip(" \t\r\n:")
+                if self._pos >= len(self.text):
+                    break
+                if self.text[self._pos] != "[":
+                    self.done = True
+                    break
+                self._pos += 1
+                self._state = "items"
+            else:
+                self._skip(" \t\r\n,")
+                if self._pos >= len(self.text):
+                    break
+                ch = self.text[self._pos]
+                if ch == "]":
+                    self._pos += 1
+                    self.done = True
+                    break
+                if ch != '"':
+                    self.done = True
+                    break
+                end = self._string_end(self._pos)
+                if end == -1:
+                    break
+                try:
+                    value = json.loads(self.text[self._pos:end + 1])
+                except json.JSONDecodeError:
+                    self.done = True
+                    break
+                self._pos = end + 1
+                value = str(value).strip()
+                if value:
+                    self.queries.append(value)
+                    found.append(value)
+        return found
+
+    def _skip(self, chars: str):
+        while self._pos < len(self.text) and self.text[self._pos] in chars:
+            self._pos += 1
+
+    def _string_end(self, start: int) -> int:
+        idx = start + 1
+        while idx < len(self.text):
+            ch = self.text[idx]
+            if ch == "\\":
+                idx += 2
+                continue
+            if ch == '"':
+                return idx
+            idx += 1
+        return -1
@@ -0,0 +1,98 @@
+"""Success rates of yt-dlp extractor-args profiles.
+
+Every resolve attempt is recorded against the profile it used. Once each
+configured profile has ``MIN_SAMPLES`` outcomes in its rolling window,
+``order`` puts the profile with the best smoothed success rate first, so a
+primary that keeps failing stops costing a yt-dlp run per track. Attempts
+abandoned because another profile won a hedged race are not recorded.
+
+Samples older than ``MAX_SAMPLE_AGE_SEC`` are dropped. A profile ranked last
+gets no new samples, so once its old ones age out the configured order
+applies again and it gets another chance to win first place back.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+WINDOW = 50
+MIN_SAMPLES = 5
+MAX_SAMPLE_AGE_SEC = 1800
+
+_lock = threading.Lock()
+_profiles: Dict[str, Dict[str, Any]] = {}
+
+
+def _key(profile: Optional[str]) -> str:
+    return (profile or "").strip()
+
+
+def _state(key: str) -> Dict[str, Any]:
+    state = _profiles.get(key)
+    if state is None:
+        state = {"ok": 0, "failed": 0, "latency_ms": 0, "window": deque(maxlen=WINDOW)}
+        _profiles[key] = state
+    return state
+
+
+def _window(state: Dict[str, Any], now: float) -> List[int]:
+    window = state["window"]
+    while window and window[0][0] <= now - MAX_SAMPLE_AGE_SEC:
+        window.popleft()
+    return [ok for _, ok in window]
+
+
+def record(profile: Optional[str], ok: bool, latency_ms: int, now: Optional[float] = None):
+    now = time.time() if now is None else now
+    with _lock:
+        state = _state(_key(profile))
+        state["ok" if ok else "failed"] += 1
+        state["latency_ms"] += max(0, int(latency_ms))
+        state["window"].append((now, 1 if ok else 0))
+
+
+def _rate(window: List[int]) -> Optional[float]:
+    return (sum(window) + 1) / (len(window) + 2) if window else None
+
+
+def success_rate(profile: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Laplace-smoothed success rate over the rolling window; None before any (recent) attempt."""
+    now = time.time() if now is None else now
+    with _lock:
+        state = _profiles.get(_key(profile))
+        window = _window(state, now) if state else []
+    return _rate(window)
+
+
+def order(profiles: List[Optional[str]], now: Optional[float] = None) -> List[Optional[str]]:
+    """``profiles`` best-first once every one of them has enough recent samples; configured order until then."""
+    now = time.time() if now is None else now
+    with _lock:
+        windows = [_window(_profiles[_key(p)], now) if _key(p) in _profiles else [] for p in profiles]
+    if len(profiles) < 2 or min(len(w) for w in windows) < MIN_SAMPLES:
+        return list(profiles)
+    rates = [_rate(w) or 0.0 for w in windows]
+    ranked = sorted(range(len(profiles)), key=lambda i: (-rates[i], i))
+    return [profiles[i] for i in ranked]
+
+
+def stats() -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    now = time.time()
+    with _lock:
+        items = [(key, dict(state), _window(state, now)) for key, state in _profiles.items()]
+    for key, state, window in items:
+        attempts = state["ok"] + state["failed"]
+        rate = _rate(window)
+        out[key or "(default)"] = {
+            "ok": state["ok"],
+            "failed": state["failed"],
+            "success_rate": round(rate, 3) if rate is not None else None,
+            "avg_latency_ms": round(state["latency_ms"] / attempts) if attempts else None,
+        }
+    return out
+
+
+def reset():
+    with _lock:
+        _profiles.clear()
@@ -0,0 +1,126 @@
+"""Shared OpenAI client for the daemon.
+
+One client (and one HTTP connection pool with keep-alive) is reused for
+every LLM call. When httpx is importable the pool is configured explicitly
+and instrumented through httpx's ``trace`` request extension, so we can
+report how many requests reused an existing connection.
+"""
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:  # the SDK then keeps its own default pool
+    httpx = None
+
+_lock = threading.Lock()
+_build_lock = threading.Lock()
+_client: Any = None
+_client_key: Optional[Tuple[Any, ...]] = None
+_stats: Dict[str, Any] = {
+    "requests": 0,
+    "connections_opened": 0,
+    "tls_handshakes": 0,
+    "clients_created": 0,
+}
+
+
+def _trace(event_name: str, info: Dict[str, Any]):
+    if event_name == "connection.connect_tcp.complete":
+        with _lock:
+            _stats["connections_opened"] += 1
+    elif event_name == "connection.start_tls.complete":
+        with _lock:
+            _stats["tls_handshakes"] += 1
+
+
+def _on_request(request: Any):
+    with _lock:
+        _stats["requests"] += 1
+    previous = request.extensions.get("trace")
+    if previous is None:
+        request.extensions["trace"] = _trace
+        return
+
+    def chained(event_name: str, info: Dict[str, Any]):
+        _trace(event_name, info)
+        previous(event_name, info)
+
+    request.extensions["trace"] = chained
+
+
+def build_http_client(max_connections: int, keepalive_expiry: float) -> Any:
+    if httpx is None:
+        return None
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    return httpx.Client(limits=limits, event_hooks={"request": [_on_request]}, follow_redirects=True)
+
+
+def get_client(
+    factory: Callable[..., Any],
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    max_connections: int = 8,
+    keepalive_expiry: float = 90.0,
+    max_retries: int = 1,
+) -> Any:
+    """Return the shared client, building it with ``factory`` on first use or config change."""
+    global _client, _client_key
+    key = (factory, base_url, api_key, max_connections, keepalive_expiry, max_retries)
+    with _lock:
+        if _client is not None and _client_key == key:
+            return _client
+    with _build_lock:
+        with _lock:
+            if _client is not None and _client_key == key:
+                return _client
+        kwargs: Dict[str, Any] = {"max_retries": max_retries}
+        if base_url:
+            kwargs["base_url"] = base_url
+        if api_key:
+            kwargs["api_key"] = api_key
+        http_client = build_http_client(max_connections, keepalive_expiry)
+        if http_client is not None:
+            kwargs["http_client"] = http_client
+        client = factory(**kwargs)
+        with _lock:
+            old = _client
+            _client = client
+            _client_key = key
+            _stats["clients_created"] += 1
+    if old is not None:
+        try:
+            old.close()
+        except Exception:
+            pass
+    return client
+
+
+def reset_client():
+    global _client, _client_key
+    with _lock:
+        old = _client
+        _client = None
+        _client_key = None
+    if old is not None:
+        try:
+            old.close()
+        except Exception:
+            pass
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out = dict(_stats)
+        base_url = _client_key[1] if _client_key else None
+    requests = out["requests"]
+    opened = out["connections_opened"]
+    out["reused"] = max(0, requests - opened)
+    out["reuse_ratio"] = round(out["reused"] / requests, 3) if requests else None
+    out["instrumented"] = httpx is not None
+    out["base_url"] = base_url
+    return out
@@ -0,0 +1,124 @@
+"""Offline search-query generator learned from past LLM curations.
+
+Past prompts are indexed with the same hashed character n-gram vectors as
+similarity_service and blended with plain token overlap. For a new prompt
+the nearest past curations contribute their search queries round-robin,
+best match first, so a query set is available without an LLM round trip.
+"""
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ytplayd_app.services.similarity_service import SimilarityIndex, clean_text
+
+NGRAM_WEIGHT = 0.7
+TOKEN_WEIGHT = 0.3
+
+
+def tokens(text: str) -> Set[str]:
+    return {t for t in clean_text(text).split(" ") if t}
+
+
+def token_overlap(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class QueryGenerator:
+    def __init__(self):
+        self.index = SimilarityIndex()
+        self.entries: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, text: str, queries: Iterable[str], avoid_terms: Optional[Iterable[str]] = None) -> bool:
+        queries = [q.strip() for q in queries or [] if isinstance(q, str) and q.strip()]
+        if not queries:
+            return False
+        if not self.index.add(str(len(self.entries)), text):
+            return False
+        self.entries.append({
+            "text": text,
+            "tokens": tokens(text),
+            "queries": queries,
+            "avoid_terms": list(avoid_terms or []),
+        })
+        return True
+
+    def neighbors(self, text: str, k: int = 5, min_score: float = 0.0) -> List[Tuple[Dict[str, Any], float]]:
+        # Over-fetch on n-grams, then re-rank with token overlap.
+        query_tokens = tokens(text)
+        out: List[Tuple[Dict[str, Any], float]] = []
+        for key, ngram_score in self.index.query(text, k * 4):
+            entry = self.entries[int(key)]
+            score = NGRAM_WEIGHT * ngram_score + TOKEN_WEIGHT * token_overlap(query_tokens, entry["tokens"])
+            if score >= min_score:
+                out.append((entry, score))
+        out.sort(key=lambda item: item[1], reverse=True)
+        return out[:k]
+
+    def generate(
+        self,
+        text: str,
+        max_queries: int = 10,
+        k: int = 5,
+        min_score: float = 0.4,
+        avoid: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """Candidate queries from the nearest past curations, interleaved best match first."""
+        matches = self.neighbors(text, k, min_score)
+        avoid_clean = [clean_text(a) for a in avoid or [] if clean_text(a)]
+        queries: List[str] = []
+        seen: Set[str] = set()
+        avoid_terms: List[str] = []
+        depth = max((len(entry["queries"]) for entry, _ in matches), default=0)
+        for idx in range(depth):
+            for entry, _ in matches:
+                if idx >= len(entry["queries"]) or len(queries) >= max_queries:
+                    continue
+                query = entry["queries"][idx]
+                key = clean_text(query)
+                if not key or key in seen or any(a in key for a in avoid_clean):
+                    continue
+                seen.add(key)
+                queries.append(query)
+        for entry, _ in matches:
+            for term in entry["avoid_terms"]:
+                if term not in avoid_terms:
+                    avoid_terms.append(term)
+        return {
+            "search_queries": queries,
+            "avoid_terms": avoid_terms,
+            "matches": [{"prompt": entry["text"], "score": round(score, 3)} for entry, score in matches],
+        }
+
+
+_cache_lock = threading.Lock()
+_cache_signature: Optional[Tuple[Any, ...]] = None
+_cache_generator: Optional[QueryGenerator] = None
+
+
+def generator_for(signature: Tuple[Any, ...], rows_fn) -> QueryGenerator:
+    """Return the generator for ``signature``, rebuilding from ``rows_fn()`` only when it changed.
+
+    ``rows_fn`` yields ``(text, queries, avoid_terms)`` tuples.
+    """
+    global _cache_signature, _cache_generator
+    with _cache_lock:
+        if _cache_generator is not None and _cache_signature == signature:
+            return _cache_generator
+    generator = QueryGenerator()
+    for text, queries, avoid_terms in rows_fn():
+        generator.add(text, queries, avoid_terms)
+    with _cache_lock:
+        _cache_signature = signature
+        _cache_generator = generator
+    return generator
+
+
+def reset():
+    global _cache_signature, _cache_generator
+    with _cache_lock:
+        _cache_signature = None
+        _cache_generator = None
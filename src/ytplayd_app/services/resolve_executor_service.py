@@ -0,0 +1,164 @@
+"""Daemon-wide stream URL resolver with priorities, dedupe and cancellation.
+
+One fixed set of worker threads serves every resolve. Jobs are ordered by
+priority (now-playing, next-up, prefetch) and then by arrival. A videoId
+that is already pending or running is not resolved twice: later callers get
+the same future, and a higher priority promotes a job that has not started
+yet. Every job carries the generation it was submitted under;
+``new_generation`` (a fresh ``/play``) cancels pending jobs from older
+generations. Jobs that are already running finish normally.
+"""
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PRIORITY_NOW = 0
+PRIORITY_NEXT = 1
+PRIORITY_PREFETCH = 2
+PRIORITY_NAMES = {PRIORITY_NOW: "now", PRIORITY_NEXT: "next", PRIORITY_PREFETCH: "prefetch"}
+
+
+class _Job:
+    __slots__ = ("video_id", "priority", "generation", "future", "queued_at")
+
+    def __init__(self, video_id: str, priority: int, generation: int):
+        self.video_id = video_id
+        self.priority = priority
+        self.generation = generation
+        self.future: Future = Future()
+        self.queued_at = time.time()
+
+
+class ResolverExecutor:
+    def __init__(self, resolve_fn: Callable[[str], Optional[str]], workers: int = 4):
+        self._resolve = resolve_fn
+        self.workers = max(1, workers)
+        self.generation = 0
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, _Job]] = []
+        self._seq = itertools.count()
+        self._jobs: Dict[str, _Job] = {}
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        self._stats: Dict[str, int] = {
+            "submitted": 0,
+            "deduped": 0,
+            "promoted": 0,
+            "cancelled": 0,
+            "completed": 0,
+            "failed": 0,
+        }
+        self._waits: Dict[str, Dict[str, int]] = {
+            name: {"jobs": 0, "total_ms": 0, "max_ms": 0} for name in PRIORITY_NAMES.values()
+        }
+
+    def _ensure_threads(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, name=f"resolve-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def submit(self, video_id: str, priority: int = PRIORITY_PREFETCH, generation: Optional[int] = None) -> Future:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("resolver executor is shut down")
+            gen = self.generation if generation is None else generation
+            job = self._jobs.get(video_id)
+            if job is not None:
+                self._stats["deduped"] += 1
+                job.generation = max(job.generation, gen)
+                if priority < job.priority and not job.future.running():
+                    job.priority = priority
+                    self._stats["promoted"] += 1
+                    # The old heap entry is skipped when popped because its priority no longer matches.
+                    heapq.heappush(self._heap, (priority, next(self._seq), job))
+                    self._cond.notify()
+                return job.future
+            job = _Job(video_id, priority, gen)
+            self._jobs[video_id] = job
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self._stats["submitted"] += 1
+            self._ensure_threads()
+            self._cond.notify()
+            return job.future
+
+    def new_generation(self) -> int:
+        """Start a new generation and cancel pending jobs that only older generations asked for."""
+        with self._cond:
+            self.generation += 1
+            stale = [job for job in self._jobs.values() if job.generation < self.generation and not job.future.running()]
+            for job in stale:
+                del self._jobs[job.video_id]
+            generation = self.generation
+        # Outside the lock: cancel() runs done-callbacks synchronously.
+        cancelled = sum(1 for job in stale if job.future.cancel())
+        with self._cond:
+            self._stats["cancelled"] += cancelled
+        return generation
+
+    def _next_job(self) -> Optional[_Job]:
+        with self._cond:
+            while True:
+                while not self._heap:
+                    if self._closed:
+                        return None
+                    self._cond.wait()
+                priority, _, job = heapq.heappop(self._heap)
+                if job.priority != priority or job.future.done() or job.future.running():
+                    continue
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                waited = int((time.time() - job.queued_at) * 1000)
+                waits = self._waits[PRIORITY_NAMES.get(priority, "prefetch")]
+                waits["jobs"] += 1
+                waits["total_ms"] += waited
+                waits["max_ms"] = max(waits["max_ms"], waited)
+                return job
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                result = self._resolve(job.video_id)
+            except BaseException as e:
+                job.future.set_exception(e)
+                failed = True
+            else:
+                job.future.set_result(result)
+                failed = False
+            with self._cond:
+                if self._jobs.get(job.video_id) is job:
+                    del self._jobs[job.video_id]
+                self._stats["failed" if failed else "completed"] += 1
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            pending = list(self._jobs.values())
+            self._jobs.clear()
+            self._cond.notify_all()
+        for job in pending:
+            job.future.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out: Dict[str, Any] = dict(self._stats)
+            pending = {name: 0 for name in PRIORITY_NAMES.values()}
+            running = 0
+            for job in self._jobs.values():
+                if job.future.running():
+                    running += 1
+                else:
+                    pending[PRIORITY_NAMES.get(job.priority, "prefetch")] += 1
+            waits = {name: dict(w) for name, w in self._waits.items()}
+            out.update({"workers": self.workers, "generation": self.generation, "running": running, "pending": pending})
+        out["wait_ms"] = {
+            name: {"avg": round(w["total_ms"] / w["jobs"]) if w["jobs"] else None, "max": w["max_ms"]}
+            for name, w in waits.items()
+        }
+        return out
@@ -0,0 +1,227 @@
+"""Pool of persistent resolver worker processes.
+
+Each worker runs resolver_worker and handles one job at a time over its
+stdin/stdout pipes, so interpreter and extractor startup is paid once per
+worker instead of once per track. A worker is recycled after ``max_jobs``
+jobs, killed and replaced when a job exceeds ``timeout``, and replaced when
+it exits unexpectedly.
+"""
+import itertools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+_EOF = object()
+
+
+def default_command() -> List[str]:
+    return [sys.executable, "-m", "ytplayd_app.services.resolver_worker"]
+
+
+def _package_root() -> str:
+    here = os.path.dirname(os.path.abspath(__file__))
+    return os.path.dirname(os.path.dirname(here))
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+class _Worker:
+    def __init__(self, command: List[str]):
+        env = dict(os.environ)
+        root = _package_root()
+        env["PYTHONPATH"] = root + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+        self.proc = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+            env=env,
+        )
+        self.jobs = 0
+        self.replies: "queue.Queue[Any]" = queue.Queue()
+        self.reader = threading.Thread(target=self._read, name="resolver-reader", daemon=True)
+        self.reader.start()
+
+    def _read(self):
+        try:
+            for line in self.proc.stdout:
+                self.replies.put(line)
+        except (OSError, ValueError):
+            pass
+        self.replies.put(_EOF)
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def request(self, job: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        self.jobs += 1
+        try:
+            self.proc.stdin.write(json.dumps(job) + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError) as e:
+            raise WorkerError(f"worker pipe closed: {e}")
+        while True:
+            try:
+                line = self.replies.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"resolve exceeded {timeout:.0f}s")
+            if line is _EOF:
+                raise WorkerError(f"worker exited with {self.proc.poll()}")
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                continue
+            # Replies to an earlier timed-out job cannot happen (we kill on timeout), but be strict.
+            if reply.get("id") == job["id"]:
+                return reply
+
+    def close(self, kill: bool = False):
+        try:
+            if kill:
+                self.proc.kill()
+            else:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=2)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            self.proc.kill()
+        try:
+            self.proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+class ResolverPool:
+    def __init__(
+        self,
+        size: int = 2,
+        max_jobs: int = 200,
+        timeout: float = 30.0,
+        command: Optional[List[str]] = None,
+    ):
+        self.size = max(1, size)
+        self.max_jobs = max(1, max_jobs)
+        self.timeout = max(0.1, timeout)
+        self.command = list(command or default_command())
+        self._idle: "queue.LifoQueue[Optional[_Worker]]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._closed = False
+        self._stats: Dict[str, int] = {
+            "jobs": 0,
+            "spawned": 0,
+            "recycled": 0,
+            "timeouts": 0,
+            "crashes": 0,
+            "errors": 0,
+        }
+        # Workers start lazily; None is a free slot.
+        for _ in range(self.size):
+            self._idle.put(None)
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self.command)
+        with self._lock:
+            self._stats["spawned"] += 1
+        return worker
+
+    def resolve(
+        self,
+        video_id: str,
+        extractor_args: Optional[str] = None,
+        js_runtime: Optional[str] = None,
+    ) -> Optional[str]:
+        if self._closed:
+            raise WorkerError("resolver pool is shut down")
+        worker = self._idle.get()
+        slot: Optional[_Worker] = None
+        try:
+            if worker is None or not worker.alive():
+                if worker is not None:
+                    worker.close(kill=True)
+                    with self._lock:
+                        self._stats["crashes"] += 1
+                worker = self._spawn()
+            job = {
+                "id": next(self._ids),
+                "video_id": video_id,
+                "extractor_args": extractor_args,
+                "js_runtime": js_runtime,
+            }
+            with self._lock:
+                self._stats["jobs"] += 1
+            try:
+                reply = worker.request(job, self.timeout)
+            except TimeoutError:
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                worker.close(kill=True)
+                raise
+            except WorkerError:
+                with self._lock:
+                    self._stats["crashes"] += 1
+                worker.close(kill=True)
+                raise
+            if worker.jobs >= self.max_jobs:
+                with self._lock:
+                    self._stats["recycled"] += 1
+                worker.close()
+            else:
+                slot = worker
+            if reply.get("error"):
+                with self._lock:
+                    self._stats["errors"] += 1
+                raise WorkerError(reply["error"])
+            return reply.get("url") or None
+        finally:
+            self._idle.put(slot)
+
+    def shutdown(self):
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+        out.update({"size": self.size, "max_jobs": self.max_jobs, "timeout": self.timeout})
+        return out
+
+
+_pool_lock = threading.Lock()
+_pool: Optional[ResolverPool] = None
+
+
+def get_pool(size: int, max_jobs: int, timeout: float) -> ResolverPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ResolverPool(size, max_jobs, timeout)
+        return _pool
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        pool = _pool
+        _pool = None
+    if pool is not None:
+        pool.shutdown()
+
+
+def stats() -> Optional[Dict[str, Any]]:
+    with _pool_lock:
+        pool = _pool
+    return pool.stats() if pool is not None else None
@@ -0,0 +1,40 @@
+"""Long-lived stream URL resolver process.
+
+Started by resolver_pool_service. Reads one JSON job per line on stdin
+(``{"id", "video_id", "extractor_args", "js_runtime"}``) and answers with
+one JSON line on stdout (``{"id", "url", "error"}``). yt_dlp is imported and
+its YoutubeDL instances are built once per process, not once per track.
+"""
+import json
+import sys
+
+from ytplayd_app.services import ytdlp_service
+
+
+def handle(job: dict) -> dict:
+    try:
+        url = ytdlp_service.resolve(job.get("video_id") or "", job.get("extractor_args"), job.get("js_runtime"))
+        return {"id": job.get("id"), "url": url, "error": None}
+    except Exception as e:
+        return {"id": job.get("id"), "url": None, "error": f"{type(e).__name__}: {e}"}
+
+
+def main() -> int:
+    out = sys.stdout
+    # Anything yt-dlp prints must not corrupt the reply channel.
+    sys.stdout = sys.stderr
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+        except ValueError:
+            continue
+        out.write(json.dumps(handle(job)) + "\n")
+        out.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Track selection primitives for the curation hot path.
+
+``ArtistWindow`` answers "how many of the last N picks were by this artist"
+in O(1), and ``RankedPool`` hands out candidates in rank order lazily from a
+heap, so only the picks actually needed pay for ordering.
+"""
+import heapq
+from collections import Counter, deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+class ArtistWindow:
+    """Sliding window of recent artists backed by a deque and a Counter."""
+
+    def __init__(self, size: int = 10):
+        self.size = max(1, size)
+        self._window: deque = deque()
+        self._counts: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    def add(self, artist: str):
+        if not artist:
+            return
+        self._window.append(artist)
+        self._counts[artist] += 1
+        if len(self._window) > self.size:
+            dropped = self._window.popleft()
+            self._counts[dropped] -= 1
+            if self._counts[dropped] <= 0:
+                del self._counts[dropped]
+
+    def count(self, artist: str) -> int:
+        return self._counts.get(artist, 0)
+
+
+class RankedPool:
+    """Candidates popped in descending ``key`` order; ties keep input order.
+
+    Matches ``sorted(candidates, key=key, reverse=True)`` without sorting the
+    whole pool up front. Candidates passed over are consumed, like advancing
+    an index through the sorted list.
+    """
+
+    def __init__(self, candidates: Iterable[Dict[str, Any]], key: Callable[[Dict[str, Any]], Sequence[float]]):
+        self._heap: List[Tuple[Tuple[float, ...], int, Dict[str, Any]]] = [
+            (tuple(-float(v) for v in key(c)), idx, c) for idx, c in enumerate(candidates)
+        ]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def next_eligible(
+        self,
+        used_ids: Set[str],
+        window: ArtistWindow,
+        max_per_artist: int,
+    ) -> Optional[Dict[str, str]]:
+        while self._heap:
+            _, _, candidate = heapq.heappop(self._heap)
+            track = candidate["track"]
+            vid = track.get("videoId")
+            if not vid or vid in used_ids:
+                continue
+            artist = (track.get("artist") or "").lower()
+            if artist and window.count(artist) >= max_per_artist:
+                continue
+            return track
+        return None
+
+
+def select_from_buckets(
+    pools: Dict[str, RankedPool],
+    order: List[str],
+    selected: List[Dict[str, str]],
+    used_ids: Set[str],
+    window: ArtistWindow,
+    max_tracks: int,
+    max_per_artist: int = 2,
+) -> List[Dict[str, str]]:
+    """Fill ``selected`` following the bucket ``order``, borrowing from the other bucket when one runs dry."""
+    def take(first: str, second: str) -> Optional[Dict[str, str]]:
+        track = pools[first].next_eligible(used_ids, window, max_per_artist)
+        if not track:
+            track = pools[second].next_eligible(used_ids, window, max_per_artist)
+        return track
+
+    def accept(track: Dict[str, str]):
+        selected.append(track)
+        used_ids.add(track.get("videoId"))
+        window.add((track.get("artist") or "").lower())
+
+    for bucket in order:
+        other = "exploit" if bucket == "explore" else "explore"
+        track = take(bucket, other)
+        if not track:
+            break
+        accept(track)
+
+    while len(selected) < max_tracks:
+        track = take("explore", "exploit")
+        if not track:
+            break
+        accept(track)
+    return selected
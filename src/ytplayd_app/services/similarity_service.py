@@ -0,0 +1,126 @@
+"""Local text similarity index for candidate ranking.
+
+Tracks are embedded as hashed character n-gram vectors (sublinear tf, L2
+normalised) over title/artist/album, so cosine similarity is a sparse dot
+product. Everything is pure Python and runs in-process; no LLM calls.
+"""
+import heapq
+import math
+import re
+import threading
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_DIMS = 1 << 18
+DEFAULT_NGRAM = 3
+
+_CLEAN_RE = re.compile(r"[^a-z0-9]+")
+
+
+def clean_text(text: str) -> str:
+    if not text:
+        return ""
+    return _CLEAN_RE.sub(" ", text.lower()).strip()
+
+
+def track_text(track: Dict[str, Any]) -> str:
+    parts = [track.get("title") or "", track.get("artist") or "", track.get("album") or ""]
+    return " ".join(str(p) for p in parts if p)
+
+
+def vectorize(text: str, dims: int = DEFAULT_DIMS, ngram: int = DEFAULT_NGRAM) -> Dict[int, float]:
+    cleaned = clean_text(text)
+    if not cleaned:
+        return {}
+    counts: Dict[int, int] = {}
+    for word in cleaned.split(" "):
+        padded = f" {word} "
+        if len(padded) <= ngram:
+            grams = [padded]
+        else:
+            grams = [padded[i:i + ngram] for i in range(len(padded) - ngram + 1)]
+        for gram in grams:
+            bucket = zlib.crc32(gram.encode("utf-8")) % dims
+            counts[bucket] = counts.get(bucket, 0) + 1
+    vec = {b: 1.0 + math.log(c) for b, c in counts.items()}
+    norm = math.sqrt(sum(w * w for w in vec.values()))
+    if norm <= 0:
+        return {}
+    return {b: w / norm for b, w in vec.items()}
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(k, 0.0) for k, w in a.items())
+
+
+class SimilarityIndex:
+    """Inverted index over hashed n-gram vectors with top-k cosine queries."""
+
+    def __init__(self, dims: int = DEFAULT_DIMS, ngram: int = DEFAULT_NGRAM):
+        self.dims = dims
+        self.ngram = ngram
+        self._keys: List[str] = []
+        self._postings: Dict[int, List[Tuple[int, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, text: str) -> bool:
+        vec = vectorize(text, self.dims, self.ngram)
+        if not vec:
+            return False
+        doc = len(self._keys)
+        self._keys.append(key)
+        for bucket, weight in vec.items():
+            self._postings.setdefault(bucket, []).append((doc, weight))
+        return True
+
+    def add_tracks(self, tracks: Iterable[Dict[str, Any]]) -> int:
+        added = 0
+        for track in tracks:
+            key = str(track.get("videoId") or len(self._keys))
+            if self.add(key, track_text(track)):
+                added += 1
+        return added
+
+    def _scores(self, vec: Dict[int, float]) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for bucket, weight in vec.items():
+            for doc, doc_weight in self._postings.get(bucket, ()):
+                scores[doc] = scores.get(doc, 0.0) + weight * doc_weight
+        return scores
+
+    def query(self, text: str, k: int = 5) -> List[Tuple[str, float]]:
+        if not self._keys or k <= 0:
+            return []
+        scores = self._scores(vectorize(text, self.dims, self.ngram))
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self._keys[doc], min(1.0, score)) for doc, score in top]
+
+    def max_similarity(self, text: str) -> float:
+        if not self._keys:
+            return 0.0
+        scores = self._scores(vectorize(text, self.dims, self.ngram))
+        return min(1.0, max(scores.values(), default=0.0))
+
+
+_cache_lock = threading.Lock()
+_cache_signature: Optional[Tuple[str, ...]] = None
+_cache_index: Optional[SimilarityIndex] = None
+
+
+def index_for_tracks(tracks: List[Dict[str, Any]]) -> SimilarityIndex:
+    """Return an index over ``tracks``, reusing the last one if the set is unchanged."""
+    global _cache_signature, _cache_index
+    signature = tuple(track_text(t) for t in tracks)
+    with _cache_lock:
+        if _cache_index is not None and _cache_signature == signature:
+            return _cache_index
+    index = SimilarityIndex()
+    index.add_tracks(tracks)
+    with _cache_lock:
+        _cache_signature = signature
+        _cache_index = index
+    return index
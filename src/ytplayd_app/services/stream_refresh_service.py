@@ -0,0 +1,96 @@
+"""Expiry tracking for stream URLs sitting in the mpv playlist.
+
+Every URL loaded into mpv is recorded with its googlevideo expiry. The
+daemon's refresher asks for the queued entries that will expire within a
+margin, re-resolves them and reports back here. A refresh counts as an
+avoided failure when the track later starts after the old URL's expiry,
+i.e. when mpv would otherwise have failed the load and skipped it.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ytplayd_app.services import stream_url_service
+
+_lock = threading.Lock()
+_queued: Dict[str, Tuple[str, int]] = {}
+_superseded: Dict[str, int] = {}
+_stats: Dict[str, int] = {"refreshes": 0, "refresh_failures": 0, "failures_avoided": 0}
+
+
+def track(video_id: str, url: str) -> bool:
+    """Remember the URL queued for ``video_id``; URLs without an expiry (watch URLs) are ignored."""
+    expire = stream_url_service.parse_expiry(url)
+    with _lock:
+        if expire is None:
+            _queued.pop(video_id, None)
+            return False
+        _queued[video_id] = (url, expire)
+        return True
+
+
+def clear():
+    with _lock:
+        _queued.clear()
+        _superseded.clear()
+
+
+def due(video_ids: Iterable[str], margin_sec: int, now: Optional[float] = None) -> List[str]:
+    """Queued ids (in the given order) whose URL expires within ``margin_sec``."""
+    now = time.time() if now is None else now
+    out: List[str] = []
+    with _lock:
+        for video_id in video_ids:
+            entry = _queued.get(video_id)
+            if entry is not None and entry[1] - now <= margin_sec:
+                out.append(video_id)
+    return out
+
+
+def note_refreshed(video_id: str, url: str):
+    expire = stream_url_service.parse_expiry(url)
+    with _lock:
+        old = _queued.get(video_id)
+        if old is not None:
+            # Keep the earliest expiry if a track is refreshed twice before it plays.
+            _superseded.setdefault(video_id, old[1])
+        if expire is None:
+            _queued.pop(video_id, None)
+        else:
+            _queued[video_id] = (url, expire)
+        _stats["refreshes"] += 1
+
+
+def note_failed(video_id: str):
+    with _lock:
+        _stats["refresh_failures"] += 1
+
+
+def note_started(video_id: str, now: Optional[float] = None) -> bool:
+    """Call when ``video_id`` starts playing; True if a refresh saved it from an expired URL."""
+    now = time.time() if now is None else now
+    with _lock:
+        _queued.pop(video_id, None)
+        old_expire = _superseded.pop(video_id, None)
+        if old_expire is not None and now >= old_expire:
+            _stats["failures_avoided"] += 1
+            return True
+    return False
+
+
+def stats() -> Dict[str, Any]:
+    now = time.time()
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        out["tracked"] = len(_queued)
+        expiries = [expire for _, expire in _queued.values()]
+    out["next_expiry_sec"] = int(min(expiries) - now) if expiries else None
+    return out
+
+
+def reset():
+    with _lock:
+        _queued.clear()
+        _superseded.clear()
+        for key in _stats:
+            _stats[key] = 0
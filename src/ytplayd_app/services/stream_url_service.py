@@ -0,0 +1,132 @@
+"""In-memory cache of resolved stream URLs.
+
+googlevideo URLs carry their expiry as an ``expire=<unix ts>`` query
+parameter (or an ``/expire/<ts>/`` path segment for manifest URLs). Entries
+are keyed by videoId and yt-dlp extractor-args profile, served until
+``expire - margin`` and dropped once past it. URLs without a parseable
+expiry are not cached.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+_PATH_EXPIRE_RE = re.compile(r"/expire/(\d+)(?:/|$)")
+
+_lock = threading.Lock()
+_entries: "OrderedDict[Tuple[str, str], Tuple[str, int]]" = OrderedDict()
+_config: Dict[str, int] = {"margin_sec": 900, "max_entries": 500}
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "uncacheable": 0, "expired": 0, "evicted": 0}
+
+
+def configure(margin_sec: int, max_entries: int):
+    with _lock:
+        _config["margin_sec"] = max(0, int(margin_sec))
+        _config["max_entries"] = max(1, int(max_entries))
+
+
+def parse_expiry(url: str) -> Optional[int]:
+    if not url:
+        return None
+    parsed = urlparse(url)
+    values = parse_qs(parsed.query).get("expire")
+    raw = values[0] if values else None
+    if raw is None:
+        match = _PATH_EXPIRE_RE.search(parsed.path)
+        raw = match.group(1) if match else None
+    try:
+        return int(raw) if raw is not None else None
+    except ValueError:
+        return None
+
+
+def _key(video_id: str, profile: Optional[str]) -> Tuple[str, str]:
+    return video_id, (profile or "").strip()
+
+
+def get(video_id: str, profile: Optional[str] = None, now: Optional[float] = None) -> Optional[str]:
+    return get_any(video_id, [profile], now)
+
+
+def get_any(video_id: str, profiles: Iterable[Optional[str]], now: Optional[float] = None) -> Optional[str]:
+    """First live URL for ``video_id`` under any of ``profiles``; counts one hit or miss per call."""
+    now = time.time() if now is None else now
+    with _lock:
+        for profile in profiles:
+            key = _key(video_id, profile)
+            entry = _entries.get(key)
+            if entry is None:
+                continue
+            url, expire = entry
+            if now >= expire - _config["margin_sec"]:
+                del _entries[key]
+                _stats["expired"] += 1
+                continue
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            return url
+        _stats["misses"] += 1
+        return None
+
+
+def put(video_id: str, profile: Optional[str], url: str, now: Optional[float] = None) -> bool:
+    now = time.time() if now is None else now
+    expire = parse_expiry(url)
+    with _lock:
+        if expire is None or now >= expire - _config["margin_sec"]:
+            _stats["uncacheable"] += 1
+            return False
+        key = _key(video_id, profile)
+        _entries[key] = (url, expire)
+        _entries.move_to_end(key)
+        _stats["stores"] += 1
+        # Puts follow a yt-dlp run, so a full sweep here is cheap by comparison.
+        _evict_expired_locked(now)
+        while len(_entries) > _config["max_entries"]:
+            _entries.popitem(last=False)
+            _stats["evicted"] += 1
+        return True
+
+
+def _evict_expired_locked(now: float) -> int:
+    margin = _config["margin_sec"]
+    stale = [key for key, (_, expire) in _entries.items() if now >= expire - margin]
+    for key in stale:
+        del _entries[key]
+    _stats["expired"] += len(stale)
+    return len(stale)
+
+
+def evict_expired(now: Optional[float] = None) -> int:
+    with _lock:
+        return _evict_expired_locked(time.time() if now is None else now)
+
+
+def invalidate(video_id: str) -> int:
+    with _lock:
+        keys = [key for key in _entries if key[0] == video_id]
+        for key in keys:
+            del _entries[key]
+        return len(keys)
+
+
+def stats() -> Dict[str, Any]:
+    now = time.time()
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        out.update(_config)
+        out["entries"] = len(_entries)
+        expiries = [expire for _, expire in _entries.values()]
+    lookups = out["hits"] + out["misses"]
+    out["hit_rate"] = round(out["hits"] / lookups, 3) if lookups else None
+    out["next_expiry_sec"] = int(min(expiries) - now) if expiries else None
+    return out
+
+
+def reset():
+    with _lock:
+        _entries.clear()
+        for key in _stats:
+            _stats[key] = 0
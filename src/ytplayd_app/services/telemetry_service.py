@@ -0,0 +1,247 @@
+"""Per-call telemetry for OpenAI requests.
+
+Every LLM call (and every prompt-cache hit that avoided one) is recorded
+with its phase, model, latency, token usage, cache outcome and fallback
+reason. Counters are cumulative; latency histograms and percentiles are
+computed over a rolling window of recent calls per phase. Rows are also
+persisted to the ``llm_calls`` table for long-term rollups: ``record`` only
+buffers them, and ``flush`` (run periodically by the daemon, off the request
+path) writes the buffer in one transaction.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2000, 5000, 10000, 20000, 30000)
+WINDOW = 500
+RECENT = 20
+# Rows waiting for flush(); the oldest are dropped if the flusher falls this far behind.
+MAX_PENDING = 5000
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS llm_calls (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      ts INTEGER NOT NULL,
+      phase TEXT NOT NULL,
+      model TEXT,
+      latency_ms INTEGER NOT NULL,
+      input_tokens INTEGER,
+      output_tokens INTEGER,
+      cached_tokens INTEGER,
+      cache_hit INTEGER NOT NULL DEFAULT 0,
+      fallback TEXT
+    );
+"""
+
+_lock = threading.Lock()
+_phases: Dict[str, Dict[str, Any]] = {}
+_recent: deque = deque(maxlen=RECENT)
+_pending: deque = deque(maxlen=MAX_PENDING)
+
+
+def _phase_state(phase: str) -> Dict[str, Any]:
+    state = _phases.get(phase)
+    if state is None:
+        state = {
+            "calls": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "fallbacks": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cached_tokens": 0,
+            "fallback_reasons": {},
+            "models": {},
+            "window": deque(maxlen=WINDOW),
+        }
+        _phases[phase] = state
+    return state
+
+
+def bucket_label(latency_ms: int) -> str:
+    for bound in LATENCY_BUCKETS_MS:
+        if latency_ms <= bound:
+            return f"<={bound}"
+    return f">{LATENCY_BUCKETS_MS[-1]}"
+
+
+def percentile(values: List[int], pct: float) -> Optional[int]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def record(
+    phase: str,
+    model: Optional[str],
+    latency_ms: int,
+    input_tokens: Optional[int] = None,
+    output_tokens: Optional[int] = None,
+    cached_tokens: Optional[int] = None,
+    cache_hit: bool = False,
+    fallback: Optional[str] = None,
+) -> Dict[str, Any]:
+    event = {
+        "ts": int(time.time()),
+        "phase": phase,
+        "model": model,
+        "latency_ms": max(0, int(latency_ms)),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cached_tokens": cached_tokens,
+        "cache_hit": bool(cache_hit),
+        "fallback": fallback,
+    }
+    with _lock:
+        state = _phase_state(phase)
+        if cache_hit:
+            state["cache_hits"] += 1
+        else:
+            state["calls"] += 1
+            state["cache_misses"] += 1
+            state["window"].append(event["latency_ms"])
+            if model:
+                state["models"][model] = state["models"].get(model, 0) + 1
+        if fallback:
+            state["fallbacks"] += 1
+            state["fallback_reasons"][fallback] = state["fallback_reasons"].get(fallback, 0) + 1
+        state["input_tokens"] += input_tokens or 0
+        state["output_tokens"] += output_tokens or 0
+        state["cached_tokens"] += cached_tokens or 0
+        _recent.append(event)
+        _pending.append(event)
+    return event
+
+
+def flush(db_fn: Callable[[], Any]) -> int:
+    """Write buffered events to ``llm_calls`` in one transaction; returns how many were written.
+
+    If the write fails the events go back to the front of the buffer for the next flush.
+    """
+    with _lock:
+        events = list(_pending)
+        _pending.clear()
+    if not events:
+        return 0
+    try:
+        _write(db_fn, events)
+    except Exception:
+        with _lock:
+            # Requeued ahead of anything recorded meanwhile; past MAX_PENDING the oldest go first.
+            merged = events + list(_pending)
+            _pending.clear()
+            _pending.extend(merged[-MAX_PENDING:])
+        raise
+    return len(events)
+
+
+def _write(db_fn: Callable[[], Any], events: List[Dict[str, Any]]):
+    con = db_fn()
+    try:
+        con.executemany(
+            "INSERT INTO llm_calls(ts, phase, model, latency_ms, input_tokens, output_tokens, cached_tokens, "
+            "cache_hit, fallback) VALUES(?,?,?,?,?,?,?,?,?);",
+            [
+                (
+                    event["ts"],
+                    event["phase"],
+                    event["model"],
+                    event["latency_ms"],
+                    event["input_tokens"],
+                    event["output_tokens"],
+                    event["cached_tokens"],
+                    1 if event["cache_hit"] else 0,
+                    event["fallback"],
+                )
+                for event in events
+            ],
+        )
+        con.commit()
+    finally:
+        con.close()
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        phases: Dict[str, Any] = {}
+        for phase, state in _phases.items():
+            window = list(state["window"])
+            histogram = {bucket_label(b): 0 for b in LATENCY_BUCKETS_MS}
+            histogram[f">{LATENCY_BUCKETS_MS[-1]}"] = 0
+            for value in window:
+                histogram[bucket_label(value)] += 1
+            lookups = state["cache_hits"] + state["cache_misses"]
+            phases[phase] = {
+                "calls": state["calls"],
+                "cache_hits": state["cache_hits"],
+                "cache_misses": state["cache_misses"],
+                "cache_hit_rate": round(state["cache_hits"] / lookups, 3) if lookups else None,
+                "fallbacks": state["fallbacks"],
+                "fallback_reasons": dict(state["fallback_reasons"]),
+                "models": dict(state["models"]),
+                "input_tokens": state["input_tokens"],
+                "output_tokens": state["output_tokens"],
+                "cached_tokens": state["cached_tokens"],
+                "latency_ms": {
+                    "window": len(window),
+                    "p50": percentile(window, 50),
+                    "p90": percentile(window, 90),
+                    "p99": percentile(window, 99),
+                    "max": max(window) if window else None,
+                },
+                "histogram": histogram,
+            }
+        return {"phases": phases, "recent": list(_recent)}
+
+
+def daily_rollup(db_fn: Callable[[], Any], days: int) -> List[Dict[str, Any]]:
+    since = int(time.time()) - max(1, days) * 86400
+    flush(db_fn)
+    con = db_fn()
+    try:
+        rows = con.execute(
+            "SELECT date(ts, 'unixepoch', 'localtime') AS day, phase, COUNT(*), SUM(cache_hit), "
+            "SUM(CASE WHEN fallback IS NOT NULL THEN 1 ELSE 0 END), "
+            "AVG(CASE WHEN cache_hit=0 THEN latency_ms END), MAX(latency_ms), "
+            "SUM(COALESCE(input_tokens,0)), SUM(COALESCE(output_tokens,0)) "
+            "FROM llm_calls WHERE ts >= ? GROUP BY day, phase ORDER BY day DESC, phase;",
+            (since,),
+        ).fetchall()
+    finally:
+        con.close()
+    out: List[Dict[str, Any]] = []
+    for day, phase, total, hits, fallbacks, avg_ms, max_ms, in_tok, out_tok in rows:
+        out.append({
+            "day": day,
+            "phase": phase,
+            "total": total,
+            "cache_hits": hits or 0,
+            "fallbacks": fallbacks or 0,
+            "avg_latency_ms": round(avg_ms) if avg_ms is not None else None,
+            "max_latency_ms": max_ms,
+            "input_tokens": in_tok or 0,
+            "output_tokens": out_tok or 0,
+        })
+    return out
+
+
+def prune(db_fn: Callable[[], Any], keep_days: int) -> int:
+    if keep_days <= 0:
+        return 0
+    con = db_fn()
+    try:
+        cur = con.execute("DELETE FROM llm_calls WHERE ts < ?;", (int(time.time()) - keep_days * 86400,))
+        con.commit()
+        return cur.rowcount or 0
+    finally:
+        con.close()
+
+
+def reset():
+    with _lock:
+        _phases.clear()
+        _recent.clear()
+        _pending.clear()
@@ -0,0 +1,195 @@
+"""Per-track stream resolution health and negative cache.
+
+A videoId whose resolution fails with every extractor profile is blocked
+for a TTL that doubles with each consecutive failure (capped at
+``MAX_BACKOFF`` times the base TTL), so dead or region-locked tracks stop
+costing yt-dlp runs and are filtered out of candidate lists. Counts and a
+smoothed health score, ``(ok + 1) / (ok + failed + 2)``, are kept in the
+``track_health`` table; blocked ids are mirrored in memory for the hot path.
+
+Failures that are not about the track (no network, yt-dlp broken by a site
+change) hit every id at once. When ``OUTAGE_MIN_IDS`` distinct ids fail
+within ``OUTAGE_WINDOW_SEC``, failures are treated as an outage: nothing is
+blocked, and blocks placed earlier in that window are lifted again.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS track_health (
+      videoId TEXT PRIMARY KEY,
+      resolve_ok INTEGER NOT NULL DEFAULT 0,
+      resolve_failed INTEGER NOT NULL DEFAULT 0,
+      consecutive_failures INTEGER NOT NULL DEFAULT 0,
+      score REAL NOT NULL DEFAULT 0.5,
+      blocked_until INTEGER NOT NULL DEFAULT 0,
+      updated_at INTEGER NOT NULL
+    );
+"""
+
+MAX_BACKOFF = 8
+OUTAGE_WINDOW_SEC = 120
+OUTAGE_MIN_IDS = 5
+
+_lock = threading.Lock()
+_blocked: Dict[str, int] = {}
+_tracked: Set[str] = set()
+_recent_failures: Deque[Tuple[float, str]] = deque()
+_config: Dict[str, int] = {"ttl_sec": 7200}
+_stats: Dict[str, int] = {"failures": 0, "recoveries": 0, "blocked_hits": 0, "outage_skips": 0}
+
+
+def configure(ttl_sec: int):
+    with _lock:
+        _config["ttl_sec"] = max(0, int(ttl_sec))
+
+
+def health_score(ok: int, failed: int) -> float:
+    return round((ok + 1) / (ok + failed + 2), 3)
+
+
+def load(db_fn: Callable[[], Any], now: Optional[float] = None):
+    """Rebuild the in-memory mirror from ``track_health`` (e.g. at startup)."""
+    now = int(time.time() if now is None else now)
+    con = db_fn()
+    try:
+        rows = con.execute("SELECT videoId, blocked_until FROM track_health;").fetchall()
+    finally:
+        con.close()
+    with _lock:
+        _tracked.clear()
+        _blocked.clear()
+        for video_id, blocked_until in rows:
+            _tracked.add(video_id)
+            if blocked_until > now:
+                _blocked[video_id] = blocked_until
+
+
+def is_blocked(video_id: str, now: Optional[float] = None, count: bool = True) -> bool:
+    now = time.time() if now is None else now
+    with _lock:
+        until = _blocked.get(video_id)
+        if until is None:
+            return False
+        if now >= until:
+            del _blocked[video_id]
+            return False
+        if count:
+            _stats["blocked_hits"] += 1
+        return True
+
+
+def blocked_ids(now: Optional[float] = None) -> Set[str]:
+    now = time.time() if now is None else now
+    with _lock:
+        return {video_id for video_id, until in _blocked.items() if until > now}
+
+
+def _note_failure(video_id: str, now: int) -> Optional[Set[str]]:
+    """Record a failure in the outage window; the ids failing in it when it looks like an outage, else None."""
+    _recent_failures.append((now, video_id))
+    while _recent_failures and _recent_failures[0][0] <= now - OUTAGE_WINDOW_SEC:
+        _recent_failures.popleft()
+    ids = {vid for _, vid in _recent_failures}
+    return ids if len(ids) >= OUTAGE_MIN_IDS else None
+
+
+def _lift(db_fn: Callable[[], Any], video_ids: Set[str], since: int):
+    with _lock:
+        for video_id in video_ids:
+            _blocked.pop(video_id, None)
+    con = db_fn()
+    try:
+        con.executemany(
+            "UPDATE track_health SET blocked_until=0, consecutive_failures=MAX(consecutive_failures-1, 0) "
+            "WHERE videoId=? AND blocked_until>0 AND updated_at>=?;",
+            [(video_id, since) for video_id in video_ids],
+        )
+        con.commit()
+    finally:
+        con.close()
+
+
+def record_failure(db_fn: Callable[[], Any], video_id: str, now: Optional[float] = None) -> int:
+    """Count a failed resolution and block ``video_id``; returns the block expiry, or 0 during an outage."""
+    now = int(time.time() if now is None else now)
+    with _lock:
+        outage = _note_failure(video_id, now)
+        if outage is not None:
+            _stats["outage_skips"] += 1
+    if outage is not None:
+        _lift(db_fn, outage, now - OUTAGE_WINDOW_SEC)
+        return 0
+    con = db_fn()
+    try:
+        row = con.execute(
+            "SELECT resolve_ok, resolve_failed, consecutive_failures FROM track_health WHERE videoId=?;",
+            (video_id,),
+        ).fetchone()
+        ok, failed, streak = row if row else (0, 0, 0)
+        failed += 1
+        streak += 1
+        with _lock:
+            ttl = _config["ttl_sec"]
+        blocked_until = now + ttl * min(2 ** (streak - 1), MAX_BACKOFF)
+        con.execute(
+            "INSERT OR REPLACE INTO track_health(videoId, resolve_ok, resolve_failed, consecutive_failures, "
+            "score, blocked_until, updated_at) VALUES(?,?,?,?,?,?,?);",
+            (video_id, ok, failed, streak, health_score(ok, failed), blocked_until, now),
+        )
+        con.commit()
+    finally:
+        con.close()
+    with _lock:
+        _tracked.add(video_id)
+        if blocked_until > now:
+            _blocked[video_id] = blocked_until
+        _stats["failures"] += 1
+    return blocked_until
+
+
+def record_success(db_fn: Callable[[], Any], video_id: str, now: Optional[float] = None) -> bool:
+    """Count a successful resolution; only tracks with a failure history are written."""
+    with _lock:
+        if video_id not in _tracked:
+            return False
+        _blocked.pop(video_id, None)
+        _stats["recoveries"] += 1
+    now = int(time.time() if now is None else now)
+    con = db_fn()
+    try:
+        row = con.execute(
+            "SELECT resolve_ok, resolve_failed FROM track_health WHERE videoId=?;", (video_id,)
+        ).fetchone()
+        ok, failed = row if row else (0, 0)
+        ok += 1
+        con.execute(
+            "INSERT OR REPLACE INTO track_health(videoId, resolve_ok, resolve_failed, consecutive_failures, "
+            "score, blocked_until, updated_at) VALUES(?,?,?,0,?,0,?);",
+            (video_id, ok, failed, health_score(ok, failed), now),
+        )
+        con.commit()
+    finally:
+        con.close()
+    return True
+
+
+def stats() -> Dict[str, Any]:
+    now = time.time()
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        out.update(_config)
+        out["tracked"] = len(_tracked)
+        out["blocked"] = sum(1 for until in _blocked.values() if until > now)
+    return out
+
+
+def reset():
+    with _lock:
+        _blocked.clear()
+        _tracked.clear()
+        _recent_failures.clear()
+        for key in _stats:
+            _stats[key] = 0
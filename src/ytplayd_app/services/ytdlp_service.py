@@ -0,0 +1,146 @@
+"""In-process stream URL extraction through the yt_dlp Python API.
+
+Spawning the yt-dlp binary costs interpreter startup plus extractor setup
+on every track. Here ``YoutubeDL`` instances are built once per
+extractor-args profile and reused; each profile keeps a small pool of idle
+instances so parallel resolves do not share one object. Extractor args use
+the CLI syntax (``IE_KEY:ARG=VAL1,VAL2;ARG2=VAL``) so both backends read the
+same settings.
+"""
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import yt_dlp
+except ImportError:  # the daemon then keeps using the yt-dlp binary
+    yt_dlp = None
+
+_lock = threading.Lock()
+_idle: Dict[Tuple[str, str], List[Any]] = {}
+_stats: Dict[str, int] = {"instances_created": 0, "resolves": 0, "failures": 0}
+
+
+def available() -> bool:
+    return yt_dlp is not None
+
+
+def parse_extractor_args(spec: Optional[str]) -> Dict[str, Dict[str, List[str]]]:
+    """Parse ``--extractor-args`` the way the yt-dlp CLI does."""
+    spec = (spec or "").strip()
+    if not spec or spec == "__none__":
+        return {}
+    ie_key, sep, args = spec.partition(":")
+    if not sep:
+        return {}
+    parsed: Dict[str, List[str]] = {}
+    for arg in args.split(";"):
+        key, _, vals = arg.partition("=")
+        key = key.strip().lower().replace("-", "_")
+        if not key:
+            continue
+        parsed[key] = [v.replace("\\,", ",").strip() for v in re.split(r"(?<!\\),", vals)]
+    return {ie_key.strip().lower(): parsed} if parsed else {}
+
+
+def parse_js_runtime(spec: Optional[str]) -> Dict[str, Dict[str, str]]:
+    """``name[:path]`` as accepted by ``--js-runtimes``."""
+    spec = (spec or "").strip()
+    if not spec:
+        return {}
+    name, _, path = spec.partition(":")
+    return {name.strip(): ({"path": path.strip()} if path.strip() else {})}
+
+
+def build_options(extractor_args: Optional[str], js_runtime: Optional[str]) -> Dict[str, Any]:
+    opts: Dict[str, Any] = {
+        "format": "bestaudio",
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "noplaylist": True,
+        "skip_download": True,
+    }
+    parsed = parse_extractor_args(extractor_args)
+    if parsed:
+        opts["extractor_args"] = parsed
+    runtimes = parse_js_runtime(js_runtime)
+    if runtimes:
+        opts["js_runtimes"] = runtimes
+    return opts
+
+
+def _acquire(key: Tuple[str, str], js_runtime: Optional[str]) -> Any:
+    with _lock:
+        idle = _idle.get(key)
+        if idle:
+            return idle.pop()
+        _stats["instances_created"] += 1
+    return yt_dlp.YoutubeDL(build_options(key[0], js_runtime))
+
+
+def _release(key: Tuple[str, str], ydl: Any):
+    with _lock:
+        _idle.setdefault(key, []).append(ydl)
+
+
+def stream_url_from_info(info: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not info:
+        return None
+    if info.get("url"):
+        return info["url"]
+    for fmt in info.get("requested_formats") or []:
+        if fmt.get("url"):
+            return fmt["url"]
+    return None
+
+
+def resolve(video_id: str, extractor_args: Optional[str], js_runtime: Optional[str] = None) -> Optional[str]:
+    """Return the bestaudio URL for ``video_id`` or None; raises RuntimeError if yt_dlp is missing."""
+    if yt_dlp is None:
+        raise RuntimeError("yt_dlp is not installed")
+    key = ((extractor_args or "").strip(), (js_runtime or "").strip())
+    ydl = _acquire(key, js_runtime)
+    try:
+        info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+        url = stream_url_from_info(ydl.sanitize_info(info) if info else None)
+    except yt_dlp.utils.DownloadError:
+        url = None
+    except Exception:
+        # Unknown state; do not hand this instance to the next caller.
+        with _lock:
+            _stats["resolves"] += 1
+            _stats["failures"] += 1
+        try:
+            ydl.close()
+        except Exception:
+            pass
+        raise
+    _release(key, ydl)
+    with _lock:
+        _stats["resolves"] += 1
+        if url is None:
+            _stats["failures"] += 1
+    return url
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        out["idle_instances"] = sum(len(v) for v in _idle.values())
+        out["profiles"] = len(_idle)
+    out["available"] = available()
+    return out
+
+
+def reset():
+    with _lock:
+        instances = [ydl for idle in _idle.values() for ydl in idle]
+        _idle.clear()
+        for key in _stats:
+            _stats[key] = 0
+    for ydl in instances:
+        try:
+            ydl.close()
+        except Exception:
+            pass
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Microbenchmarks for the curation hot path.
+
+Not collected by the unit test run. Usage:
+
+    python tests/bench_curation.py                      # compare with tests/bench_baseline.json
+    python tests/bench_curation.py --update-baseline    # record a new baseline
+    python tests/bench_curation.py --output bench_output.txt --threshold 0.5
+
+Results are JSON (seconds per run, best of --repeat). The exit status is 1
+when any benchmark is slower than baseline * (1 + threshold).
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+# Must exist before ytplayd is imported; removed when the benchmark exits.
+STATE = tempfile.TemporaryDirectory(prefix="ytplay-bench-")
+STATE_DIR = STATE.name
+os.environ["YTP_STATE_DIR"] = STATE_DIR
+os.environ["YTP_ENV_FILE"] = os.path.join(STATE_DIR, ".env")
+os.environ["YTP_VIBE_LLM"] = "0"
+
+import ytplayd  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "bench_baseline.json")
+DEFAULT_SIZES = (100, 1000, 10000)
+RESULTS_PER_QUERY = 12
+
+WORDS = [
+    "mellow", "tamil", "indie", "romance", "calm", "acoustic", "love", "night", "rain",
+    "dance", "party", "rock", "ballad", "dream", "city", "lights", "ocean", "heart",
+    "live", "remix", "official", "audio", "slow", "groove", "folk", "synth",
+]
+ARTISTS = [f"Artist {i}" for i in range(200)]
+
+
+def make_item(rng: random.Random, idx: int) -> dict:
+    title = " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 5)))
+    return {
+        "resultType": "song",
+        "videoId": f"vid{idx:06d}",
+        "title": title,
+        "artists": [{"name": rng.choice(ARTISTS), "id": f"UC{idx}"}],
+        "album": {"name": f"{rng.choice(WORDS).title()} Album", "id": f"MPRE{idx}"},
+        "duration": "3:45",
+        "thumbnails": [
+            {"url": f"https://lh3.googleusercontent.com/{idx}=w60-h60", "width": 60, "height": 60},
+            {"url": f"https://lh3.googleusercontent.com/{idx}=w120-h120", "width": 120, "height": 120},
+        ],
+    }
+
+
+def make_items(n: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    return [make_item(rng, i) for i in range(n)]
+
+
+class FakeYTMusic:
+    """Answers each query with the next RESULTS_PER_QUERY fixture items."""
+
+    def __init__(self, items: list):
+        self.items = items
+        self.offset = 0
+
+    def search(self, query, filter=None):
+        chunk = self.items[self.offset:self.offset + RESULTS_PER_QUERY]
+        self.offset += RESULTS_PER_QUERY
+        return chunk
+
+
+def seed_state(items: list):
+    con = ytplayd.db()
+    now = int(time.time())
+    for i, item in enumerate(items[:50]):
+        track = ytplayd.track_from_item(item)
+        con.execute(
+            "INSERT OR REPLACE INTO votes(videoId, title, artist, vote, updated_at) VALUES(?,?,?,?,?);",
+            ("liked" + track["videoId"], track["title"], track["artist"], 1, now - i),
+        )
+    con.commit()
+    con.close()
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def run(sizes, repeat: int) -> dict:
+    items_all = make_items(max(sizes))
+    seed_state(items_all)
+    profile_extras = {"mood": "calm", "lang": "ta", "vibe": "normal", "mix": "50/50"}
+    results = {}
+    for n in sizes:
+        items = items_all[:n]
+        texts = [f"{it['title']} - {it['artists'][0]['name']} ({it['album']['name']})" for it in items]
+        tracks = [ytplayd.track_from_item(it) for it in items]
+        likes = [{"title": t["title"], "artist": t["artist"], "videoId": t["videoId"]} for t in tracks]
+        profile = ytplayd.build_vibe_profile("mellow tamil indie romance", None, profile_extras, likes[:20], [])
+        queries = [f"query {i}" for i in range(math.ceil(n / RESULTS_PER_QUERY))]
+
+        def bench_pick():
+            ytplayd.session_seen_ids.clear()
+            ytplayd.pick_tracks(FakeYTMusic(items), "mellow tamil indie romance", queries, 10, dict(profile_extras))
+
+        cases = {
+            "normalize_text": lambda: [ytplayd.normalize_text(t) for t in texts],
+            "track_from_item": lambda: [ytplayd.track_from_item(it) for it in items],
+            "vibe_score": lambda: [ytplayd.vibe_score(t, profile, "normal", 0.7) for t in tracks],
+            "build_vibe_profile": lambda: ytplayd.build_vibe_profile(
+                "mellow tamil indie romance", tracks[0], profile_extras, likes, ["live"]
+            ),
+            "pick_tracks": bench_pick,
+            "build_bucket_order": lambda: ytplayd.build_bucket_order(n, 0.5),
+        }
+        for name, fn in cases.items():
+            results[f"{name}@{n}"] = round(best_of(fn, repeat), 6)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta: float) -> list:
+    regressions = []
+    for key, seconds in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        # Sub-millisecond timings are mostly scheduler noise; require an absolute slowdown too.
+        if seconds > base * (1.0 + threshold) and seconds - base >= min_delta:
+            regressions.append({"bench": key, "seconds": seconds, "baseline": base, "ratio": round(seconds / base, 3)})
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed slowdown, 0.5 = +50%%")
+    parser.add_argument("--min-delta", type=float, default=0.001, help="ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    logging.getLogger("ytplayd").setLevel(logging.WARNING)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = run(sizes, max(1, args.repeat))
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "threshold": args.threshold,
+        "min_delta": args.min_delta,
+        "results": results,
+        "regressions": [],
+    }
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": report["python"], "machine": report["machine"], "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        report["regressions"] = compare(results, baseline, args.threshold, args.min_delta)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    try:
+        code = main()
+    finally:
+        STATE.cleanup()
+    sys.exit(code)
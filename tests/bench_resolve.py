@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Per-track stream URL resolve latency: yt-dlp subprocess vs in-process API vs worker pool.
+
+Not collected by the unit test run; needs network access, the yt-dlp binary
+and the yt_dlp module. Usage:
+
+    python tests/bench_resolve.py dQw4w9WgXcQ 9bZkp7q19f0 kJQP7kiw5Fk
+    python tests/bench_resolve.py --backends inprocess --workers 4 --output bench_resolve.json VIDEO_ID...
+    python tests/bench_resolve.py --backends subprocess,workers --workers 2 VIDEO_ID...
+
+Each backend resolves every videoId once (stream-URL cache disabled). The
+first in-process or worker resolve includes YoutubeDL construction (and,
+for workers, process startup), so "first_sec" is reported separately from
+the steady-state p50/p90/max.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+# Must exist before ytplayd is imported; removed when the benchmark exits.
+STATE = tempfile.TemporaryDirectory(prefix="ytplay-bench-")
+STATE_DIR = STATE.name
+os.environ["YTP_STATE_DIR"] = STATE_DIR
+os.environ["YTP_ENV_FILE"] = os.path.join(STATE_DIR, ".env")
+os.environ["YTP_STREAM_CACHE"] = "0"
+
+import ytplayd  # noqa: E402
+from ytplayd_app.services import resolver_pool_service, ytdlp_service  # noqa: E402
+from ytplayd_app.services.telemetry_service import percentile  # noqa: E402
+
+BACKENDS = {
+    "subprocess": ytplayd.resolve_stream_url_subprocess,
+    "inprocess": lambda vid, args: ytdlp_service.resolve(vid, args, ytplayd.YTDLP_JS_RUNTIME),
+    "workers": lambda vid, args: resolver_pool_service.get_pool(
+        ytplayd.RESOLVER_WORKERS, ytplayd.RESOLVER_MAX_JOBS, ytplayd.RESOLVER_TIMEOUT_SEC
+    ).resolve(vid, args, ytplayd.YTDLP_JS_RUNTIME),
+}
+
+
+def bench_backend(name: str, video_ids, extractor_args, workers: int) -> dict:
+    resolve = BACKENDS[name]
+    timings = []
+    failures = 0
+
+    def one(video_id: str):
+        started = time.perf_counter()
+        try:
+            url = resolve(video_id, extractor_args)
+        except Exception:
+            url = None
+        return time.perf_counter() - started, bool(url)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for elapsed, ok in pool.map(one, video_ids):
+            timings.append(elapsed)
+            failures += 0 if ok else 1
+    wall = time.perf_counter() - started
+    steady = [int(t * 1000) for t in timings[1:]] or [int(timings[0] * 1000)]
+    return {
+        "tracks": len(timings),
+        "failures": failures,
+        "wall_sec": round(wall, 3),
+        "first_sec": round(timings[0], 3),
+        "mean_sec": round(sum(timings) / len(timings), 3),
+        "p50_ms": percentile(steady, 50),
+        "p90_ms": percentile(steady, 90),
+        "max_ms": max(steady),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("video_ids", nargs="+")
+    parser.add_argument("--backends", default="subprocess,inprocess")
+    parser.add_argument("--extractor-args", default=ytplayd.YTDLP_EXTRACTOR_ARGS)
+    parser.add_argument("--workers", type=int, default=1, help="parallel resolves (1 = sequential per-track latency)")
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    logging.getLogger("ytplayd").setLevel(logging.WARNING)
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "extractor_args": args.extractor_args,
+        "workers": args.workers,
+        "results": {},
+    }
+    for name in backends:
+        if name not in BACKENDS:
+            parser.error(f"unknown backend: {name}")
+        if name in ("inprocess", "workers") and not ytdlp_service.available():
+            report["results"][name] = {"error": "yt_dlp module not installed"}
+            continue
+        report["results"][name] = bench_backend(name, args.video_ids, args.extractor_args, args.workers)
+
+    resolver_pool_service.shutdown()
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        code = main()
+    finally:
+        STATE.cleanup()
+    sys.exit(code)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Concurrent load test for LLM curation against the mock Responses server.
+
+Not collected by the unit test run. Usage:
+
+    python tests/load_curation.py --requests 200 --concurrency 16 --latency lognormal:600:0.5
+    python tests/load_curation.py --error-rate 0.05 --timeout-rate 0.02 --mix play=2,auto_queue=2,vibe_score=1
+    python tests/load_curation.py --base-url http://127.0.0.1:18080/v1          # external mock server
+    python tests/load_curation.py --daemon http://127.0.0.1:17845 --requests 40  # running ytplayd
+
+In-process mode drives llm_curate / llm_curate_stream / llm_curate_batch /
+vibe_score_llm directly, so it needs no mpv or YouTube access. Daemon mode
+sends /play and /next to a ytplayd started with YTP_OPENAI_BASE_URL pointing
+at the mock server. The report (JSON) has throughput and p50/p90/p99 latency
+per operation.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+TESTS = os.path.dirname(os.path.abspath(__file__))
+for path in (SRC, TESTS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from mock_openai_server import MockOpenAIServer, MockState  # noqa: E402
+from ytplayd_app.services.telemetry_service import percentile  # noqa: E402
+
+PROMPTS = [
+    "mellow tamil indie romance",
+    "late night lofi for coding",
+    "90s bollywood rain songs",
+    "calm acoustic sunday morning",
+    "upbeat synthwave drive",
+    "melancholic piano ballads",
+]
+
+
+def parse_mix(spec: str) -> List[str]:
+    ops: List[str] = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name:
+            ops.extend([name] * max(0, int(weight or 1)))
+    if not ops:
+        raise ValueError(f"invalid mix: {spec}")
+    return ops
+
+
+def summarize(samples: List[Tuple[str, float, bool]], wall: float) -> Dict[str, Any]:
+    by_op: Dict[str, Dict[str, Any]] = {}
+    for op, seconds, ok in samples:
+        entry = by_op.setdefault(op, {"count": 0, "failed": 0, "latencies": []})
+        entry["count"] += 1
+        entry["failed"] += 0 if ok else 1
+        entry["latencies"].append(int(seconds * 1000))
+    ops = {}
+    for op, entry in sorted(by_op.items()):
+        values = entry.pop("latencies")
+        ops[op] = {
+            **entry,
+            "p50_ms": percentile(values, 50),
+            "p90_ms": percentile(values, 90),
+            "p99_ms": percentile(values, 99),
+            "max_ms": max(values) if values else None,
+        }
+    return {
+        "requests": len(samples),
+        "wall_sec": round(wall, 3),
+        "throughput_rps": round(len(samples) / wall, 2) if wall > 0 else None,
+        "ops": ops,
+    }
+
+
+def run_load(call: Callable[[str, int], bool], ops: List[str], requests: int, concurrency: int, seed: int):
+    rng = random.Random(seed)
+    plan = [(rng.choice(ops), i) for i in range(requests)]
+    samples: List[Tuple[str, float, bool]] = []
+    lock = threading.Lock()
+
+    def one(item: Tuple[str, int]):
+        op, idx = item
+        started = time.perf_counter()
+        try:
+            ok = call(op, idx)
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            samples.append((op, elapsed, ok))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="load") as pool:
+        list(pool.map(one, plan))
+    return samples, time.perf_counter() - started
+
+
+def in_process_caller(stream: bool) -> Callable[[str, int], bool]:
+    import ytplayd
+
+    def call(op: str, idx: int) -> bool:
+        prompt = PROMPTS[idx % len(PROMPTS)]
+        if op == "play":
+            extras = {"max_queries": 10}
+            if stream:
+                curated = ytplayd.llm_curate_stream(prompt, extras, lambda q: None)
+            else:
+                curated = ytplayd.llm_curate(prompt, extras)
+            return curated.get("source") != "fallback"
+        if op == "auto_queue":
+            extras = {"seed": f"Track {idx} - Artist {idx % 7}", "max_queries": 4}
+            if ytplayd.BATCH_CURATE_ENABLED:
+                plan = ytplayd.llm_curate_batch(prompt, extras, 3)
+                return plan.get("source") != "fallback"
+            curated = ytplayd.llm_curate(prompt, extras, phase="auto_queue")
+            return curated.get("source") != "fallback"
+        if op == "vibe_score":
+            track = {"title": f"Track {idx}", "artist": f"Artist {idx % 7}", "album": "Album"}
+            return ytplayd.vibe_score_llm(track, {"languages": ["ta"], "energy": "low"}) is not None
+        raise ValueError(f"unknown op: {op}")
+
+    return call
+
+
+def daemon_caller(base: str, timeout: float) -> Callable[[str, int], bool]:
+    def get(path: str, params: Dict[str, Any]) -> bool:
+        url = f"{base.rstrip('/')}{path}?{urllib.parse.urlencode(params)}"
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            payload = json.loads(resp.read().decode("utf-8") or "{}")
+        return bool(payload.get("ok", True))
+
+    def call(op: str, idx: int) -> bool:
+        if op == "play":
+            # A unique suffix keeps the prompt cache from answering.
+            return get("/play", {"q": f"{PROMPTS[idx % len(PROMPTS)]} {idx}", "n": 5, "ttl": 0})
+        if op == "auto_queue":
+            return get("/next", {})
+        raise ValueError(f"daemon mode supports play and auto_queue, not {op}")
+
+    return call
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default="play=1,auto_queue=1,vibe_score=1")
+    parser.add_argument("--stream", action="store_true", help="use streaming curation for play")
+    parser.add_argument("--batch", action="store_true", help="use batch curation for auto_queue")
+    parser.add_argument("--latency", default="lognormal:600:0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--hang-sec", type=float, default=60.0)
+    parser.add_argument("--base-url", help="use an already running mock server instead of starting one")
+    parser.add_argument("--daemon", help="drive a running ytplayd at this URL instead of calling in-process")
+    parser.add_argument("--daemon-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    ops = parse_mix(args.mix)
+    server = None
+    report: Dict[str, Any] = {"mode": "daemon" if args.daemon else "in_process", "mix": args.mix}
+
+    state_tmp = None
+    try:
+        if args.daemon:
+            samples, wall = run_load(
+                daemon_caller(args.daemon, args.daemon_timeout), ops, args.requests, args.concurrency, args.seed
+            )
+        else:
+            base_url = args.base_url
+            if not base_url:
+                state = MockState(args.latency, args.error_rate, args.timeout_rate, args.hang_sec, seed=args.seed)
+                server = MockOpenAIServer(state=state)
+                server.start()
+                base_url = server.base_url
+            state_tmp = tempfile.TemporaryDirectory(prefix="ytplay-load-")
+            state_dir = state_tmp.name
+            os.environ["YTP_STATE_DIR"] = state_dir
+            os.environ["YTP_ENV_FILE"] = os.path.join(state_dir, ".env")
+            os.environ["YTP_OPENAI_BASE_URL"] = base_url
+            os.environ["YTP_VIBE_LLM"] = "1"
+            os.environ["YTP_BATCH_CURATE"] = "1" if args.batch else "0"
+            logging.getLogger("ytplayd").setLevel(logging.WARNING)
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+            import ytplayd
+            from ytplayd_app.services import llm_client_service, telemetry_service
+
+            ytplayd.db().close()
+            samples, wall = run_load(in_process_caller(args.stream), ops, args.requests, args.concurrency, args.seed)
+            report["base_url"] = base_url
+            report["timeouts"] = dict(ytplayd.LLM_TIMEOUTS)
+            report["pool"] = llm_client_service.stats()
+            report["telemetry"] = {
+                phase: {k: v for k, v in data.items() if k in ("calls", "fallbacks", "fallback_reasons", "latency_ms")}
+                for phase, data in telemetry_service.snapshot()["phases"].items()
+            }
+            if server is not None:
+                report["mock"] = server.state.snapshot()
+    finally:
+        if state_tmp is not None:
+            state_tmp.cleanup()
+
+    report.update(summarize(samples, wall))
+    report["concurrency"] = args.concurrency
+    if server is not None:
+        server.stop()
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenAI Responses API.
+
+Not collected by the unit test run. Point the daemon at it with
+YTP_OPENAI_BASE_URL=http://127.0.0.1:PORT/v1 and it answers curation,
+batch curation and vibe-score requests with schema-conformant JSON.
+
+    python tests/mock_openai_server.py --port 18080 --latency lognormal:600:0.5
+    python tests/mock_openai_server.py --latency uniform:200:900 --error-rate 0.05 --timeout-rate 0.02
+
+Latency specs: fixed:MS, uniform:LO:HI, normal:MEAN:SD, lognormal:MEDIAN:SIGMA.
+GET /stats returns counters for served requests, injected errors and hangs.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+WORDS = [
+    "mellow", "indie", "acoustic", "night", "rain", "city", "lights", "ocean", "heart",
+    "slow", "groove", "folk", "synth", "dream", "soul", "piano", "sunset", "road",
+]
+ERROR_STATUSES = (429, 500, 503)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Return a sampler of latencies in seconds for a spec like ``lognormal:600:0.5``."""
+    kind, _, rest = (spec or "fixed:0").partition(":")
+    args = [float(a) for a in rest.split(":") if a.strip()]
+    if kind == "fixed" and len(args) == 1:
+        return lambda rng: args[0] / 1000.0
+    if kind == "uniform" and len(args) == 2:
+        return lambda rng: rng.uniform(args[0], args[1]) / 1000.0
+    if kind == "normal" and len(args) == 2:
+        return lambda rng: max(0.0, rng.gauss(args[0], args[1])) / 1000.0
+    if kind == "lognormal" and len(args) == 2:
+        mu = math.log(max(args[0], 1e-3))
+        return lambda rng: rng.lognormvariate(mu, args[1]) / 1000.0
+    raise ValueError(f"invalid latency spec: {spec}")
+
+
+def request_kind(body: Dict[str, Any]) -> str:
+    fmt = ((body.get("text") or {}).get("format") or {}).get("name")
+    if fmt in ("curation", "curation_batch", "vibe_score"):
+        return fmt
+    # The SDK path without text_format sends no schema; fall back to the prompt.
+    text = json.dumps(body.get("input") or "")
+    if "vibe_score" in text:
+        return "vibe_score"
+    if "queue slots" in text:
+        return "curation_batch"
+    return "curation"
+
+
+def user_payload(body: Dict[str, Any]) -> Dict[str, Any]:
+    for item in body.get("input") or []:
+        if isinstance(item, dict) and item.get("role") == "user":
+            try:
+                payload = json.loads(item.get("content") or "{}")
+            except (TypeError, ValueError):
+                return {}
+            return payload if isinstance(payload, dict) else {}
+    return {}
+
+
+def instruction_count(text: str, pattern: str, default: int) -> int:
+    match = re.search(pattern, text or "")
+    return int(match.group(1)) if match else default
+
+
+def make_queries(rng: random.Random, prompt: str, count: int) -> List[str]:
+    base = (prompt or "music").strip()
+    return [f"{base} {rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(max(1, count))]
+
+
+def build_payload(kind: str, body: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    user = user_payload(body)
+    prompt = str(user.get("prompt") or "")
+    instruction = str(user.get("instruction") or "")
+    if kind == "vibe_score":
+        return {"vibe_score": round(rng.random(), 3)}
+    if kind == "curation_batch":
+        slots = instruction_count(instruction, r"next (\d+) queue slots", 3)
+        per_slot = instruction_count(instruction, r"up to (\d+) search queries", 3)
+        query_set = lambda: {"search_queries": make_queries(rng, prompt, per_slot), "avoid_terms": []}  # noqa: E731
+        return {
+            "slots": [query_set() for _ in range(slots)],
+            "on_like": query_set(),
+            "on_skip": {"search_queries": make_queries(rng, prompt, per_slot), "avoid_terms": ["live"]},
+            "notes": "mock",
+        }
+    count = instruction_count(instruction, r"Provide (\d+) search queries", 10)
+    return {"search_queries": make_queries(rng, prompt, count), "avoid_terms": ["remix"], "notes": "mock"}
+
+
+def response_object(model: str, text: str, input_chars: int) -> Dict[str, Any]:
+    now = int(time.time())
+    input_tokens = max(1, input_chars // 4)
+    output_tokens = max(1, len(text) // 4)
+    return {
+        "id": f"resp_mock_{now}_{random.randint(0, 1 << 30)}",
+        "object": "response",
+        "created_at": now,
+        "model": model,
+        "status": "completed",
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [
+            {
+                "type": "message",
+                "id": "msg_mock",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+class MockState:
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_sec: float = 60.0,
+        stream_chunk: int = 12,
+        seed: Optional[int] = None,
+    ):
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = max(0.0, min(1.0, error_rate))
+        self.timeout_rate = max(0.0, min(1.0, timeout_rate))
+        self.hang_sec = max(0.0, hang_sec)
+        self.stream_chunk = max(1, stream_chunk)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats: Dict[str, Any] = {"requests": 0, "errors": 0, "hangs": 0, "streams": 0, "kinds": {}}
+
+    def plan(self, kind: str) -> Tuple[str, float, int]:
+        """Pick the outcome for one request: ("ok"|"error"|"hang", delay_sec, payload_seed)."""
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["kinds"][kind] = self.stats["kinds"].get(kind, 0) + 1
+            roll = self.rng.random()
+            delay = self.sample_latency(self.rng)
+            payload_seed = self.rng.randint(0, 1 << 30)
+            if roll < self.timeout_rate:
+                self.stats["hangs"] += 1
+                return "hang", self.hang_sec, payload_seed
+            if roll < self.timeout_rate + self.error_rate:
+                self.stats["errors"] += 1
+                return "error", delay, payload_seed
+            return "ok", delay, payload_seed
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockOpenAIServer"
+
+    def log_message(self, fmt, *args):
+        return
+
+    def _send_json(self, code: int, payload: Dict[str, Any]):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            return self._send_json(200, self.server.state.snapshot())
+        return self._send_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        if not self.path.rstrip("/").endswith("/responses"):
+            return self._send_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+        try:
+            body = json.loads(raw.decode("utf-8"))
+        except ValueError:
+            return self._send_json(400, {"error": {"message": "invalid json", "type": "invalid_request_error"}})
+
+        state = self.server.state
+        kind = request_kind(body)
+        outcome, delay, payload_seed = state.plan(kind)
+        time.sleep(delay)
+        if outcome == "hang":
+            self.close_connection = True
+            return
+        if outcome == "error":
+            status = ERROR_STATUSES[payload_seed % len(ERROR_STATUSES)]
+            return self._send_json(status, {"error": {"message": "mock injected error", "type": "server_error"}})
+
+        text = json.dumps(build_payload(kind, body, random.Random(payload_seed)))
+        resp = response_object(str(body.get("model") or "mock"), text, len(raw))
+        if body.get("stream"):
+            with state.lock:
+                state.stats["streams"] += 1
+            return self._stream(resp, text)
+        return self._send_json(200, resp)
+
+    def _stream(self, resp: Dict[str, Any], text: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.close_connection = True
+        self.end_headers()
+        seq = 0
+
+        def send(event: Dict[str, Any]):
+            nonlocal seq
+            event["sequence_number"] = seq
+            seq += 1
+            self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        in_progress = {**resp, "status": "in_progress", "output": []}
+        send({"type": "response.created", "response": in_progress})
+        chunk = self.server.state.stream_chunk
+        for i in range(0, len(text), chunk):
+            send({
+                "type": "response.output_text.delta",
+                "item_id": "msg_mock",
+                "output_index": 0,
+                "content_index": 0,
+                "delta": text[i:i + chunk],
+                "logprobs": [],
+            })
+        send({"type": "response.completed", "response": resp})
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, state: Optional[MockState] = None):
+        self.state = state or MockState()
+        super().__init__((host, port), Handler)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="mock-openai", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", default="lognormal:600:0.5", help="latency spec in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 429/500/503")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests that hang")
+    parser.add_argument("--hang-sec", type=float, default=60.0, help="how long a hanging request stalls")
+    parser.add_argument("--stream-chunk", type=int, default=12, help="characters per streamed delta")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    state = MockState(args.latency, args.error_rate, args.timeout_rate, args.hang_sec, args.stream_chunk, args.seed)
+    server = MockOpenAIServer(args.host, args.port, state)
+    print(f"mock OpenAI listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import audio_cache_service  # noqa: E402
+
+
+class AudioCacheServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="ytplay-audio-")
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.db_path = os.path.join(self.tmp, "cache.sqlite3")
+        con = self.db()
+        con.execute(audio_cache_service.CREATE_TABLE_SQL)
+        con.commit()
+        con.close()
+        audio_cache_service.reset()
+        audio_cache_service.configure(250)
+        self.addCleanup(audio_cache_service.reset)
+        self.addCleanup(audio_cache_service.configure, 1024 * 1024 * 1024)
+
+    def db(self):
+        return sqlite3.connect(self.db_path)
+
+    def write(self, video_id, size, ext="webm"):
+        path = os.path.join(self.tmp, f"{video_id}.{ext}")
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return path
+
+    def test_find_file_ignores_partial_downloads(self):
+        self.write("abc", 10, "webm.part")
+        self.assertIsNone(audio_cache_service.find_file(self.tmp, "abc"))
+        path = self.write("abc", 10, "m4a")
+        self.assertEqual(audio_cache_service.find_file(self.tmp, "abc"), path)
+
+    def test_lookup_hits_and_drops_rows_for_missing_files(self):
+        path = self.write("a", 100)
+        audio_cache_service.store(self.db, "a", path)
+        self.assertEqual(audio_cache_service.lookup(self.db, "a"), path)
+        self.assertIsNone(audio_cache_service.lookup(self.db, "b"))
+        os.remove(path)
+        self.assertIsNone(audio_cache_service.lookup(self.db, "a"))
+        stats = audio_cache_service.stats(self.db)
+        self.assertEqual((stats["hits"], stats["misses"], stats["missing_files"], stats["entries"]), (1, 2, 1, 0))
+
+    def test_budget_evicts_least_recently_used_first(self):
+        a, b = self.write("a", 100), self.write("b", 100)
+        audio_cache_service.store(self.db, "a", a)
+        audio_cache_service.store(self.db, "b", b)
+        con = self.db()
+        con.execute("UPDATE audio_cache SET last_used_at=1 WHERE videoId='b';")
+        con.commit()
+        con.close()
+
+        c = self.write("c", 100)
+        self.assertEqual(audio_cache_service.store(self.db, "c", c), 1)
+        self.assertFalse(os.path.exists(b))
+        self.assertTrue(os.path.exists(a) and os.path.exists(c))
+        self.assertEqual(audio_cache_service.stats(self.db)["bytes"], 200)
+
+    def test_begin_dedupes_inflight_downloads(self):
+        self.assertTrue(audio_cache_service.begin("a"))
+        self.assertFalse(audio_cache_service.begin("a"))
+        audio_cache_service.end("a")
+        self.assertTrue(audio_cache_service.begin("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
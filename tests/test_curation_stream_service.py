@@ -0,0 +1,48 @@
+import json
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import curation_stream_service  # noqa: E402
+
+
+def chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class QueryStreamParserTests(unittest.TestCase):
+    def test_emits_each_query_once_complete(self):
+        text = json.dumps({
+            "search_queries": ["calm \"piano\" night", "lofi \\\\ beats", "ambient rain"],
+            "avoid_terms": ["remix"],
+            "notes": "search_queries mentioned again",
+        })
+        for size in (1, 3, 7, len(text)):
+            parser = curation_stream_service.QueryStreamParser()
+            seen = []
+            for chunk in chunks(text, size):
+                seen.extend(parser.feed(chunk))
+            self.assertEqual(seen, ["calm \"piano\" night", "lofi \\\\ beats", "ambient rain"], size)
+            self.assertTrue(parser.done)
+            self.assertEqual(json.loads(parser.text)["avoid_terms"], ["remix"])
+
+    def test_query_is_held_until_closing_quote(self):
+        parser = curation_stream_service.QueryStreamParser()
+        self.assertEqual(parser.feed('{"search_queries": ["tamil ind'), [])
+        self.assertEqual(parser.feed('ie", "'), ["tamil indie"])
+        self.assertEqual(parser.feed('x'), [])
+        self.assertEqual(parser.queries, ["tamil indie"])
+        self.assertFalse(parser.done)
+
+    def test_blank_queries_are_skipped(self):
+        parser = curation_stream_service.QueryStreamParser()
+        self.assertEqual(parser.feed('{"search_queries":["  ", "one"]}'), ["one"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import extractor_profile_service  # noqa: E402
+
+PRIMARY = "youtube:player_client=android"
+FALLBACK = ""
+
+
+class ExtractorProfileServiceTests(unittest.TestCase):
+    def setUp(self):
+        extractor_profile_service.reset()
+        self.addCleanup(extractor_profile_service.reset)
+
+    def record(self, profile, ok, times):
+        for _ in range(times):
+            extractor_profile_service.record(profile, ok, 100)
+
+    def test_configured_order_kept_until_every_profile_has_samples(self):
+        self.record(PRIMARY, False, 10)
+        self.record(FALLBACK, True, extractor_profile_service.MIN_SAMPLES - 1)
+        self.assertEqual(extractor_profile_service.order([PRIMARY, FALLBACK]), [PRIMARY, FALLBACK])
+        self.record(FALLBACK, True, 1)
+        self.assertEqual(extractor_profile_service.order([PRIMARY, FALLBACK]), [FALLBACK, PRIMARY])
+
+    def test_rolling_window_lets_a_profile_recover(self):
+        self.record(PRIMARY, False, 10)
+        self.record(FALLBACK, True, 10)
+        self.record(PRIMARY, True, extractor_profile_service.WINDOW)
+        self.assertEqual(extractor_profile_service.order([PRIMARY, FALLBACK]), [PRIMARY, FALLBACK])
+
+    def test_demoted_profile_is_retried_once_its_samples_age_out(self):
+        start = 1_700_000_000
+        for _ in range(10):
+            extractor_profile_service.record(PRIMARY, False, 100, now=start)
+        later = start + extractor_profile_service.MAX_SAMPLE_AGE_SEC - 60
+        for _ in range(10):
+            extractor_profile_service.record(FALLBACK, True, 100, now=later)
+        self.assertEqual(extractor_profile_service.order([PRIMARY, FALLBACK], now=later), [FALLBACK, PRIMARY])
+        # The fallback keeps winning, so the primary gets no new samples; its old ones expire.
+        expired = start + extractor_profile_service.MAX_SAMPLE_AGE_SEC + 1
+        self.assertEqual(extractor_profile_service.order([PRIMARY, FALLBACK], now=expired), [PRIMARY, FALLBACK])
+        self.assertIsNone(extractor_profile_service.success_rate(PRIMARY, now=expired))
+
+    def test_stats_report_rates_and_latency(self):
+        extractor_profile_service.record(PRIMARY, True, 200)
+        extractor_profile_service.record(PRIMARY, False, 400)
+        stats = extractor_profile_service.stats()
+        self.assertEqual(stats[PRIMARY], {"ok": 1, "failed": 1, "success_rate": 0.5, "avg_latency_ms": 300})
+        self.assertIsNone(extractor_profile_service.success_rate(FALLBACK))
+
+
+if __name__ == "__main__":
+    unittest.main()
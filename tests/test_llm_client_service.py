@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import llm_client_service  # noqa: E402
+
+
+class FakeClient:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class LlmClientServiceTests(unittest.TestCase):
+    def setUp(self):
+        llm_client_service.reset_client()
+        self.addCleanup(llm_client_service.reset_client)
+
+    def test_client_is_shared(self):
+        first = llm_client_service.get_client(FakeClient, base_url="http://127.0.0.1:9999/v1")
+        second = llm_client_service.get_client(FakeClient, base_url="http://127.0.0.1:9999/v1")
+        self.assertIs(first, second)
+        self.assertEqual(first.kwargs["base_url"], "http://127.0.0.1:9999/v1")
+        self.assertEqual(first.kwargs["max_retries"], 1)
+
+    def test_config_change_rebuilds_and_closes_old_client(self):
+        first = llm_client_service.get_client(FakeClient, max_retries=1)
+        second = llm_client_service.get_client(FakeClient, max_retries=2)
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+
+    def test_stats_shape(self):
+        llm_client_service.get_client(FakeClient, base_url="http://local/v1")
+        stats = llm_client_service.stats()
+        for key in ("requests", "connections_opened", "reused", "reuse_ratio", "instrumented"):
+            self.assertIn(key, stats)
+        self.assertEqual(stats["base_url"], "http://local/v1")
+        self.assertGreaterEqual(stats["reused"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
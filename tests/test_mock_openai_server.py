@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+TESTS = os.path.dirname(os.path.abspath(__file__))
+for path in (SRC, TESTS):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import ytplayd  # noqa: E402
+from mock_openai_server import MockOpenAIServer, MockState, parse_latency  # noqa: E402
+
+
+class MockOpenAIServerTests(unittest.TestCase):
+    def start(self, **kwargs):
+        server = MockOpenAIServer(state=MockState(seed=3, **kwargs))
+        server.start()
+        self.addCleanup(server.stop)
+        client = ytplayd.OpenAI(base_url=server.base_url, api_key="local", max_retries=0)
+        self.addCleanup(client.close)
+        for patcher in (
+            mock.patch.object(ytplayd, "openai_client", return_value=client),
+            mock.patch.object(ytplayd, "record_llm_call"),
+            mock.patch.object(ytplayd, "offline_curation", return_value=None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return server
+
+    def test_latency_specs(self):
+        rng = random.Random(1)
+        self.assertEqual(parse_latency("fixed:250")(rng), 0.25)
+        self.assertTrue(0.1 <= parse_latency("uniform:100:200")(rng) <= 0.2)
+        self.assertGreater(parse_latency("lognormal:300:0.4")(rng), 0)
+        with self.assertRaises(ValueError):
+            parse_latency("gamma:1")
+
+    def test_curation_payloads_are_schema_conformant(self):
+        server = self.start()
+        curated = ytplayd.llm_curate("calm piano", {"max_queries": 4})
+        self.assertEqual(curated["source"], "llm")
+        self.assertEqual(len(curated["search_queries"]), 4)
+        plan = ytplayd.llm_curate_batch("calm piano", {"seed": "Song - Artist", "max_queries": 3}, 2)
+        self.assertEqual(plan["source"], "llm")
+        self.assertEqual(len(plan["slots"]), 2)
+        self.assertTrue(plan["on_skip"]["search_queries"])
+        with mock.patch.object(ytplayd, "VIBE_LLM_ENABLED", True):
+            score = ytplayd.vibe_score_llm({"title": "Song", "artist": "Artist"}, {})
+        self.assertIsNotNone(score)
+        self.assertEqual(server.state.snapshot()["kinds"], {"curation": 1, "curation_batch": 1, "vibe_score": 1})
+
+    def test_streamed_queries_arrive_incrementally(self):
+        server = self.start(stream_chunk=5)
+        seen = []
+        curated = ytplayd.llm_curate_stream("late night lofi", {"max_queries": 3}, seen.append)
+        self.assertEqual(curated["source"], "llm")
+        self.assertEqual(seen, curated["search_queries"])
+        self.assertEqual(server.state.snapshot()["streams"], 1)
+
+    def test_injected_errors_trigger_fallback(self):
+        server = self.start(error_rate=1.0)
+        curated = ytplayd.llm_curate("calm piano", {"max_queries": 3})
+        self.assertEqual(curated["source"], "fallback")
+        self.assertEqual(server.state.snapshot()["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
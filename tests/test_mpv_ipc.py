@@ -0,0 +1,184 @@
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+import ytplayd  # noqa: E402
+
+
+class FakeMPVServer:
+    """Speaks enough of mpv's JSON IPC: replies to every command and can push events."""
+
+    def __init__(self, path):
+        self.path = path
+        self.accepts = 0
+        self.commands = []
+        self.properties = {"playlist-pos": 2, "pause": False}
+        self.observers = {}
+        self.clients = []
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen(4)
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.accepts += 1
+            self.clients.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        buf = b""
+        while True:
+            try:
+                chunk = conn.recv(4096)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buf += chunk
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                try:
+                    self._reply(conn, json.loads(line))
+                except OSError:
+                    return
+
+    def _reply(self, conn, msg):
+        self.commands.append(msg["command"])
+        reply = {"request_id": msg.get("request_id"), "error": "success"}
+        if msg["command"][0] == "get_property":
+            reply["data"] = self.properties.get(msg["command"][1])
+        conn.sendall((json.dumps(reply) + "\n").encode())
+        if msg["command"][0] == "observe_property":
+            _, observe_id, name = msg["command"]
+            self.observers[name] = observe_id
+            self.send(conn, name)
+
+    def send(self, conn, name):
+        event = {"event": "property-change", "id": self.observers[name], "name": name}
+        if self.properties.get(name) is not None:
+            event["data"] = self.properties[name]
+        conn.sendall((json.dumps(event) + "\n").encode())
+
+    def set_property(self, name, value):
+        self.properties[name] = value
+        for conn in self.clients:
+            self.send(conn, name)
+
+    def push(self, event):
+        for conn in self.clients:
+            conn.sendall((json.dumps(event) + "\n").encode())
+
+    def close(self):
+        # shutdown() wakes the blocked accept(); close() alone leaves the listener alive.
+        try:
+            self.server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.server.close()
+        for conn in self.clients:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
+        self.clients = []
+        os.remove(self.path)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class MPVIpcTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory(prefix="ytp-")
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "mpv.sock")
+        patcher = mock.patch.object(ytplayd, "MPV_SOCKET", self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = FakeMPVServer(self.path)
+        self.mpv = ytplayd.MPVController()
+        self.addCleanup(setattr, self.mpv, "_keep_connected", False)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            self.server.close()
+
+    def test_commands_share_one_connection_and_do_not_wait(self):
+        started = time.time()
+        self.mpv.load_and_play([f"url{i}" for i in range(10)])
+        self.assertEqual(self.mpv.get_property("playlist-pos"), 2)
+        self.assertEqual(self.mpv.get_property("pause"), False)
+        self.assertLess(time.time() - started, 0.5)
+        self.assertEqual(self.server.accepts, 1)
+        commands = [c for c in self.server.commands if c[0] != "observe_property"]
+        self.assertEqual(commands[0], ["loadfile", "url0", "replace"])
+        self.assertEqual(len(commands), 12)
+
+    def test_events_reach_listeners(self):
+        events = []
+        self.mpv.add_listener(events.append)
+        self.mpv.get_property("pause")
+        self.server.push({"event": "start-file", "playlist_entry_id": 3})
+        self.assertTrue(wait_for(lambda: any(e["event"] == "start-file" for e in events)))
+
+    def test_observed_properties_are_served_from_memory(self):
+        self.mpv.get_property("pause")
+        self.assertTrue(wait_for(lambda: self.mpv.observed("playlist-pos") == 2))
+        self.server.set_property("time-pos", 12.5)
+        self.assertTrue(wait_for(lambda: self.mpv.observed("time-pos") == 12.5))
+        self.assertIsNone(self.mpv.observed("duration"))
+        requests = self.mpv.stats()["requests"]
+        for _ in range(50):
+            self.mpv.observed("playlist-pos")
+        self.assertEqual(self.mpv.stats()["requests"], requests)
+        self.mpv.remove_index(0)
+        # mpv's own property-change is the only writer of the mirror.
+        self.assertEqual(self.mpv.observed("playlist-pos"), 2)
+        self.server.set_property("playlist-pos", 1)
+        self.assertTrue(wait_for(lambda: self.mpv.observed("playlist-pos") == 1))
+
+    def test_reconnects_after_mpv_restart(self):
+        connects = []
+        self.mpv.on_connect(lambda: connects.append(1))
+        self.mpv._keep_connected = True
+        self.assertEqual(self.mpv.get_property("playlist-pos"), 2)
+        self.server.close()
+        self.assertTrue(wait_for(lambda: not self.mpv.stats()["connected"]))
+        self.assertIsNone(self.mpv.get_property("playlist-pos"))
+        self.assertIsNone(self.mpv.observed("playlist-pos"))
+
+        self.server = FakeMPVServer(self.path)
+        self.server.properties["playlist-pos"] = 0
+        # The background loop reconnects without waiting for a command.
+        self.assertTrue(wait_for(lambda: self.mpv.stats()["connected"], timeout=5))
+        self.assertEqual(self.mpv.get_property("playlist-pos"), 0)
+        self.assertEqual(len(connects), 2)
+        # Observers are re-registered on the new connection.
+        self.assertTrue(wait_for(lambda: self.mpv.observed("playlist-pos") == 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import query_generator_service  # noqa: E402
+
+
+def build():
+    generator = query_generator_service.QueryGenerator()
+    generator.add("mellow tamil indie romance", ["tamil indie love songs", "soft tamil acoustic"], ["remix"])
+    generator.add("tamil indie night drive", ["tamil indie night", "tamil synth pop"])
+    generator.add("heavy metal workout", ["metal gym anthems", "thrash metal classics"])
+    return generator
+
+
+class QueryGeneratorServiceTests(unittest.TestCase):
+    def setUp(self):
+        query_generator_service.reset()
+        self.addCleanup(query_generator_service.reset)
+
+    def test_nearest_curations_are_interleaved(self):
+        result = build().generate("mellow tamil indie love", max_queries=3, min_score=0.2)
+        self.assertEqual(result["matches"][0]["prompt"], "mellow tamil indie romance")
+        self.assertEqual(result["search_queries"], ["tamil indie love songs", "tamil indie night", "soft tamil acoustic"])
+        self.assertEqual(result["avoid_terms"], ["remix"])
+        self.assertNotIn("metal gym anthems", result["search_queries"])
+
+    def test_unrelated_prompt_yields_nothing(self):
+        result = build().generate("baroque harpsichord", min_score=0.4)
+        self.assertEqual(result["search_queries"], [])
+        self.assertEqual(result["matches"], [])
+
+    def test_avoid_terms_filter_queries(self):
+        result = build().generate("mellow tamil indie", min_score=0.2, avoid=["acoustic"])
+        self.assertNotIn("soft tamil acoustic", result["search_queries"])
+
+    def test_generator_is_rebuilt_only_when_signature_changes(self):
+        calls = []
+
+        def rows():
+            calls.append(1)
+            return [("calm piano", ["solo piano calm"], [])]
+
+        first = query_generator_service.generator_for((1, 100), rows)
+        self.assertIs(query_generator_service.generator_for((1, 100), rows), first)
+        self.assertIsNot(query_generator_service.generator_for((2, 200), rows), first)
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
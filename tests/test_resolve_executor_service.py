@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import resolve_executor_service as rx  # noqa: E402
+
+
+class GatedResolver:
+    """Resolves `video_id` to `url-<video_id>`; the first call blocks until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, video_id):
+        self.calls.append(video_id)
+        if len(self.calls) == 1:
+            self.started.set()
+            self.release.wait(5)
+        return f"url-{video_id}"
+
+
+class ResolverExecutorTests(unittest.TestCase):
+    def setUp(self):
+        self.resolver = GatedResolver()
+        self.executor = rx.ResolverExecutor(self.resolver, workers=1)
+        self.addCleanup(self.executor.shutdown)
+        self.addCleanup(self.resolver.release.set)
+        self.blocker = self.executor.submit("busy", rx.PRIORITY_PREFETCH)
+        self.assertTrue(self.resolver.started.wait(2))
+
+    def test_higher_priority_jobs_run_first(self):
+        futures = [
+            self.executor.submit("prefetch", rx.PRIORITY_PREFETCH),
+            self.executor.submit("next", rx.PRIORITY_NEXT),
+            self.executor.submit("now", rx.PRIORITY_NOW),
+        ]
+        self.resolver.release.set()
+        self.assertEqual([f.result(2) for f in futures], ["url-prefetch", "url-next", "url-now"])
+        self.assertEqual(self.resolver.calls, ["busy", "now", "next", "prefetch"])
+
+    def test_duplicate_video_ids_share_one_resolve_and_promote(self):
+        other = self.executor.submit("other", rx.PRIORITY_NEXT)
+        first = self.executor.submit("dup", rx.PRIORITY_PREFETCH)
+        second = self.executor.submit("dup", rx.PRIORITY_NOW)
+        self.assertIs(first, second)
+        self.assertIs(self.executor.submit("busy", rx.PRIORITY_NOW), self.blocker)
+        self.resolver.release.set()
+        self.assertEqual(first.result(2), "url-dup")
+        other.result(2)
+        self.assertEqual(self.resolver.calls, ["busy", "dup", "other"])
+        stats = self.executor.stats()
+        self.assertEqual((stats["submitted"], stats["deduped"], stats["promoted"]), (3, 2, 1))
+
+    def test_new_generation_cancels_pending_jobs_only(self):
+        stale = self.executor.submit("stale", rx.PRIORITY_PREFETCH)
+        kept = self.executor.submit("kept", rx.PRIORITY_PREFETCH)
+        generation = self.executor.new_generation()
+        fresh = self.executor.submit("kept", rx.PRIORITY_NEXT)
+        self.assertEqual(generation, 1)
+        self.assertTrue(stale.cancelled() and kept.cancelled())
+        self.assertIsNot(fresh, kept)
+        self.resolver.release.set()
+        self.assertEqual(self.blocker.result(2), "url-busy")
+        self.assertEqual(fresh.result(2), "url-kept")
+        self.assertEqual(self.resolver.calls, ["busy", "kept"])
+        self.assertEqual(self.executor.stats()["cancelled"], 2)
+
+    def test_job_requested_by_new_generation_survives(self):
+        shared = self.executor.submit("shared", rx.PRIORITY_PREFETCH)
+        self.assertIs(self.executor.submit("shared", rx.PRIORITY_NEXT, generation=1), shared)
+        self.assertEqual(self.executor.new_generation(), 1)
+        self.assertFalse(shared.cancelled())
+        self.resolver.release.set()
+        self.assertEqual(shared.result(2), "url-shared")
+
+if __name__ == "__main__":
+    unittest.main()
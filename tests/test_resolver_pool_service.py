@@ -0,0 +1,74 @@
+import os
+import sys
+import textwrap
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import resolver_pool_service  # noqa: E402
+
+# Speaks the resolver_worker protocol without yt_dlp: "slow" hangs, "crash" exits.
+FAKE_WORKER = textwrap.dedent("""
+    import json, os, sys, time
+    for line in sys.stdin:
+        job = json.loads(line)
+        vid = job["video_id"]
+        if vid == "slow":
+            time.sleep(30)
+        if vid == "crash":
+            sys.exit(3)
+        if vid == "bad":
+            print(json.dumps({"id": job["id"], "url": None, "error": "DownloadError: unavailable"}), flush=True)
+            continue
+        print(json.dumps({"id": job["id"], "url": "https://gv/%s?pid=%d" % (vid, os.getpid())}), flush=True)
+""")
+
+
+class ResolverPoolServiceTests(unittest.TestCase):
+    def make_pool(self, **kwargs):
+        pool = resolver_pool_service.ResolverPool(command=[sys.executable, "-c", FAKE_WORKER], **kwargs)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    @staticmethod
+    def pid(url):
+        return url.rsplit("pid=", 1)[1]
+
+    def test_worker_is_reused_then_recycled(self):
+        pool = self.make_pool(size=1, max_jobs=2, timeout=5)
+        first = pool.resolve("a")
+        second = pool.resolve("b")
+        third = pool.resolve("c")
+        self.assertTrue(first.startswith("https://gv/a"))
+        self.assertEqual(self.pid(first), self.pid(second))
+        self.assertNotEqual(self.pid(second), self.pid(third))
+        stats = pool.stats()
+        self.assertEqual((stats["jobs"], stats["spawned"], stats["recycled"]), (3, 2, 1))
+
+    def test_timeout_kills_worker_and_pool_recovers(self):
+        pool = self.make_pool(size=1, timeout=0.5)
+        with self.assertRaises(TimeoutError):
+            pool.resolve("slow")
+        self.assertTrue(pool.resolve("a").startswith("https://gv/a"))
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_crash_is_replaced(self):
+        pool = self.make_pool(size=1, timeout=5)
+        with self.assertRaises(resolver_pool_service.WorkerError):
+            pool.resolve("crash")
+        self.assertTrue(pool.resolve("a").startswith("https://gv/a"))
+        self.assertEqual(pool.stats()["crashes"], 1)
+
+    def test_worker_error_keeps_worker(self):
+        pool = self.make_pool(size=1, timeout=5)
+        before = self.pid(pool.resolve("a"))
+        with self.assertRaises(resolver_pool_service.WorkerError):
+            pool.resolve("bad")
+        self.assertEqual(self.pid(pool.resolve("b")), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import selection_service  # noqa: E402
+
+
+def reference_select(exploit, explore, order, seed, max_tracks):
+    """List/scan based selection as pick_tracks originally did it."""
+    def pick_next(cands, idx, used, window):
+        while idx < len(cands):
+            track = cands[idx]["track"]
+            vid = track.get("videoId")
+            artist = (track.get("artist") or "").lower()
+            idx += 1
+            if not vid or vid in used:
+                continue
+            if artist and sum(1 for a in window if a == artist) >= 2:
+                continue
+            return track, idx
+        return None, idx
+
+    exploit = sorted(exploit, key=lambda c: (c["pref"], c["sim"], c["vibe"]), reverse=True)
+    explore = sorted(explore, key=lambda c: c["vibe"], reverse=True)
+    selected, window, used = [], [], set()
+    if seed:
+        selected.append(seed)
+        used.add(seed["videoId"])
+        window.append(seed["artist"].lower())
+    xi = ei = 0
+
+    def accept(track):
+        selected.append(track)
+        used.add(track["videoId"])
+        artist = (track.get("artist") or "").lower()
+        if artist:
+            window.append(artist)
+            if len(window) > 10:
+                window.pop(0)
+
+    for bucket in order:
+        if bucket == "explore":
+            track, ei = pick_next(explore, ei, used, window)
+            if not track:
+                track, xi = pick_next(exploit, xi, used, window)
+        else:
+            track, xi = pick_next(exploit, xi, used, window)
+            if not track:
+                track, ei = pick_next(explore, ei, used, window)
+        if not track:
+            break
+        accept(track)
+    while len(selected) < max_tracks:
+        track, ei = pick_next(explore, ei, used, window)
+        if not track:
+            track, xi = pick_next(exploit, xi, used, window)
+        if not track:
+            break
+        accept(track)
+    return selected
+
+
+def bucket_order(total, ratio):
+    rng = random.Random(total)
+    return [("explore" if rng.random() < ratio else "exploit") for _ in range(total)]
+
+
+class SelectionServiceTests(unittest.TestCase):
+    def test_artist_window_counts_and_evicts(self):
+        window = selection_service.ArtistWindow(3)
+        for artist in ["a", "b", "a", "c"]:
+            window.add(artist)
+        self.assertEqual(len(window), 3)
+        self.assertEqual(window.count("a"), 1)
+        self.assertEqual(window.count("c"), 1)
+        window.add("")
+        self.assertEqual(len(window), 3)
+
+    def test_ranked_pool_keeps_input_order_for_ties(self):
+        cands = [{"track": {"videoId": str(i), "artist": f"a{i}"}, "vibe": 0.5} for i in range(5)]
+        pool = selection_service.RankedPool(cands, key=lambda c: (c["vibe"],))
+        window = selection_service.ArtistWindow()
+        picked = [pool.next_eligible(set(), window, 2)["videoId"] for _ in range(5)]
+        self.assertEqual(picked, ["0", "1", "2", "3", "4"])
+        self.assertIsNone(pool.next_eligible(set(), window, 2))
+
+    def test_matches_reference_selection(self):
+        rng = random.Random(7)
+        for trial in range(200):
+            n = rng.randint(0, 60)
+            artists = [f"Artist {i}" for i in range(rng.randint(1, 8))]
+            cands = []
+            for i in range(n):
+                cands.append({
+                    "track": {"videoId": f"v{rng.randint(0, n)}", "artist": rng.choice(artists + [""])},
+                    "pref": rng.choice([0.0, 0.0, 0.6, 1.0]),
+                    "sim": round(rng.random(), 1),
+                    "vibe": round(rng.random(), 1),
+                })
+            exploit = [c for c in cands if c["pref"] > 0 or c["sim"] >= 0.5]
+            explore = [c for c in cands if not (c["pref"] > 0 or c["sim"] >= 0.5)]
+            seed = {"videoId": "seed", "artist": rng.choice(artists)} if trial % 3 == 0 else None
+            max_tracks = rng.randint(1, 15)
+            order = bucket_order(max_tracks - (1 if seed else 0), rng.random())
+
+            expected = reference_select(exploit, explore, order, seed, max_tracks)
+
+            selected = [seed] if seed else []
+            used = {seed["videoId"]} if seed else set()
+            window = selection_service.ArtistWindow(10)
+            if seed:
+                window.add(seed["artist"].lower())
+            selection_service.select_from_buckets(
+                {
+                    "exploit": selection_service.RankedPool(exploit, key=lambda c: (c["pref"], c["sim"], c["vibe"])),
+                    "explore": selection_service.RankedPool(explore, key=lambda c: (c["vibe"],)),
+                },
+                order,
+                selected,
+                used,
+                window,
+                max_tracks,
+            )
+            self.assertEqual(selected, expected, f"trial {trial}")
+
+
+if __name__ == "__main__":
+    unittest.main()
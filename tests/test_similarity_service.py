@@ -0,0 +1,53 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import similarity_service  # noqa: E402
+
+
+class SimilarityServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.index = similarity_service.SimilarityIndex()
+        self.index.add_tracks([
+            {"videoId": "a", "title": "Anbarey", "artist": "Santhosh Narayanan"},
+            {"videoId": "b", "title": "Kanave Kanave", "artist": "Anirudh Ravichander"},
+        ])
+
+    def test_vectors_are_normalized(self):
+        vec = similarity_service.vectorize("Mellow Tamil Indie")
+        self.assertAlmostEqual(similarity_service.cosine(vec, vec), 1.0, places=6)
+        self.assertEqual(similarity_service.vectorize("  !! "), {})
+
+    def test_query_ranks_closest_track_first(self):
+        top = self.index.query("Kaadhal Kaan Santhosh Narayanan", k=2)
+        self.assertEqual([key for key, _ in top], ["a", "b"])
+        self.assertGreater(top[0][1], top[1][1])
+
+    def test_max_similarity_separates_related_and_unrelated(self):
+        related = self.index.max_similarity("Anbarey (Lofi) Santhosh")
+        unrelated = self.index.max_similarity("Bohemian Rhapsody Queen")
+        self.assertGreater(related, 0.5)
+        self.assertLess(unrelated, 0.2)
+
+    def test_empty_index_scores_zero(self):
+        empty = similarity_service.SimilarityIndex()
+        self.assertEqual(empty.max_similarity("anything"), 0.0)
+        self.assertEqual(empty.query("anything"), [])
+
+    def test_index_for_tracks_reuses_unchanged_catalog(self):
+        tracks = [{"videoId": "x", "title": "Song", "artist": "Artist"}]
+        first = similarity_service.index_for_tracks(tracks)
+        second = similarity_service.index_for_tracks(list(tracks))
+        self.assertIs(first, second)
+        third = similarity_service.index_for_tracks(tracks + [{"videoId": "y", "title": "Other"}])
+        self.assertIsNot(first, third)
+        self.assertEqual(len(third), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,10 @@
+import json
 import os
+import sqlite3
 import sys
+import tempfile
+import threading
+import time
 import unittest
 from unittest import mock
 
@@ -22,6 +27,15 @@ class FakeCon:
     def commit(self):
         return None
 
+    def close(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
 
 class StubMPV:
     def __init__(self):
@@ -84,6 +98,21 @@ class HandlePlaySmokeTests(unittest.TestCase):
         self.assertEqual(ytplayd.last_debug.get("stream_resolved"), 0)
         self.assertEqual(ytplayd.last_queue[0]["videoId"], "vid1")
 
+    def test_failed_play_keeps_resolves_for_the_current_queue(self):
+        executor = mock.Mock()
+        with mock.patch.object(ytplayd, "resolver_executor", new=executor), \
+                mock.patch.object(ytplayd, "pick_tracks", side_effect=RuntimeError("search down")):
+            with self.assertRaises(RuntimeError):
+                ytplayd.handle_play("prompt", {"max_tracks": 1, "ttl_hours": 1})
+        executor.new_generation.assert_not_called()
+
+        tracks = [{"videoId": "vid1", "title": "Song 1", "artist": "Artist A"}]
+        with mock.patch.object(ytplayd, "resolver_executor", new=executor), \
+                mock.patch.object(ytplayd, "pick_tracks", return_value=(tracks, None, [])), \
+                mock.patch.object(ytplayd, "resolve_urls_parallel", return_value=(["stream1"], 1)):
+            ytplayd.handle_play("prompt", {"max_tracks": 1, "ttl_hours": 1})
+        executor.new_generation.assert_called_once_with()
+
     def test_handle_play_uses_resolved_stream_urls_when_available(self):
         tracks = [
             {"videoId": "vid1", "title": "Song 1", "artist": "Artist A"},
@@ -102,6 +131,874 @@ class HandlePlaySmokeTests(unittest.TestCase):
         self.assertEqual(ytplayd.last_debug.get("stream_total"), 2)
         self.assertEqual(ytplayd.last_debug.get("stream_resolved"), 1)
 
+    def test_seed_resolution_overlaps_curation_and_reuses_seed_url(self):
+        seed_info = {"videoId": "seed1", "title": "Seed Track", "artist": "Seed Artist"}
+        seed_searched = threading.Event()
+        overlapped = []
+        captured = {}
+
+        def fake_resolve_seed(yt, seed, votes):
+            seed_searched.set()
+            return seed_info
+
+        def slow_curate(prompt, extras):
+            overlapped.append(seed_searched.wait(2))
+            return {"search_queries": ["q"], "avoid_terms": [], "notes": "", "source": "llm"}
+
+        def fake_pick(yt, prompt, queries, **kwargs):
+            captured["context_seed"] = kwargs["context"].get("seed_info")
+            return [seed_info, {"videoId": "vid2", "title": "Two", "artist": "B"}], seed_info, []
+
+        def fake_resolve_urls(tracks, max_tracks, known_urls=None, offset=0):
+            captured["known_urls"] = dict(known_urls or {})
+            return [known_urls.get(t["videoId"]) or "url2" for t in tracks], len(tracks)
+
+        with mock.patch.object(ytplayd, "resolve_seed", new=fake_resolve_seed), \
+                mock.patch.object(ytplayd, "llm_curate", new=slow_curate), \
+                mock.patch.object(ytplayd, "pick_tracks", new=fake_pick), \
+                mock.patch.object(ytplayd, "resolve_stream_url", return_value="seedurl"), \
+                mock.patch.object(ytplayd, "resolve_urls_parallel", new=fake_resolve_urls):
+            res = ytplayd.handle_play("prompt", {"seed": "seed song", "max_tracks": 2, "ttl_hours": 1})
+
+        self.assertEqual(overlapped, [True])
+        self.assertEqual(captured["context_seed"], seed_info)
+        self.assertEqual(captured["known_urls"], {"seed1": "seedurl"})
+        self.assertEqual(self.stub_mpv.loaded[-1], ["seedurl", "url2"])
+        self.assertEqual(res["count"], 2)
+
+    def test_seed_node_does_not_hold_a_pool_worker_while_context_loads(self):
+        pool = ytplayd.ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(pool.shutdown)
+        context = ytplayd.Future()
+        with mock.patch.object(ytplayd, "play_pool", new=pool), \
+                mock.patch.object(ytplayd, "resolve_seed", return_value=None):
+            seed_future = ytplayd.play_seed_after(context, "seed song", True)
+            # With the only worker free, other play_pool jobs still run.
+            self.assertEqual(pool.submit(lambda: "free").result(timeout=2), "free")
+            context.set_result({"votes": {}})
+            self.assertEqual(seed_future.result(timeout=2), (None, None))
+
+
+class BatchCurationTests(unittest.TestCase):
+    def setUp(self):
+        self.batch_calls = []
+        self.picked_queries = []
+        ytplayd.last_prompt = "mellow indie"
+        ytplayd.last_extras = {}
+        ytplayd.last_queue = [{"videoId": "cur", "title": "Current", "artist": "A"}]
+        ytplayd.queue_plan = None
+
+        def fake_batch(prompt, extras, slots):
+            self.batch_calls.append(slots)
+            return {
+                "slots": [
+                    {"search_queries": [f"slot {i}"], "avoid_terms": []} for i in range(slots)
+                ],
+                "on_like": {"search_queries": ["more like seed"], "avoid_terms": []},
+                "on_skip": {"search_queries": ["steer away"], "avoid_terms": ["seed"]},
+                "notes": "",
+                "source": "llm",
+            }
+
+        def fake_pick(yt, prompt, queries, **kwargs):
+            self.picked_queries.append(list(queries))
+            n = len(self.picked_queries)
+            return [{"videoId": f"v{n}", "title": f"T{n}", "artist": f"A{n}"}], None, []
+
+        self.patchers = [
+            mock.patch.object(ytplayd, "BATCH_CURATE_ENABLED", True),
+            mock.patch.object(ytplayd, "QUEUE_MAX", 4),
+            mock.patch.object(ytplayd, "maybe_reload_ytmusic", new=lambda: None),
+            mock.patch.object(ytplayd, "llm_curate_batch", new=fake_batch),
+            mock.patch.object(ytplayd, "llm_curate", side_effect=AssertionError("per-slot LLM call")),
+            mock.patch.object(ytplayd, "pick_tracks", new=fake_pick),
+            mock.patch.object(ytplayd, "resolve_urls_parallel", return_value=(["url"], 1)),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.addCleanup(self._cleanup_patches)
+
+    def _cleanup_patches(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        ytplayd.queue_plan = None
+        ytplayd.last_prompt = None
+        ytplayd.last_queue = []
+        ytplayd.recent_avoid_terms = []
+        ytplayd.last_action = None
+        ytplayd.last_action_track = None
+
+    def test_fill_uses_one_llm_round_trip_for_all_slots(self):
+        seed = ytplayd.last_queue[0]
+        for _ in range(3):
+            result = ytplayd.curate_next_track(seed, "listen")
+            self.assertEqual(result["source"], "openai")
+        self.assertEqual(self.batch_calls, [3])
+        self.assertEqual(self.picked_queries, [["slot 0"], ["slot 1"], ["slot 2"]])
+
+    def test_skip_switches_to_skip_branch_and_replans(self):
+        seed = ytplayd.last_queue[0]
+        ytplayd.curate_next_track(seed, "listen")
+        ytplayd.mark_action("skip", seed)
+        ytplayd.curate_next_track(seed, "listen")
+        self.assertEqual(self.picked_queries[-1], ["steer away"])
+        ytplayd.curate_next_track(seed, "listen")
+        self.assertEqual(len(self.batch_calls), 2)
+
+    def test_like_uses_like_branch_then_continues_plan(self):
+        seed = ytplayd.last_queue[0]
+        ytplayd.curate_next_track(seed, "listen")
+        ytplayd.mark_action("like", seed)
+        ytplayd.curate_next_track(seed, "like")
+        ytplayd.curate_next_track(seed, "listen")
+        self.assertEqual(self.picked_queries, [["slot 0"], ["more like seed"], ["slot 1"]])
+        self.assertEqual(len(self.batch_calls), 1)
+
+
+class HedgedCurationTests(unittest.TestCase):
+    def setUp(self):
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        self.release = threading.Event()
+        self.llm_calls = []
+        self.picked = []
+        self.stub_mpv = StubMPV()
+        ytplayd.last_curation = {}
+
+        def slow_curate(prompt, extras):
+            self.llm_calls.append(prompt)
+            self.release.wait(5)
+            return {"search_queries": ["llm query"], "avoid_terms": [], "notes": "", "source": "llm"}
+
+        def fake_pick(yt, prompt, queries, **kwargs):
+            self.picked.append(list(queries))
+            return [{"videoId": "vid1", "title": "One", "artist": "A"}], None, []
+
+        for patcher in (
+            mock.patch.object(ytplayd, "CACHE_DB", path),
+            mock.patch.object(ytplayd, "CURATE_HEDGE_MS", 50),
+            mock.patch.object(ytplayd, "LLM_STREAM_ENABLED", False),
+            mock.patch.object(ytplayd, "maybe_reload_ytmusic", new=lambda: None),
+            mock.patch.object(ytplayd, "llm_curate", new=slow_curate),
+            mock.patch.object(ytplayd, "fallback_queries", new=lambda *args, **kwargs: ["fallback"]),
+            mock.patch.object(ytplayd, "pick_tracks", new=fake_pick),
+            mock.patch.object(ytplayd, "resolve_urls_parallel", return_value=(["url1"], 1)),
+            mock.patch.object(ytplayd, "record_llm_call"),
+            mock.patch.object(ytplayd, "mpv", new=self.stub_mpv),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.release.set)
+        self.addCleanup(setattr, ytplayd, "last_curation", {})
+
+    def wait_for_cache(self, key):
+        for _ in range(100):
+            con = ytplayd.db()
+            try:
+                cached = ytplayd.cache_get(con, key, 1)
+            finally:
+                con.close()
+            if cached:
+                return cached
+            threading.Event().wait(0.02)
+        return None
+
+    def test_missed_deadline_plays_fallback_and_fills_cache(self):
+        extras = {"max_tracks": 1, "ttl_hours": 1}
+        res = ytplayd.handle_play("calm piano", extras)
+        self.assertTrue(res["ok"])
+        self.assertEqual(self.picked[-1], ["fallback"])
+        self.assertEqual(res["queue"][0]["curation"], "fallback")
+
+        self.release.set()
+        key = ytplayd.prompt_cache_key("calm piano", {**extras, "prefetch_extra": ytplayd.PREFETCH_EXTRA})
+        cached = self.wait_for_cache(key)
+        self.assertEqual(cached["curated"]["search_queries"], ["llm query"])
+        self.assertEqual(ytplayd.prompt_curation("Calm  Piano")["search_queries"], ["llm query"])
+
+        ytplayd.handle_play("calm piano", extras)
+        self.assertEqual(self.picked[-1], ["llm query"])
+        self.assertEqual(len(self.llm_calls), 1)
+
+    def test_background_curation_skips_partial_results(self):
+        key = ytplayd.prompt_cache_key("calm piano", {})
+        partial = {"search_queries": ["one"], "avoid_terms": [], "notes": "", "source": "llm_partial"}
+        with mock.patch.object(ytplayd, "llm_curate_stream", return_value=partial):
+            curated = ytplayd.background_curate("calm piano", {}, key, on_query=lambda q: None)
+        self.assertEqual(curated["source"], "llm_partial")
+        con = ytplayd.db()
+        try:
+            self.assertIsNone(ytplayd.cache_get(con, key, 1))
+        finally:
+            con.close()
+        self.assertIsNone(ytplayd.prompt_curation("calm piano"))
+
+    def test_missed_deadline_prefers_stale_cache(self):
+        key = ytplayd.prompt_cache_key("calm piano", {})
+        con = ytplayd.db()
+        con.execute(
+            "INSERT INTO prompt_cache(prompt, payload, created_at, last_used_at, uses) VALUES(?,?,?,?,1);",
+            (key, json.dumps({"curated": {"search_queries": ["stale query"], "avoid_terms": []}}), 0, 0),
+        )
+        con.commit()
+        curated = ytplayd.hedge_fallback(con, "calm piano", {}, key)
+        con.close()
+        self.assertEqual(curated["search_queries"], ["stale query"])
+        self.assertEqual(curated["source"], "stale_cache")
+
+
+class StreamingCurationTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(ytplayd, "record_llm_call")
+        self.record_llm_call = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(ytplayd, "offline_curation", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _client(self, events, fail_after=None):
+        class Responses:
+            def create(self, **kwargs):
+                def gen():
+                    for idx, delta in enumerate(events):
+                        if fail_after is not None and idx == fail_after:
+                            raise RuntimeError("stream dropped")
+                        yield {"type": "response.output_text.delta", "delta": delta}
+                    yield {"type": "response.completed"}
+                return gen()
+
+        class Client:
+            responses = Responses()
+
+        return Client()
+
+    def test_queries_are_forwarded_as_they_complete(self):
+        text = json.dumps({"search_queries": ["one", "two"], "avoid_terms": ["live"], "notes": ""})
+        events = [text[i:i + 5] for i in range(0, len(text), 5)]
+        seen = []
+        with mock.patch.object(ytplayd, "openai_client", return_value=self._client(events)):
+            curated = ytplayd.llm_curate_stream("prompt", {}, seen.append)
+        self.assertEqual(seen, ["one", "two"])
+        self.assertEqual(curated["source"], "llm")
+        self.assertEqual(curated["avoid_terms"], ["live"])
+
+    def test_broken_stream_keeps_received_queries(self):
+        events = ['{"search_queries": ["one", ', '"two", "th', 'ree"]}']
+        seen = []
+        with mock.patch.object(ytplayd, "openai_client", return_value=self._client(events, fail_after=2)):
+            curated = ytplayd.llm_curate_stream("prompt", {}, seen.append)
+        self.assertEqual(seen, ["one", "two"])
+        self.assertEqual(curated["search_queries"], ["one", "two"])
+        self.assertEqual(curated["source"], "llm_partial")
+        self.assertIn("stream dropped", curated["error"])
+
+    def test_partial_curation_is_not_remembered(self):
+        with mock.patch.object(ytplayd, "last_curation", {}):
+            ytplayd.remember_curation("prompt", {"search_queries": ["one"], "source": "llm_partial"})
+            self.assertIsNone(ytplayd.prompt_curation("prompt"))
+            ytplayd.remember_curation("prompt", {"search_queries": ["one", "two"], "source": "llm"})
+            self.assertEqual(ytplayd.prompt_curation("prompt")["search_queries"], ["one", "two"])
+
+    def test_stream_failure_before_any_query_uses_fallback(self):
+        seen = []
+        with mock.patch.object(ytplayd, "openai_client", return_value=self._client(["{"], fail_after=0)):
+            curated = ytplayd.llm_curate_stream("calm piano", {}, seen.append)
+        self.assertEqual(curated["source"], "fallback")
+        self.assertEqual(seen, curated["search_queries"])
+        self.assertTrue(seen)
+        self.assertEqual(self.record_llm_call.call_args.kwargs["fallback"], "error:RuntimeError")
+
+
+class PromptCacheKeyTests(unittest.TestCase):
+    def test_key_ignores_fields_that_do_not_reach_the_llm(self):
+        base = ytplayd.prompt_cache_key("Mellow  Tamil indie", {"lang": "ta", "avoid": ["Live", "remix"]})
+        variant = ytplayd.prompt_cache_key(
+            " mellow tamil INDIE ",
+            {
+                "lang": "TA",
+                "avoid": ["remix ", "live", "remix"],
+                "mix": "60/40",
+                "vibe": "Strict",
+                "max_tracks": 7,
+                "ttl_hours": 1,
+                "prefetch_extra": 5,
+            },
+        )
+        self.assertEqual(base, variant)
+        self.assertNotEqual(base, ytplayd.prompt_cache_key("mellow tamil indie", {"lang": "hi"}))
+
+    def test_legacy_keys_are_migrated_and_merged(self):
+        con = sqlite3.connect(":memory:")
+        con.execute(
+            "CREATE TABLE prompt_cache (prompt TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+            "created_at INTEGER NOT NULL, last_used_at INTEGER NOT NULL, uses INTEGER NOT NULL DEFAULT 1);"
+        )
+        legacy = [
+            ("Calm piano", {"mix": "50/50", "max_tracks": 3}, "old", 10),
+            ("calm  piano", {"mix": "60/40", "max_tracks": 5, "prefetch_extra": 5}, "new", 20),
+        ]
+        for prompt, extras, payload, ts in legacy:
+            con.execute(
+                "INSERT INTO prompt_cache VALUES (?,?,?,?,?);",
+                (prompt + "\n" + json.dumps(extras, sort_keys=True), json.dumps({"v": payload}), ts, ts, 2),
+            )
+        result = ytplayd.migrate_prompt_cache_keys(con)
+        self.assertEqual(result, {"legacy": 2, "canonical": 1})
+        rows = con.execute("SELECT prompt, payload, uses FROM prompt_cache;").fetchall()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][0], ytplayd.prompt_cache_key("calm piano", {}))
+        self.assertEqual(json.loads(rows[0][1]), {"v": "new"})
+        self.assertEqual(rows[0][2], 4)
+        self.assertEqual(ytplayd.migrate_prompt_cache_keys(con), {"legacy": 0, "canonical": 0})
+
+
+class QueueCacheTests(unittest.TestCase):
+    def setUp(self):
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        self.llm_curate = mock.Mock(
+            side_effect=lambda prompt, extras, phase="play": {
+                "search_queries": [f"q{self.llm_curate.call_count}"],
+                "avoid_terms": [],
+                "notes": "",
+                "source": "llm",
+            }
+        )
+        for patcher in (
+            mock.patch.object(ytplayd, "CACHE_DB", path),
+            mock.patch.object(ytplayd, "QUEUE_CACHE_TTL_HOURS", 24),
+            mock.patch.object(ytplayd, "llm_curate", new=self.llm_curate),
+            mock.patch.object(ytplayd, "record_llm_call"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_repeated_transition_skips_llm(self):
+        seed = {"videoId": "abc", "title": "Song", "artist": "Artist"}
+        extras = {"seed": "Song - Artist", "avoid": ["live"]}
+        first = ytplayd.cached_queue_curation("Mellow indie", seed, "like", extras)
+        again = ytplayd.cached_queue_curation("mellow  INDIE", seed, "like", {**extras, "avoid": ["Live "]})
+        self.assertEqual(self.llm_curate.call_count, 1)
+        self.assertEqual(again["search_queries"], first["search_queries"])
+        self.assertTrue(again["cached"])
+
+        ytplayd.cached_queue_curation("mellow indie", seed, "skip", extras)
+        ytplayd.cached_queue_curation("mellow indie", seed, "like", {**extras, "avoid": ["live", "remix"]})
+        ytplayd.cached_queue_curation("mellow indie", {**seed, "videoId": "xyz"}, "like", extras)
+        self.assertEqual(self.llm_curate.call_count, 4)
+
+    def test_fallback_results_are_not_cached(self):
+        self.llm_curate.side_effect = lambda prompt, extras, phase="play": {
+            "search_queries": ["fallback"],
+            "avoid_terms": [],
+            "source": "fallback",
+        }
+        seed = {"videoId": "abc"}
+        ytplayd.cached_queue_curation("mellow indie", seed, "listen", {})
+        ytplayd.cached_queue_curation("mellow indie", seed, "listen", {})
+        self.assertEqual(self.llm_curate.call_count, 2)
+
+
+class OfflineCurationTests(unittest.TestCase):
+    def setUp(self):
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        ytplayd.query_generator_service.reset()
+        self.addCleanup(ytplayd.query_generator_service.reset)
+        for patcher in (
+            mock.patch.object(ytplayd, "CACHE_DB", path),
+            mock.patch.object(ytplayd, "OFFLINE_QUERIES_ENABLED", True),
+            mock.patch.object(ytplayd, "record_llm_call"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        con = ytplayd.db()
+        past = [
+            ("Mellow Tamil indie romance", {"lang": "ta"}, ["tamil indie love songs"], "llm"),
+            ("heavy metal workout", {}, ["metal gym anthems"], "llm"),
+            ("mellow tamil indie", {"lang": "ta"}, ["not from the llm"], "fallback"),
+        ]
+        for prompt, extras, queries, source in past:
+            curated = {"search_queries": queries, "avoid_terms": [], "source": source}
+            ytplayd.cache_put(con, ytplayd.prompt_cache_key(prompt, extras), {"curated": curated})
+        con.close()
+
+    def test_similar_prompt_gets_queries_from_past_llm_curations(self):
+        curated = ytplayd.offline_curation("mellow tamil indie love", {"lang": "ta"}, 5)
+        self.assertEqual(curated["source"], "offline")
+        self.assertEqual(curated["search_queries"], ["tamil indie love songs"])
+        self.assertIsNone(ytplayd.offline_curation("baroque harpsichord", {}, 5))
+
+    def test_llm_failure_falls_back_to_offline_queries(self):
+        class Responses:
+            def create(self, **kwargs):
+                raise RuntimeError("llm down")
+
+        class Client:
+            responses = Responses()
+
+        with mock.patch.object(ytplayd, "openai_client", return_value=Client()):
+            curated = ytplayd.llm_curate("mellow tamil indie love", {"lang": "ta"})
+            unrelated = ytplayd.llm_curate("baroque harpsichord", {})
+        self.assertEqual(curated["source"], "offline")
+        self.assertEqual(curated["search_queries"], ["tamil indie love songs"])
+        self.assertIn("llm down", curated["error"])
+        self.assertEqual(unrelated["source"], "fallback")
+
+
+class StreamUrlCacheTests(unittest.TestCase):
+    def setUp(self):
+        ytplayd.stream_url_service.reset()
+        self.addCleanup(ytplayd.stream_url_service.reset)
+        for patcher in (
+            mock.patch.object(ytplayd, "STREAM_CACHE_ENABLED", True),
+            mock.patch.object(ytplayd, "require_bin", return_value="yt-dlp"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_audio_cache_file_is_played_from_disk(self):
+        with mock.patch.object(ytplayd, "AUDIO_CACHE_ENABLED", True), \
+                mock.patch.object(ytplayd.audio_cache_service, "lookup", return_value="/tmp/audio/vid1.webm"), \
+                mock.patch.object(ytplayd.subprocess, "check_output") as run:
+            self.assertEqual(ytplayd.resolve_stream_url("vid1"), "/tmp/audio/vid1.webm")
+        run.assert_not_called()
+
+    def test_second_resolve_skips_ytdlp(self):
+        expire = int(time.time()) + 6 * 3600
+        direct = f"https://rr1.googlevideo.com/videoplayback?expire={expire}&id=x\n"
+        with mock.patch.object(ytplayd.subprocess, "check_output", return_value=direct) as run:
+            first = ytplayd.resolve_stream_url("vid1")
+            second = ytplayd.resolve_stream_url("vid1")
+        self.assertEqual(first, second)
+        self.assertEqual(run.call_count, 1)
+
+
+class LazyResolveTests(unittest.TestCase):
+    class InlineExecutor:
+        def __init__(self):
+            self.priorities = []
+
+        def submit(self, video_id, priority):
+            self.priorities.append(priority)
+            future = ytplayd.Future()
+            future.set_result(ytplayd.resolve_stream_url(video_id))
+            return future
+
+    class PlaylistMPV(StubMPV):
+        def __init__(self, pos):
+            super().__init__()
+            self.pos = pos
+            self.replaced = []
+            self.locked = []
+
+        def get_property(self, name):
+            return self.pos if name == "playlist-pos" else None
+
+        def observed(self, name):
+            return self.pos if name == "playlist-pos" else None
+
+        def replace_index(self, index, url):
+            self.locked.append(ytplayd.queue_fill_lock.locked())
+            self.replaced.append((index, url))
+            return True
+
+    def setUp(self):
+        self.tracks = [{"videoId": f"vid{i}", "title": f"Song {i}", "artist": "A"} for i in (1, 2, 3)]
+        ytplayd.queue_unresolved.clear()
+        ytplayd.queue_resolving.clear()
+        self.addCleanup(ytplayd.queue_unresolved.clear)
+        for patcher in (
+            mock.patch.object(ytplayd, "LAZY_RESOLVE", True),
+            mock.patch.object(ytplayd, "RESOLVE_LOOKAHEAD", 1),
+            mock.patch.object(ytplayd, "last_queue", list(self.tracks)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_handle_play_resolves_only_current_plus_lookahead(self):
+        requested = []
+
+        def fake_resolve_urls(tracks, max_tracks, known_urls=None, offset=0):
+            requested.append(max_tracks)
+            return [f"stream-{t['videoId']}" for t in tracks[:max_tracks]], max_tracks
+
+        stub = StubMPV()
+        with mock.patch.object(ytplayd, "maybe_reload_ytmusic", new=lambda: None), \
+                mock.patch.object(ytplayd, "db", new=FakeCon), \
+                mock.patch.object(ytplayd, "cache_get", return_value=None), \
+                mock.patch.object(ytplayd, "cache_put"), \
+                mock.patch.object(ytplayd, "llm_curate", return_value={"search_queries": ["q"], "source": "stub"}), \
+                mock.patch.object(ytplayd, "pick_tracks", return_value=(list(self.tracks), None, [])), \
+                mock.patch.object(ytplayd, "resolve_urls_parallel", new=fake_resolve_urls), \
+                mock.patch.object(ytplayd, "QUEUE_MAX", 3), \
+                mock.patch.object(ytplayd, "PREFETCH_EXTRA", 0), \
+                mock.patch.object(ytplayd, "mpv", new=stub):
+            res = ytplayd.handle_play("prompt", {"max_tracks": 3, "ttl_hours": 1})
+
+        self.assertEqual(requested, [2])
+        self.assertEqual(stub.loaded[-1], ["stream-vid1", "stream-vid2", ytplayd.watch_url("vid3")])
+        self.assertEqual(res["count"], 3)
+        self.assertEqual(ytplayd.queue_unresolved, {"vid3"})
+        self.assertEqual(ytplayd.last_debug.get("stream_deferred"), 1)
+
+    def test_window_resolves_entries_as_position_advances(self):
+        ytplayd.queue_unresolved.update({"vid2", "vid3"})
+        mpv = self.PlaylistMPV(pos=0)
+        executor = self.InlineExecutor()
+        with mock.patch.object(ytplayd, "resolver_executor", new=executor), \
+                mock.patch.object(ytplayd, "mpv", new=mpv), \
+                mock.patch.object(ytplayd, "resolve_stream_url", side_effect=lambda vid: f"stream-{vid}") as resolve:
+            self.assertEqual(ytplayd.resolve_window(0), 1)
+            self.assertEqual(mpv.replaced, [(1, "stream-vid2")])
+            mpv.pos = 1
+            self.assertEqual(ytplayd.resolve_window(1), 1)
+            self.assertEqual(ytplayd.resolve_window(1), 0)
+
+        self.assertEqual(mpv.replaced, [(1, "stream-vid2"), (2, "stream-vid3")])
+        # The IPC swap must not hold up trims and fills waiting on queue_fill_lock.
+        self.assertEqual(mpv.locked, [False, False])
+        self.assertEqual(resolve.call_count, 2)
+        self.assertEqual(executor.priorities, [ytplayd.resolve_executor_service.PRIORITY_NEXT] * 2)
+        self.assertEqual(ytplayd.queue_unresolved, set())
+
+
+class StreamRefreshTests(unittest.TestCase):
+    def setUp(self):
+        ytplayd.stream_refresh_service.reset()
+        self.addCleanup(ytplayd.stream_refresh_service.reset)
+        self.tracks = [{"videoId": f"vid{i}", "title": f"Song {i}", "artist": "A"} for i in (1, 2, 3)]
+        self.mpv = LazyResolveTests.PlaylistMPV(pos=0)
+        for patcher in (
+            mock.patch.object(ytplayd, "last_queue", list(self.tracks)),
+            mock.patch.object(ytplayd, "mpv", new=self.mpv),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_expiring_queued_urls_are_swapped_in_place(self):
+        now = int(time.time())
+        for vid, ttl in (("vid1", 60), ("vid2", 300), ("vid3", 6 * 3600)):
+            ytplayd.stream_refresh_service.track(vid, f"https://rr1.googlevideo.com/videoplayback?expire={now + ttl}&id={vid}")
+        fresh = f"https://rr1.googlevideo.com/videoplayback?expire={now + 6 * 3600}&id=new"
+        with mock.patch.object(ytplayd, "resolve_stream_url", return_value=fresh) as resolve:
+            self.assertEqual(ytplayd.refresh_queue_urls(), 1)
+
+        # vid1 is playing and vid3 is far from expiry; only vid2 is re-resolved.
+        resolve.assert_called_once_with("vid2")
+        self.assertEqual(self.mpv.replaced, [(1, fresh)])
+        self.assertEqual(self.mpv.locked, [False])
+        self.assertTrue(ytplayd.stream_refresh_service.note_started("vid2", now=now + 400))
+        self.assertEqual(ytplayd.stream_refresh_service.stats()["failures_avoided"], 1)
+
+
+class QueueSwapConcurrencyTests(unittest.TestCase):
+    class ModelMPV:
+        """A playlist that shifts like mpv's: removing an entry before the playing one moves the position."""
+
+        def __init__(self, entries):
+            self.entries = list(entries)
+            self.pos = 0
+            self.on_position_read = None
+
+        def get_property(self, name):
+            if name == "playlist-pos" and self.on_position_read is not None:
+                hook, self.on_position_read = self.on_position_read, None
+                hook()
+            return self.pos if name == "playlist-pos" else None
+
+        def observed(self, name):
+            return self.pos if name == "playlist-pos" else None
+
+        def next(self):
+            self.pos += 1
+
+        def remove_index(self, index):
+            self.entries.pop(index)
+            if index < self.pos:
+                self.pos -= 1
+
+        def replace_index(self, index, url):
+            self.entries[index] = url
+            return True
+
+    def setUp(self):
+        self.tracks = [{"videoId": f"vid{i}", "title": f"Song {i}", "artist": "A"} for i in (1, 2, 3)]
+        self.mpv = self.ModelMPV([f"old-{t['videoId']}" for t in self.tracks])
+        for patcher in (
+            mock.patch.object(ytplayd, "mpv", new=self.mpv),
+            mock.patch.object(ytplayd, "last_queue", list(self.tracks)),
+            mock.patch.object(ytplayd, "last_prompt", "focus"),
+            mock.patch.object(ytplayd, "last_pos", 0),
+            mock.patch.object(ytplayd, "QUEUE_MAX", 2),
+            mock.patch.object(ytplayd, "LAZY_RESOLVE", False),
+            mock.patch.object(ytplayd, "queue_fill_token", 0),
+            mock.patch.object(ytplayd, "queue_fill_inflight", False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def skip_during_swap(self):
+        """Start a /next when the swap reads the playing position; it must wait for the swap."""
+        skipper = threading.Thread(target=ytplayd.user_skip, args=(self.mpv.next,))
+
+        def hook():
+            skipper.start()
+            skipper.join(0.2)
+            self.assertTrue(skipper.is_alive(), "trim ran between index lookup and replace")
+
+        self.mpv.on_position_read = hook
+        return skipper
+
+    def assert_playlist_matches_queue(self):
+        self.assertEqual([t["videoId"] for t in ytplayd.last_queue], ["vid2", "vid3"])
+        self.assertEqual(self.mpv.entries, ["new-vid2", "old-vid3"])
+        self.assertEqual(self.mpv.pos, 0)
+
+    def test_lazy_swap_and_skip_do_not_interleave(self):
+        future = ytplayd.Future()
+        future.set_result("new-vid2")
+        skipper = self.skip_during_swap()
+        ytplayd.lazy_resolve_entry("vid2", ytplayd.queue_resolve_gen, future)
+        skipper.join(2)
+        self.assert_playlist_matches_queue()
+
+    def test_refresh_swap_and_skip_do_not_interleave(self):
+        ytplayd.stream_refresh_service.reset()
+        self.addCleanup(ytplayd.stream_refresh_service.reset)
+        soon = int(time.time()) + 60
+        ytplayd.stream_refresh_service.track("vid2", f"https://rr1.googlevideo.com/videoplayback?expire={soon}&id=vid2")
+        future = ytplayd.Future()
+        future.set_result("new-vid2")
+        executor = mock.Mock()
+        executor.submit.return_value = future
+        skipper = self.skip_during_swap()
+        with mock.patch.object(ytplayd, "resolver_executor", new=executor):
+            self.assertEqual(ytplayd.refresh_queue_urls(), 1)
+        skipper.join(2)
+        self.assert_playlist_matches_queue()
+
+
+class NegativeCacheTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory(prefix="ytplay-smoke-")
+        self.addCleanup(tmp.cleanup)
+        self.db_path = os.path.join(tmp.name, "cache.sqlite3")
+        con = sqlite3.connect(self.db_path)
+        con.execute(ytplayd.track_health_service.CREATE_TABLE_SQL)
+        con.commit()
+        con.close()
+        ytplayd.track_health_service.reset()
+        self.addCleanup(ytplayd.track_health_service.reset)
+        for patcher in (
+            mock.patch.object(ytplayd, "db", new=lambda: sqlite3.connect(self.db_path)),
+            mock.patch.object(ytplayd, "STREAM_CACHE_ENABLED", False),
+            mock.patch.object(ytplayd, "YTDLP_EXTRACTOR_ARGS_FALLBACK", ""),
+            mock.patch.object(ytplayd, "require_bin", return_value="yt-dlp"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_unresolvable_track_is_not_retried_or_picked(self):
+        failure = ytplayd.subprocess.CalledProcessError(1, "yt-dlp")
+        with mock.patch.object(ytplayd.subprocess, "check_output", side_effect=failure) as run:
+            self.assertIsNone(ytplayd.resolve_stream_url("dead1"))
+            self.assertIsNone(ytplayd.resolve_stream_url("dead1"))
+        # Primary + fallback on the first call, nothing on the second.
+        self.assertEqual(run.call_count, 2)
+
+        class FakeYT:
+            def search(self, query, filter=None, limit=None):
+                return [
+                    {"videoId": "dead1", "title": "Gone", "artists": [{"name": "A"}]},
+                    {"videoId": "live1", "title": "Here", "artists": [{"name": "B"}]},
+                ]
+
+        context = {
+            "votes": {}, "liked_tracks": [], "liked_artists": set(), "learning": {}, "learning_profile": {},
+            "taste_index": None, "recent_window": set(),
+            "unresolvable": ytplayd.track_health_service.blocked_ids(),
+        }
+        with mock.patch.object(ytplayd, "vibe_score", return_value=1.0), \
+                mock.patch.object(ytplayd, "session_seen_ids", set()):
+            tracks, _, _ = ytplayd.pick_tracks(FakeYT(), "p", ["q"], 2, {}, include_seed=False, context=context)
+        self.assertEqual([t["videoId"] for t in tracks], ["live1"])
+        self.assertEqual(ytplayd.last_debug["skips"]["unresolvable"], 1)
+
+
+class HedgedResolveTests(unittest.TestCase):
+    def setUp(self):
+        ytplayd.extractor_profile_service.reset()
+        self.addCleanup(ytplayd.extractor_profile_service.reset)
+        for patcher in (
+            mock.patch.object(ytplayd, "RESOLVE_HEDGE_MS", 50),
+            mock.patch.object(ytplayd, "STREAM_CACHE_ENABLED", False),
+            mock.patch.object(ytplayd, "AUDIO_CACHE_ENABLED", False),
+            mock.patch.object(ytplayd, "YTDLP_EXTRACTOR_ARGS", "primary"),
+            mock.patch.object(ytplayd, "YTDLP_EXTRACTOR_ARGS_FALLBACK", "fallback"),
+            mock.patch.object(ytplayd.track_health_service, "record_success"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_slow_primary_loses_to_fallback_and_is_cancelled(self):
+        cancelled = threading.Event()
+
+        def backend(video_id, extractor_args, cancel=None):
+            if extractor_args == "primary":
+                if cancel.wait(5):
+                    cancelled.set()
+                return None
+            return "fallback-url"
+
+        started = time.time()
+        with mock.patch.object(ytplayd, "resolve_stream_url_subprocess", new=backend):
+            self.assertEqual(ytplayd.resolve_stream_url("vid1"), "fallback-url")
+        self.assertLess(time.time() - started, 2)
+        self.assertTrue(cancelled.wait(2))
+        stats = ytplayd.extractor_profile_service.stats()
+        # The cancelled primary is not counted as a failure.
+        self.assertEqual(stats["fallback"]["ok"], 1)
+        self.assertNotIn("primary", stats)
+
+    def test_fast_primary_never_starts_fallback(self):
+        calls = []
+
+        def backend(video_id, extractor_args, cancel=None):
+            calls.append(extractor_args)
+            return "primary-url"
+
+        with mock.patch.object(ytplayd, "resolve_stream_url_subprocess", new=backend):
+            self.assertEqual(ytplayd.resolve_stream_url("vid1"), "primary-url")
+        self.assertEqual(calls, ["primary"])
+
+
+class StateSnapshotTests(unittest.TestCase):
+    class MirrorOnlyMPV:
+        def __init__(self, props):
+            self.props = props
+
+        def observed(self, name):
+            return self.props.get(name)
+
+        def get_property(self, name):
+            raise AssertionError(f"/state asked mpv for {name}")
+
+    def test_state_is_built_from_observed_properties(self):
+        props = {"playlist-pos": 0, "pause": True, "time-pos": 31.5, "duration": 200.0}
+        with mock.patch.object(ytplayd, "mpv", new=self.MirrorOnlyMPV(props)), \
+                mock.patch.object(ytplayd, "last_queue", []), \
+                mock.patch.object(ytplayd, "last_prompt", None):
+            state = ytplayd.state_snapshot()
+        self.assertEqual(
+            (state["current_index"], state["paused"], state["position"], state["duration"]),
+            (0, True, 31.5, 200.0),
+        )
+
+
+class PlaybackEventTests(unittest.TestCase):
+    class EventMPV:
+        def __init__(self, pos):
+            self.props = {"playlist-pos": pos}
+            self.removed = []
+            self.reads = []
+
+        def observed(self, name):
+            return self.props.get(name)
+
+        def get_property(self, name):
+            self.reads.append(ytplayd.queue_fill_lock.locked())
+            return self.props.get(name)
+
+        def remove_index(self, index):
+            self.removed.append(index)
+            if index < self.props["playlist-pos"]:
+                self.props["playlist-pos"] -= 1
+            return True
+
+        def next(self):
+            self.props["playlist-pos"] += 1
+
+    class QueuedPool:
+        def __init__(self, run=True):
+            self.run = run
+            self.jobs = []
+
+        def submit(self, fn):
+            self.jobs.append(fn)
+            if self.run:
+                fn()
+
+    def setUp(self):
+        self.tracks = [{"videoId": f"vid{i}", "title": f"Song {i}", "artist": "A"} for i in (1, 2, 3)]
+        self.mpv = self.EventMPV(0)
+        self.history = []
+        for patcher in (
+            mock.patch.object(ytplayd, "mpv", new=self.mpv),
+            mock.patch.object(ytplayd, "last_queue", list(self.tracks)),
+            mock.patch.object(ytplayd, "last_prompt", "focus"),
+            mock.patch.object(ytplayd, "last_pos", 0),
+            mock.patch.object(ytplayd, "last_played_track_id", "vid1"),
+            mock.patch.object(ytplayd, "QUEUE_MAX", 3),
+            mock.patch.object(ytplayd, "LAZY_RESOLVE", False),
+            mock.patch.object(ytplayd, "playback_pending", False),
+            mock.patch.object(ytplayd, "playback_stats", {"events": 0, "advances": 0, "coalesced": 0, "load_errors": 0}),
+            mock.patch.object(ytplayd, "record_history", new=self.history.append),
+            mock.patch.object(ytplayd, "cache_audio", new=lambda vid: None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_playlist_pos_event_trims_and_records_history(self):
+        self.mpv.props["playlist-pos"] = 1
+        with mock.patch.object(ytplayd, "playback_pool", new=self.QueuedPool()), \
+                mock.patch.object(ytplayd, "queue_fill_inflight", False), \
+                mock.patch.object(ytplayd, "fill_queue_worker"):
+            ytplayd.on_mpv_event({"event": "property-change", "name": "playlist-pos", "data": 1})
+            fill_started = ytplayd.queue_fill_inflight
+        self.assertEqual(self.mpv.removed, [0])
+        self.assertEqual([t["videoId"] for t in ytplayd.last_queue], ["vid2", "vid3"])
+        self.assertEqual([t["videoId"] for t in self.history], ["vid2"])
+        self.assertEqual(ytplayd.last_played_track_id, "vid2")
+        # Trimming left the queue short, so a refill starts without waiting for /state.
+        self.assertTrue(fill_started)
+
+    def test_stale_mirrored_position_does_not_trim_the_new_queue(self):
+        # The mirror still holds the previous /play's position; mpv itself is at 0.
+        self.mpv.observed = lambda name: 2
+        with mock.patch.object(ytplayd, "playback_pool", new=self.QueuedPool()):
+            ytplayd.on_mpv_event({"event": "property-change", "name": "playlist-pos", "data": 2})
+        self.assertEqual(self.mpv.removed, [])
+        self.assertEqual([t["videoId"] for t in ytplayd.last_queue], ["vid1", "vid2", "vid3"])
+        self.assertEqual(self.history, [])
+
+    def test_skip_then_queued_advance_trims_once(self):
+        self.mpv.observed = lambda name: 1  # what the queued advance's event reported
+        with mock.patch.object(ytplayd, "queue_fill_inflight", False), \
+                mock.patch.object(ytplayd, "fill_queue_worker"):
+            ytplayd.user_skip(self.mpv.next)
+            ytplayd.advance_playback()
+        self.assertEqual(self.mpv.removed, [0])
+        self.assertEqual([t["videoId"] for t in ytplayd.last_queue], ["vid2", "vid3"])
+        self.assertEqual([t["videoId"] for t in self.history], ["vid2"])
+        # Each trim decision is made on a position read under queue_fill_lock.
+        self.assertTrue(self.mpv.reads)
+        self.assertTrue(all(self.mpv.reads))
+
+    def test_unrelated_events_are_ignored_and_bursts_coalesce(self):
+        pool = self.QueuedPool(run=False)
+        with mock.patch.object(ytplayd, "playback_pool", new=pool):
+            ytplayd.on_mpv_event({"event": "property-change", "name": "time-pos", "data": 3.0})
+            ytplayd.on_mpv_event({"event": "end-file", "reason": "eof"})
+            ytplayd.on_mpv_event({"event": "start-file", "playlist_entry_id": 2})
+            ytplayd.on_mpv_event({"event": "property-change", "name": "playlist-pos", "data": 1})
+        self.assertEqual(len(pool.jobs), 1)
+        self.assertEqual(ytplayd.playback_stats["events"], 3)
+        self.assertEqual(ytplayd.playback_stats["coalesced"], 2)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import stream_refresh_service  # noqa: E402
+
+NOW = 1_700_000_000
+
+
+def url(expire, vid="abc"):
+    return f"https://rr1---sn-x.googlevideo.com/videoplayback?expire={expire}&id={vid}&itag=251"
+
+
+class StreamRefreshServiceTests(unittest.TestCase):
+    def setUp(self):
+        stream_refresh_service.reset()
+        self.addCleanup(stream_refresh_service.reset)
+
+    def test_due_lists_urls_inside_margin_in_queue_order(self):
+        stream_refresh_service.track("a", url(NOW + 600, "a"))
+        stream_refresh_service.track("b", url(NOW + 7200, "b"))
+        stream_refresh_service.track("c", url(NOW + 60, "c"))
+        self.assertFalse(stream_refresh_service.track("d", "https://www.youtube.com/watch?v=d"))
+        self.assertEqual(stream_refresh_service.due(["c", "b", "a", "d"], 1800, now=NOW), ["c", "a"])
+        self.assertEqual(stream_refresh_service.stats()["tracked"], 3)
+
+    def test_refresh_counts_avoided_failure_only_when_old_url_would_have_expired(self):
+        stream_refresh_service.track("a", url(NOW + 600, "a"))
+        stream_refresh_service.track("b", url(NOW + 600, "b"))
+        stream_refresh_service.note_refreshed("a", url(NOW + 21600, "a"))
+        stream_refresh_service.note_refreshed("b", url(NOW + 21600, "b"))
+        self.assertEqual(stream_refresh_service.due(["a", "b"], 1800, now=NOW), [])
+
+        self.assertTrue(stream_refresh_service.note_started("a", now=NOW + 900))
+        self.assertFalse(stream_refresh_service.note_started("b", now=NOW + 300))
+        stats = stream_refresh_service.stats()
+        self.assertEqual((stats["refreshes"], stats["failures_avoided"], stats["tracked"]), (2, 1, 0))
+
+    def test_clear_drops_tracking_but_keeps_counters(self):
+        stream_refresh_service.track("a", url(NOW + 600, "a"))
+        stream_refresh_service.note_refreshed("a", url(NOW + 21600, "a"))
+        stream_refresh_service.note_failed("b")
+        stream_refresh_service.clear()
+        self.assertFalse(stream_refresh_service.note_started("a", now=NOW + 900))
+        stats = stream_refresh_service.stats()
+        self.assertEqual((stats["tracked"], stats["refreshes"], stats["refresh_failures"]), (0, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
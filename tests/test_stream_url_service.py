@@ -0,0 +1,67 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import stream_url_service  # noqa: E402
+
+NOW = 1_700_000_000
+
+
+def url(expire, vid="abc"):
+    return f"https://rr1---sn-x.googlevideo.com/videoplayback?expire={expire}&id={vid}&itag=251"
+
+
+class StreamUrlServiceTests(unittest.TestCase):
+    def setUp(self):
+        stream_url_service.reset()
+        stream_url_service.configure(600, 3)
+        self.addCleanup(stream_url_service.reset)
+        self.addCleanup(stream_url_service.configure, 900, 500)
+
+    def test_parse_expiry(self):
+        self.assertEqual(stream_url_service.parse_expiry(url(NOW)), NOW)
+        self.assertEqual(
+            stream_url_service.parse_expiry(f"https://manifest.googlevideo.com/api/manifest/hls/expire/{NOW}/id/x"),
+            NOW,
+        )
+        self.assertIsNone(stream_url_service.parse_expiry("https://example.com/audio.m4a"))
+
+    def test_served_until_margin_then_dropped(self):
+        self.assertTrue(stream_url_service.put("abc", "youtube:player_client=android", url(NOW + 3600), now=NOW))
+        self.assertEqual(stream_url_service.get("abc", "youtube:player_client=android", now=NOW + 2000), url(NOW + 3600))
+        self.assertIsNone(stream_url_service.get("abc", "other", now=NOW))
+        self.assertIsNone(stream_url_service.get("abc", "youtube:player_client=android", now=NOW + 3000))
+        stats = stream_url_service.stats()
+        self.assertEqual((stats["hits"], stats["expired"], stats["entries"]), (1, 1, 0))
+
+    def test_lookup_across_profiles_counts_once(self):
+        self.assertIsNone(stream_url_service.get_any("abc", [None, "fallback"], now=NOW))
+        stream_url_service.put("abc", "fallback", url(NOW + 3600), now=NOW)
+        self.assertEqual(stream_url_service.get_any("abc", [None, "fallback"], now=NOW), url(NOW + 3600))
+        stats = stream_url_service.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 1, 0.5))
+
+    def test_rejects_short_lived_and_unexpiring_urls(self):
+        self.assertFalse(stream_url_service.put("abc", None, url(NOW + 300), now=NOW))
+        self.assertFalse(stream_url_service.put("abc", None, "https://example.com/a.m4a", now=NOW))
+        self.assertEqual(stream_url_service.stats()["uncacheable"], 2)
+
+    def test_capacity_evicts_expired_then_least_recent(self):
+        stream_url_service.put("old", None, url(NOW + 700), now=NOW)
+        for vid in ("a", "b", "c"):
+            stream_url_service.put(vid, None, url(NOW + 7200, vid), now=NOW + 200)
+        self.assertIsNone(stream_url_service.get("old", None, now=NOW + 200))
+        stream_url_service.get("a", None, now=NOW + 200)
+        stream_url_service.put("d", None, url(NOW + 7200, "d"), now=NOW + 200)
+        self.assertIsNone(stream_url_service.get("b", None, now=NOW + 200))
+        self.assertIsNotNone(stream_url_service.get("a", None, now=NOW + 200))
+        self.assertEqual(stream_url_service.invalidate("a"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
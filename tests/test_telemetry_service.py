@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import telemetry_service  # noqa: E402
+
+
+class TelemetryServiceTests(unittest.TestCase):
+    def setUp(self):
+        telemetry_service.reset()
+        self.addCleanup(telemetry_service.reset)
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        con = self.db()
+        con.execute(telemetry_service.CREATE_TABLE_SQL)
+        con.commit()
+        con.close()
+
+    def db(self):
+        return sqlite3.connect(self.path)
+
+    def test_snapshot_counts_per_phase(self):
+        for ms in (100, 200, 300, 400, 5000):
+            telemetry_service.record("play", "gpt-test", ms, input_tokens=10, output_tokens=5, cached_tokens=2)
+        telemetry_service.record("play", None, 1, cache_hit=True)
+        telemetry_service.record("vibe_score", "gpt-mini", 40, fallback="timeout")
+        snap = telemetry_service.snapshot()
+        play = snap["phases"]["play"]
+        self.assertEqual(play["calls"], 5)
+        self.assertEqual(play["cache_hits"], 1)
+        self.assertAlmostEqual(play["cache_hit_rate"], 0.167)
+        self.assertEqual(play["input_tokens"], 50)
+        self.assertEqual(play["cached_tokens"], 10)
+        self.assertEqual(play["models"], {"gpt-test": 5})
+        self.assertEqual(play["latency_ms"]["p50"], 300)
+        self.assertEqual(play["latency_ms"]["max"], 5000)
+        self.assertEqual(play["histogram"]["<=5000"], 1)
+        vibe = snap["phases"]["vibe_score"]
+        self.assertEqual(vibe["fallback_reasons"], {"timeout": 1})
+        self.assertEqual(len(snap["recent"]), 7)
+
+    def test_persist_rollup_and_prune(self):
+        telemetry_service.record("auto_queue", "gpt-test", 900, input_tokens=20)
+        telemetry_service.record("auto_queue", None, 2, cache_hit=True)
+        telemetry_service.record("auto_queue", "gpt-test", 1100, fallback="empty_queries")
+        daily = telemetry_service.daily_rollup(self.db, 7)
+        self.assertEqual(len(daily), 1)
+        row = daily[0]
+        self.assertEqual(row["total"], 3)
+        self.assertEqual(row["cache_hits"], 1)
+        self.assertEqual(row["fallbacks"], 1)
+        self.assertEqual(row["avg_latency_ms"], 1000)
+        self.assertEqual(row["input_tokens"], 20)
+
+        con = self.db()
+        con.execute("UPDATE llm_calls SET ts = ts - 90 * 86400 WHERE cache_hit = 1;")
+        con.commit()
+        con.close()
+        self.assertEqual(telemetry_service.prune(self.db, 60), 1)
+        self.assertEqual(telemetry_service.daily_rollup(self.db, 7)[0]["total"], 2)
+
+
+    def test_record_buffers_until_flush(self):
+        for ms in (100, 200, 300):
+            telemetry_service.record("play", "gpt-test", ms)
+        con = self.db()
+        self.assertEqual(con.execute("SELECT COUNT(*) FROM llm_calls;").fetchone()[0], 0)
+        con.close()
+        self.assertEqual(telemetry_service.flush(self.db), 3)
+        self.assertEqual(telemetry_service.flush(self.db), 0)
+        con = self.db()
+        self.assertEqual(con.execute("SELECT COUNT(*) FROM llm_calls;").fetchone()[0], 3)
+        con.close()
+
+    def test_failed_flush_keeps_rows_for_the_next_one(self):
+        telemetry_service.record("play", "gpt-test", 100)
+
+        def broken_db():
+            raise sqlite3.OperationalError("database is locked")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            telemetry_service.flush(broken_db)
+        telemetry_service.record("play", "gpt-test", 200)
+        self.assertEqual(telemetry_service.flush(self.db), 2)
+        con = self.db()
+        rows = con.execute("SELECT latency_ms FROM llm_calls ORDER BY id;").fetchall()
+        con.close()
+        self.assertEqual(rows, [(100,), (200,)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import track_health_service  # noqa: E402
+
+NOW = 1_700_000_000
+
+
+class TrackHealthServiceTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp(prefix="ytplay-health-")
+        self.addCleanup(shutil.rmtree, tmp, True)
+        self.db_path = os.path.join(tmp, "cache.sqlite3")
+        con = self.db()
+        con.execute(track_health_service.CREATE_TABLE_SQL)
+        con.commit()
+        con.close()
+        track_health_service.reset()
+        track_health_service.configure(600)
+        self.addCleanup(track_health_service.reset)
+        self.addCleanup(track_health_service.configure, 7200)
+
+    def db(self):
+        return sqlite3.connect(self.db_path)
+
+    def row(self, video_id):
+        con = self.db()
+        try:
+            return con.execute(
+                "SELECT resolve_ok, resolve_failed, consecutive_failures, score, blocked_until "
+                "FROM track_health WHERE videoId=?;",
+                (video_id,),
+            ).fetchone()
+        finally:
+            con.close()
+
+    def test_failures_block_with_doubling_ttl(self):
+        self.assertEqual(track_health_service.record_failure(self.db, "dead", now=NOW), NOW + 600)
+        self.assertTrue(track_health_service.is_blocked("dead", now=NOW + 599))
+        self.assertFalse(track_health_service.is_blocked("dead", now=NOW + 600))
+        self.assertEqual(track_health_service.record_failure(self.db, "dead", now=NOW + 700), NOW + 700 + 1200)
+        self.assertEqual(track_health_service.blocked_ids(now=NOW + 800), {"dead"})
+        self.assertEqual(self.row("dead"), (0, 2, 2, 0.25, NOW + 1900))
+
+    def test_success_unblocks_and_raises_score(self):
+        track_health_service.record_failure(self.db, "flaky", now=NOW)
+        self.assertTrue(track_health_service.record_success(self.db, "flaky", now=NOW + 10))
+        self.assertFalse(track_health_service.is_blocked("flaky", now=NOW + 20))
+        self.assertEqual(self.row("flaky"), (1, 1, 0, 0.5, 0))
+        # Healthy tracks without a failure history are never written.
+        self.assertFalse(track_health_service.record_success(self.db, "fine", now=NOW))
+        self.assertIsNone(self.row("fine"))
+
+    def test_many_distinct_failures_are_an_outage_not_dead_tracks(self):
+        ids = [f"vid{i}" for i in range(track_health_service.OUTAGE_MIN_IDS)]
+        for offset, video_id in enumerate(ids[:-1]):
+            self.assertGreater(track_health_service.record_failure(self.db, video_id, now=NOW + offset), 0)
+        self.assertEqual(track_health_service.record_failure(self.db, ids[-1], now=NOW + 10), 0)
+        # The blocks placed earlier in the window are lifted, in memory and on disk.
+        self.assertEqual(track_health_service.blocked_ids(now=NOW + 11), set())
+        self.assertEqual(self.row("vid0")[2:], (0, 0.333, 0))
+        self.assertIsNone(self.row(ids[-1]))
+        self.assertEqual(track_health_service.stats()["outage_skips"], 1)
+        # Once the window has passed, a lone failure blocks again.
+        later = NOW + track_health_service.OUTAGE_WINDOW_SEC + 20
+        self.assertGreater(track_health_service.record_failure(self.db, "dead", now=later), later)
+
+    def test_load_restores_blocks_after_restart(self):
+        track_health_service.record_failure(self.db, "dead", now=NOW)
+        track_health_service.reset()
+        self.assertFalse(track_health_service.is_blocked("dead", now=NOW + 1))
+        track_health_service.load(self.db, now=NOW + 1)
+        self.assertTrue(track_health_service.is_blocked("dead", now=NOW + 1))
+        self.assertEqual(track_health_service.stats()["tracked"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
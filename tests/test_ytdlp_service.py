@@ -0,0 +1,85 @@
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+from ytplayd_app.services import ytdlp_service  # noqa: E402
+
+
+class DownloadError(Exception):
+    pass
+
+
+class FakeYoutubeDL:
+    created = []
+
+    def __init__(self, opts):
+        self.opts = opts
+        FakeYoutubeDL.created.append(self)
+
+    def extract_info(self, url, download=False):
+        if url.endswith("gone"):
+            raise DownloadError("Video unavailable")
+        return {"id": url[-3:], "url": f"https://googlevideo.example/{url[-3:]}"}
+
+    def sanitize_info(self, info):
+        return info
+
+    def close(self):
+        pass
+
+
+FAKE_YT_DLP = types.SimpleNamespace(YoutubeDL=FakeYoutubeDL, utils=types.SimpleNamespace(DownloadError=DownloadError))
+
+
+class YtdlpServiceTests(unittest.TestCase):
+    def setUp(self):
+        FakeYoutubeDL.created = []
+        patcher = mock.patch.object(ytdlp_service, "yt_dlp", FAKE_YT_DLP)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        ytdlp_service.reset()
+        self.addCleanup(ytdlp_service.reset)
+
+    def test_parse_extractor_args_matches_cli_syntax(self):
+        self.assertEqual(
+            ytdlp_service.parse_extractor_args("YouTube:player_client=android,web;player-skip=webpage"),
+            {"youtube": {"player_client": ["android", "web"], "player_skip": ["webpage"]}},
+        )
+        self.assertEqual(
+            ytdlp_service.parse_extractor_args(r"youtube:po_token=web\,abc"),
+            {"youtube": {"po_token": ["web,abc"]}},
+        )
+        self.assertEqual(ytdlp_service.parse_extractor_args("__none__"), {})
+        self.assertEqual(ytdlp_service.parse_extractor_args(""), {})
+
+    def test_options_carry_profile_and_js_runtime(self):
+        opts = ytdlp_service.build_options("youtube:player_client=android", "node:/usr/bin/node")
+        self.assertEqual(opts["format"], "bestaudio")
+        self.assertEqual(opts["extractor_args"], {"youtube": {"player_client": ["android"]}})
+        self.assertEqual(opts["js_runtimes"], {"node": {"path": "/usr/bin/node"}})
+
+    def test_instances_are_reused_per_profile(self):
+        self.assertEqual(ytdlp_service.resolve("abc", "youtube:player_client=android"), "https://googlevideo.example/abc")
+        ytdlp_service.resolve("def", "youtube:player_client=android")
+        ytdlp_service.resolve("ghi", "")
+        self.assertEqual(len(FakeYoutubeDL.created), 2)
+        self.assertIsNone(ytdlp_service.resolve("gone", ""))
+        stats = ytdlp_service.stats()
+        self.assertEqual((stats["resolves"], stats["failures"], stats["idle_instances"]), (4, 1, 2))
+
+    def test_missing_module_raises(self):
+        with mock.patch.object(ytdlp_service, "yt_dlp", None):
+            self.assertFalse(ytdlp_service.available())
+            with self.assertRaises(RuntimeError):
+                ytdlp_service.resolve("abc", "")
+
+
+if __name__ == "__main__":
+    unittest.main()